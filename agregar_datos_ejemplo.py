@@ -8,6 +8,8 @@ from app.models.usuario import Usuario
 from app.models.destino import Destino
 from app.models.paquete import Paquete, PaqueteDestino
 from app.models.reserva import Reserva
+from app.services.estadisticas import EstadisticasService
+from app.services.analitica import AnaliticaService
 from datetime import date, timedelta
 
 app = create_app(Config)
@@ -169,6 +171,10 @@ with app.app_context():
     
     db.session.commit()
     
+    # Los datos se insertaron sin pasar por los servicios: recalcular los acumulados
+    EstadisticasService.reconstruir()
+    AnaliticaService.reconstruir()
+    
     print("\n" + "="*60)
     print("✅ PROCESO COMPLETADO")
     print("="*60)
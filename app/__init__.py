@@ -57,7 +57,31 @@ def create_app(config_class=Config):
     from app.blueprints.carrito import bp as carrito_bp
     app.register_blueprint(carrito_bp, url_prefix='/api/carrito')
     
-    from app.models import Usuario, Destino, Paquete, Reserva, Viajero
+    from app.models import Usuario, Destino, Paquete, Reserva, Viajero, CarritoItem
+    
+    from app.services.instrumentacion import init_instrumentacion
+    init_instrumentacion(app)
+    
+    from app.services.metricas import init_metricas
+    init_metricas(app)
+    
+    from app.services.perfilado import init_perfilado
+    init_perfilado(app)
+    
+    from app.services.carrito_store import init_carrito_store
+    init_carrito_store(app)
+    
+    from app.services.catalogo_cache import init_catalogo_cache
+    init_catalogo_cache(app)
+    
+    from app.services.catalogo_version import init_catalogo_version
+    init_catalogo_version(app)
+    
+    from app.services.compresion import init_compresion
+    init_compresion(app)
+    
+    from app.services.estaticos import init_estaticos
+    init_estaticos(app)
     
     # Handlers de error
     @app.errorhandler(404)
@@ -72,5 +96,26 @@ def create_app(config_class=Config):
     with app.app_context():
         db.create_all()
     
+    from app.services.catalogo_snapshot import init_catalogo_snapshot
+    init_catalogo_snapshot(app)
+    
+    from app.services.busqueda import init_indice_busqueda
+    init_indice_busqueda(app)
+    
+    from app.services.autocompletado import init_autocompletado
+    init_autocompletado(app)
+    
+    from app.services.estadisticas import init_estadisticas
+    init_estadisticas(app)
+    
+    from app.services.analitica import init_analitica
+    init_analitica(app)
+    
+    from app.services.reportes import init_reportes
+    init_reportes(app)
+    
+    from app.services.trigramas import init_trigramas
+    init_trigramas(app)
+    
     return app
 
@@ -1,6 +1,8 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app, \
+    Response
 from app import db, csrf
-from sqlalchemy import or_, func
+from sqlalchemy import or_
+from sqlalchemy.orm import contains_eager
 from app.models.usuario import Usuario
 from app.models.destino import Destino
 from app.models.paquete import Paquete, PaqueteDestino
@@ -9,6 +11,13 @@ from app.forms.admin_forms import DestinoForm, PaqueteForm
 from app.services.destino_service import DestinoService
 from app.services.paquete_service import PaqueteService
 from app.services.reserva_service import ReservaService
+from app.services.estadisticas import EstadisticasService
+from app.services.analitica import AnaliticaService
+from app.services.reportes import ReportesService
+from app.services.paginacion import leer_pagina, paginar, total_estimado
+from app.services.trigramas import coincidencias
+from app.services.perfilado import MODOS
+from app.utils import normalizar_texto
 from functools import wraps
 from datetime import datetime
 
@@ -35,39 +44,23 @@ def admin_required(f):
 @admin_required
 def dashboard():
     """Dashboard principal del administrador"""
-    total_destinos = Destino.query.count()
-    total_paquetes = Paquete.query.count()
-    total_reservas = Reserva.query.count()
-    reservas_confirmadas = Reserva.query.filter_by(estado='confirmada').count()
+    # Totales acumulados: una fila leída por clave primaria
+    estadisticas = EstadisticasService.obtener()
     
     # Últimas reservas
     ultimas_reservas = Reserva.query.order_by(Reserva.fecha_reserva.desc()).limit(5).all()
     
     # Paquetes más reservados
-    paquetes_reservados = db.session.query(
-        Paquete.nombre,
-        func.count(Reserva.id).label('total')
-    ).join(Reserva).group_by(Paquete.id).order_by(func.count(Reserva.id).desc()).limit(5).all()
-    
-    # Ingresos totales (suma de precios de reservas confirmadas)
-    ingresos_totales = db.session.query(
-        func.sum(Paquete.precio_total)
-    ).join(Reserva).filter(Reserva.estado == 'confirmada').scalar() or 0
-    
-    # Reservas por estado
-    reservas_canceladas = Reserva.query.filter_by(estado='cancelada').count()
-    
-    # Paquetes agotados
-    paquetes_agotados = Paquete.query.filter_by(disponibles=0).count()
+    paquetes_reservados = EstadisticasService.paquetes_mas_reservados(5)
     
     return render_template('web/admin/dashboard.html',
-                         total_destinos=total_destinos,
-                         total_paquetes=total_paquetes,
-                         total_reservas=total_reservas,
-                         reservas_confirmadas=reservas_confirmadas,
-                         reservas_canceladas=reservas_canceladas,
-                         ingresos_totales=float(ingresos_totales),
-                         paquetes_agotados=paquetes_agotados,
+                         total_destinos=estadisticas.destinos,
+                         total_paquetes=estadisticas.paquetes,
+                         total_reservas=estadisticas.reservas,
+                         reservas_confirmadas=estadisticas.confirmadas,
+                         reservas_canceladas=estadisticas.canceladas,
+                         ingresos_totales=float(estadisticas.ingresos or 0),
+                         paquetes_agotados=estadisticas.paquetes_agotados,
                          ultimas_reservas=ultimas_reservas,
                          paquetes_reservados=paquetes_reservados)
 
@@ -78,25 +71,41 @@ def reservas():
     busqueda = request.args.get('buscar', '').strip()
     estado_filtro = request.args.get('estado', '').strip()
     
-    query = Reserva.query
+    # Usuario y paquete llegan en la misma consulta (el template los muestra por fila)
+    query = Reserva.query.join(Usuario).join(Paquete).options(
+        contains_eager(Reserva.usuario), contains_eager(Reserva.paquete)
+    )
     
     if busqueda:
-        query = query.join(Usuario).join(Paquete).filter(
+        # Subcadena en nombre/email del usuario o nombre del paquete (índice de trigramas)
+        query = query.filter(
             or_(
-                Usuario.nombre_completo.ilike(f'%{busqueda}%'),
-                Usuario.email.ilike(f'%{busqueda}%'),
-                Paquete.nombre.ilike(f'%{busqueda}%')
+                Reserva.usuario_id.in_(coincidencias('usuario', busqueda)),
+                Reserva.paquete_id.in_(coincidencias('paquete', busqueda))
             )
         )
     
     if estado_filtro:
         query = query.filter(Reserva.estado == estado_filtro)
     
-    reservas_list = query.order_by(Reserva.fecha_reserva.desc()).all()
+    # Página por cursor: el costo no depende de cuántas reservas haya antes
+    try:
+        limite, despues = leer_pagina(limite_defecto=current_app.config.get('PAGINACION_LIMITE', 50))
+        reservas_list, siguiente = paginar(
+            query, [(Reserva.fecha_reserva, True), (Reserva.id, True)], limite, despues
+        )
+    except ValueError:
+        flash('Página inválida', 'warning')
+        return redirect(url_for('admin.reservas', buscar=busqueda or None, estado=estado_filtro or None))
+    
     return render_template('web/admin/reservas.html', 
                          reservas=reservas_list,
                          busqueda=busqueda,
-                         estado_filtro=estado_filtro)
+                         estado_filtro=estado_filtro,
+                         total=total_estimado(query, None if busqueda or estado_filtro else 'reservas'),
+                         total_max=current_app.config.get('PAGINACION_TOTAL_MAX', 10000),
+                         siguiente=siguiente,
+                         es_primera=despues is None)
 
 @bp.route('/reservas/detalle/<int:id>')
 @admin_required
@@ -206,11 +215,14 @@ def listar_destinos():
     query = Destino.query
     
     if busqueda:
+        # Subcadena sin tildes ni mayúsculas sobre las copias normalizadas
+        # ("paraiso" encuentra "Valparaíso"); la lista completa no se pagina
+        norm = normalizar_texto(busqueda)
         query = query.filter(
             or_(
-                Destino.nombre.ilike(f'%{busqueda}%'),
-                Destino.descripcion.ilike(f'%{busqueda}%'),
-                Destino.origen.ilike(f'%{busqueda}%')
+                Destino.nombre_norm.contains(norm, autoescape=True),
+                Destino.origen_norm.contains(norm, autoescape=True),
+                Destino.descripcion_norm.contains(norm, autoescape=True)
             )
         )
     
@@ -466,7 +478,79 @@ def eliminar_paquete_api(id):
         db.session.rollback()
         return jsonify({'error': f'Error al eliminar paquete: {str(e)}'}), 500
 
+@bp.route('/api/ventas', methods=['GET'])
+@admin_required
+def api_ventas():
+    """
+    Reporte de ventas confirmadas desde el cubo por período
+    
+    Query params: periodo (dia|semana|mes), desde, hasta (YYYY-MM-DD),
+    por (paquete|destino|origen)
+    """
+    try:
+        desde = request.args.get('desde')
+        hasta = request.args.get('hasta')
+        ventas = AnaliticaService.reporte(
+            periodo=request.args.get('periodo', 'mes'),
+            desde=datetime.strptime(desde, '%Y-%m-%d').date() if desde else None,
+            hasta=datetime.strptime(hasta, '%Y-%m-%d').date() if hasta else None,
+            por=request.args.get('por') or None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(ventas)
+
+@bp.route('/api/reportes/operaciones', methods=['GET'])
+@admin_required
+def api_reporte_operaciones():
+    """Reporte de ocupación, ingresos por cupo y cancelaciones por anticipación"""
+    try:
+        return jsonify(ReportesService.operaciones())
+    except RuntimeError as e:
+        # numpy no instalado
+        return jsonify({'error': str(e)}), 503
+
 # ========== CRUD RESERVAS ==========
 # NOTA: Las reservas son de solo lectura para administradores
 # Las reservas solo pueden ser creadas por los clientes y no pueden ser modificadas ni eliminadas
 
+@bp.route('/api/perfilado', methods=['POST'])
+@csrf.exempt
+@admin_required
+def api_perfilado():
+    """
+    Activar o desactivar el perfilado de las peticiones de este administrador
+    
+    JSON: {"modo": "cpu" | "memoria" | null}
+    """
+    if 'perfiles' not in current_app.extensions:
+        return jsonify({'error': 'El perfilado está desactivado (PERFILADO_ACTIVO)'}), 403
+    modo = (request.get_json(silent=True) or {}).get('modo')
+    if modo is not None and modo not in MODOS:
+        return jsonify({'error': f'Modo inválido. Opciones: {", ".join(MODOS)}'}), 400
+    if modo:
+        session['perfilar'] = modo
+    else:
+        session.pop('perfilar', None)
+    return jsonify({'modo': modo})
+
+@bp.route('/api/perfiles', methods=['GET'])
+@admin_required
+def api_perfiles():
+    """Perfiles guardados en este proceso, del más reciente al más antiguo"""
+    perfiles = current_app.extensions.get('perfiles')
+    if perfiles is None:
+        return jsonify({'error': 'El perfilado está desactivado (PERFILADO_ACTIVO)'}), 403
+    return jsonify({'perfiles': perfiles.listar(), 'modo': session.get('perfilar')})
+
+@bp.route('/api/perfiles/<int:perfil_id>.pstats', methods=['GET'])
+@admin_required
+def api_descargar_perfil(perfil_id):
+    """Descargar un perfil como archivo pstats"""
+    perfiles = current_app.extensions.get('perfiles')
+    perfil = perfiles.obtener(perfil_id) if perfiles else None
+    if perfil is None:
+        return jsonify({'error': 'Perfil no encontrado'}), 404
+    return Response(perfil['pstats'], mimetype='application/octet-stream', headers={
+        'Content-Disposition': f'attachment; filename=perfil-{perfil_id}-{perfil["endpoint"] or "sin_endpoint"}.pstats'
+    })
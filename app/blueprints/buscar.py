@@ -1,28 +1,68 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 from app.models.paquete import Paquete, PaqueteDestino
 from app.models.destino import Destino
+from app.services.autocompletado import obtener_autocompletado
+from app.services.busqueda import obtener_indice
+from app.services.paginacion import leer_pagina, paginar, pedir_total, respuesta_pagina, total_estimado
+from app.utils import normalizar_texto, filtro_prefijo, leer_seleccion, expandir
 from datetime import datetime
 
 bp = Blueprint('buscar', __name__)
 
+def filtrar_texto_sin_indice(query, origen='', destino='', texto=''):
+    """
+    Filtros de texto sin índice de búsqueda
+    
+    Origen y destino se comparan por prefijo sobre las columnas normalizadas
+    (sin tildes ni mayúsculas), lo que usa sus índices. El texto libre sigue
+    siendo una búsqueda por subcadena que recorre la tabla.
+    """
+    if origen:
+        query = query.filter(filtro_prefijo(Paquete.origen_norm, origen))
+    
+    if destino or texto:
+        query = query.join(PaqueteDestino).join(Destino)
+    
+    if destino:
+        query = query.filter(filtro_prefijo(Destino.nombre_norm, destino))
+    
+    if texto:
+        patron = f'%{normalizar_texto(texto)}%'
+        query = query.filter(or_(
+            Paquete.nombre_norm.like(patron),
+            Paquete.origen_norm.like(patron),
+            Destino.nombre_norm.like(patron),
+            Destino.descripcion.ilike(f'%{texto}%'),
+            Destino.actividades.ilike(f'%{texto}%')
+        ))
+    
+    return query.distinct()
+
+def filtrar_texto(query, origen='', destino='', texto=''):
+    """
+    Filtros de texto usando el índice de búsqueda si existe
+    
+    Con índice, las palabras se buscan por prefijo en cada campo y los
+    resultados salen ordenados por relevancia.
+    """
+    indice = obtener_indice()
+    if indice is None:
+        return filtrar_texto_sin_indice(query, origen, destino, texto)
+    return indice.aplicar(query, Paquete, {'origen': origen, 'destinos': destino, None: texto})
+
 @bp.route('', methods=['GET'])
 def buscar():
     origen = request.args.get('origen', '').strip()
     destino = request.args.get('destino', '').strip()
+    texto = request.args.get('q', '').strip()
     fecha_inicio = request.args.get('fecha_inicio', '').strip()
     fecha_fin = request.args.get('fecha_fin', '').strip()
     precio_min = request.args.get('precio_min', '').strip()
     precio_max = request.args.get('precio_max', '').strip()
     
-    query = Paquete.query
-    
-    if origen:
-        query = query.filter(Paquete.origen.ilike(f'%{origen}%'))
-    
-    if destino:
-        query = query.join(PaqueteDestino).join(Destino).filter(
-            Destino.nombre.ilike(f'%{destino}%')
-        )
+    query = filtrar_texto(Paquete.query, origen, destino, texto)
     
     if fecha_inicio:
         try:
@@ -50,6 +90,43 @@ def buscar():
         except:
             pass
     
-    paquetes = query.distinct().all()
-    return jsonify([p.to_dict() for p in paquetes])
+    # ?fields= / ?expand=: sin destinos en la selección no se cargan
+    seleccion = leer_seleccion()
+    if expandir(seleccion, 'destinos')[0]:
+        query = query.options(joinedload(Paquete.destinos).joinedload(PaqueteDestino.destino))
+    
+    # Paginación por cursor (?limit=&after=): por relevancia si hay índice, luego por id
+    try:
+        pagina = leer_pagina()
+        if pagina:
+            limite, despues = pagina
+            indice = obtener_indice()
+            relevancia = indice.relevancia({'origen': origen, 'destinos': destino, None: texto}) if indice else None
+            orden = ([(relevancia, False)] if relevancia is not None else []) + [(Paquete.id, False)]
+            paquetes, siguiente = paginar(query, orden, limite, despues)
+            total = total_estimado(query) if pedir_total() else None
+            return respuesta_pagina([p.to_dict(seleccion) for p in paquetes], limite, siguiente, total)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Sin ?limit= se devuelven todas las coincidencias, como antes de la paginación
+    paquetes = query.all()
+    return jsonify([p.to_dict(seleccion) for p in paquetes])
 
+
+@bp.route('/sugerencias', methods=['GET'])
+def sugerencias():
+    """
+    Autocompletado de orígenes y destinos
+    
+    Query params:
+        q: texto escrito (se compara por prefijo de cada palabra, sin tildes)
+        tipo: 'origen' o 'destino' (opcional, por defecto ambos)
+        limite: máximo de sugerencias (por defecto 8)
+    """
+    tipo = request.args.get('tipo') or None
+    if tipo not in (None, 'origen', 'destino'):
+        return jsonify({'error': "tipo debe ser 'origen' o 'destino'"}), 400
+    limite = request.args.get('limite', 8, type=int)
+    limite = max(1, min(limite, current_app.config.get('AUTOCOMPLETAR_MAX', 20)))
+    return jsonify(obtener_autocompletado().sugerir(request.args.get('q', ''), tipo, limite))
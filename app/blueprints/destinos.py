@@ -1,47 +1,83 @@
 from flask import Blueprint, request, jsonify
 from app import db, csrf
 from app.models.destino import Destino
+from app.services.catalogo_cache import respuesta_catalogo
+from app.services.catalogo_snapshot import respuesta_snapshot
+from app.services.catalogo_version import condicional_catalogo
+from app.services.serializadores import listar_destinos
+from app.utils import leer_seleccion
+from app.services.paginacion import leer_pagina, paginar, pedir_total, respuesta_pagina, total_estimado
 
 bp = Blueprint('destinos', __name__)
 
 @bp.route('', methods=['GET'])
+@condicional_catalogo
 def listar():
     try:
         destacados = request.args.get('destacados', '').lower() == 'true'
+        # ?fields=: solo los campos pedidos
+        seleccion = leer_seleccion()
         
-        if destacados:
-            # Retornar solo destinos destacados (los más usados en paquetes o los primeros)
-            from app.models.paquete import PaqueteDestino
-            from sqlalchemy import func
-            
-            destinos = []
-            
-            # Intentar obtener destinos que están en más paquetes (más populares)
-            try:
-                destinos = Destino.query.join(PaqueteDestino).group_by(Destino.id).order_by(
-                    func.count(PaqueteDestino.paquete_id).desc()
-                ).limit(6).all()
-            except:
-                pass
+        # Paginación por cursor (?limit=&after=), ordenada por id
+        pagina = None if destacados else leer_pagina()
+        if pagina:
+            limite, despues = pagina
+            destinos, siguiente = paginar(Destino.query, [(Destino.id, False)], limite, despues)
+            total = total_estimado(Destino.query, 'destinos') if pedir_total() else None
+            return respuesta_pagina([d.to_dict(seleccion) for d in destinos], limite, siguiente, total)
+        
+        # Catálogo completo: servirlo desde el snapshot compartido si está activo
+        if not destacados and seleccion is None:
+            respuesta = respuesta_snapshot('destinos')
+            if respuesta:
+                return respuesta
+        
+        def construir():
+            if destacados:
+                # Retornar solo destinos destacados (los más usados en paquetes o los primeros)
+                from app.models.paquete import PaqueteDestino
+                from sqlalchemy import func
+                
+                destinos = []
+                
+                # Intentar obtener destinos que están en más paquetes (más populares)
+                try:
+                    destinos = Destino.query.join(PaqueteDestino).group_by(Destino.id).order_by(
+                        func.count(PaqueteDestino.paquete_id).desc()
+                    ).limit(6).all()
+                except:
+                    pass
+                
+                # Si hay menos de 6 con paquetes, completar con los primeros destinos
+                if len(destinos) < 6:
+                    todos_destinos = Destino.query.limit(6).all()
+                    ids_existentes = {d.id for d in destinos}
+                    for destino in todos_destinos:
+                        if destino.id not in ids_existentes and len(destinos) < 6:
+                            destinos.append(destino)
+                # La popularidad depende de los paquetes que incluyen cada destino
+                return [d.to_dict(seleccion) for d in destinos], {'destinos', 'paquetes'}
             
-            # Si hay menos de 6 con paquetes, completar con los primeros destinos
-            if len(destinos) < 6:
-                todos_destinos = Destino.query.limit(6).all()
-                ids_existentes = {d.id for d in destinos}
-                for destino in todos_destinos:
-                    if destino.id not in ids_existentes and len(destinos) < 6:
-                        destinos.append(destino)
-        else:
             # Retornar todos los destinos
-            destinos = Destino.query.all()
+            if seleccion is None:
+                return listar_destinos(), {'destinos'}
+            return [d.to_dict(seleccion) for d in Destino.query.all()], {'destinos'}
         
-        return jsonify([d.to_dict() for d in destinos])
+        return respuesta_catalogo(('destinos', destacados, seleccion and seleccion.clave()), construir)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/<int:id>', methods=['GET'])
+@condicional_catalogo
 def obtener(id):
-    return jsonify(Destino.query.get_or_404(id).to_dict())
+    seleccion = leer_seleccion()
+    
+    def construir():
+        return Destino.query.get_or_404(id).to_dict(seleccion), {('destino', id)}
+    
+    return respuesta_catalogo(('destino', id, seleccion and seleccion.clave()), construir)
 
 @bp.route('', methods=['POST'])
 @csrf.exempt
@@ -2,41 +2,84 @@ from flask import Blueprint, request, jsonify
 from app import db, csrf
 from app.models.paquete import Paquete, PaqueteDestino
 from app.models.destino import Destino
+from app.services.catalogo_cache import respuesta_catalogo
+from app.services.catalogo_snapshot import respuesta_snapshot
+from app.services.catalogo_version import condicional_catalogo
+from app.services.paginacion import leer_pagina, paginar, pedir_total, respuesta_pagina, total_estimado
+from app.services.serializadores import listar_paquetes
+from app.utils import leer_seleccion, expandir
 from sqlalchemy.orm import joinedload
 from datetime import datetime, date
 
 bp = Blueprint('paquetes', __name__)
 
+def consulta_paquetes(seleccion=None):
+    """Paquetes con sus destinos cargados, salvo que la selección no los incluya"""
+    if not expandir(seleccion, 'destinos')[0]:
+        return Paquete.query
+    return Paquete.query.options(joinedload(Paquete.destinos).joinedload(PaqueteDestino.destino))
+
 @bp.route('', methods=['GET'])
+@condicional_catalogo
 def listar():
     try:
         destacados = request.args.get('destacados', '').lower() == 'true'
+        # ?fields= / ?expand=: solo los campos y relaciones pedidos
+        seleccion = leer_seleccion()
+        
+        # Paginación por cursor (?limit=&after=), ordenada por id
+        pagina = None if destacados else leer_pagina()
+        if pagina:
+            limite, despues = pagina
+            paquetes, siguiente = paginar(consulta_paquetes(seleccion), [(Paquete.id, False)], limite, despues)
+            total = total_estimado(Paquete.query, 'paquetes') if pedir_total() else None
+            return respuesta_pagina([p.to_dict(seleccion) for p in paquetes], limite, siguiente, total)
+        
+        # Catálogo completo: servirlo desde el snapshot compartido si está activo
+        if not destacados and seleccion is None:
+            respuesta = respuesta_snapshot('paquetes')
+            if respuesta:
+                return respuesta
         
-        if destacados:
-            # Retornar solo paquetes destacados con criterios automáticos
-            # Mostrar paquetes con cupos disponibles, priorizando fechas futuras
-            hoy = date.today()
-            paquetes = Paquete.query.options(
-                joinedload(Paquete.destinos).joinedload(PaqueteDestino.destino)
-            ).filter(
-                Paquete.disponibles > 0  # Con cupos disponibles
-            ).order_by(
-                Paquete.fecha_inicio.desc(),  # Fechas más recientes primero (futuras o pasadas)
-                Paquete.disponibles.desc()    # Más cupos primero
-            ).limit(6).all()  # Máximo 6 paquetes
-        else:
-            # Retornar todos los paquetes
-            paquetes = Paquete.query.options(
-                joinedload(Paquete.destinos).joinedload(PaqueteDestino.destino)
-            ).all()
+        def construir():
+            if destacados:
+                # Retornar solo paquetes destacados con criterios automáticos
+                # Mostrar paquetes con cupos disponibles, priorizando fechas futuras
+                hoy = date.today()
+                paquetes = consulta_paquetes(seleccion).filter(
+                    Paquete.disponibles > 0  # Con cupos disponibles
+                ).order_by(
+                    Paquete.fecha_inicio.desc(),  # Fechas más recientes primero (futuras o pasadas)
+                    Paquete.disponibles.desc()    # Más cupos primero
+                ).limit(6).all()  # Máximo 6 paquetes
+            elif seleccion is None:
+                # Catálogo completo: serializadores compilados sobre filas (sin ORM)
+                return listar_paquetes(), {'paquetes', 'destinos'}
+            else:
+                # Retornar todos los paquetes
+                paquetes = consulta_paquetes(seleccion).all()
+            # Los paquetes incluyen sus destinos: cambios en ambas tablas invalidan la lista
+            return [p.to_dict(seleccion) for p in paquetes], {'paquetes', 'destinos'}
         
-        return jsonify([p.to_dict() for p in paquetes])
+        return respuesta_catalogo(('paquetes', destacados, seleccion and seleccion.clave()), construir)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/<int:id>', methods=['GET'])
+@condicional_catalogo
 def obtener(id):
-    return jsonify(Paquete.query.get_or_404(id).to_dict())
+    seleccion = leer_seleccion()
+    
+    def construir():
+        paquete = consulta_paquetes(seleccion).filter_by(id=id).first_or_404()
+        etiquetas = {('paquete', id)}
+        if expandir(seleccion, 'destinos')[0]:
+            etiquetas |= {('destino', pd.destino_id) for pd in paquete.destinos}
+        return paquete.to_dict(seleccion), etiquetas
+    
+    return respuesta_catalogo(('paquete', id, seleccion and seleccion.clave()), construir)
 
 @bp.route('', methods=['POST'])
 @csrf.exempt
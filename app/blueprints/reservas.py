@@ -1,20 +1,110 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app, stream_with_context
 from app import db, csrf
 from app.models.reserva import Reserva
-from app.models.paquete import Paquete
+from app.models.paquete import Paquete, PaqueteDestino
 from app.models.viajero import Viajero
+from app.models.usuario import Usuario
 from app.services.reserva_service import ReservaService
+from app.services.paginacion import leer_pagina, paginar, pedir_total, respuesta_pagina, total_estimado
+from app.utils import leer_seleccion, expandir
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
 
 bp = Blueprint('reservas', __name__)
 
+def _consulta_reservas(seleccion=None):
+    """
+    Reservas con lo que va a serializar to_dict cargado en pocas consultas
+    
+    Solo se cargan las relaciones incluidas en la selección (?fields=/?expand=).
+    """
+    opciones = []
+    if expandir(seleccion, 'usuario')[0]:
+        opciones.append(joinedload(Reserva.usuario))
+    incluir, sub = expandir(seleccion, 'paquete')
+    if incluir:
+        carga = joinedload(Reserva.paquete)
+        if expandir(sub, 'destinos')[0]:
+            carga = carga.selectinload(Paquete.destinos).joinedload(PaqueteDestino.destino)
+        opciones.append(carga)
+    if expandir(seleccion, 'viajeros')[0]:
+        opciones.append(selectinload(Reserva.viajeros))
+    return Reserva.query.options(*opciones)
+
+def _quiere_ndjson():
+    return (request.args.get('formato') == 'ndjson'
+            or request.accept_mimetypes.best == 'application/x-ndjson')
+
+def _error_exportar(usuario_id=None):
+    """
+    Respuesta de error si la sesión no puede exportar reservas, o None si puede
+    
+    La exportación incluye datos personales: solo un administrador (rol
+    verificado en la base de datos, como en admin_required) o el propio
+    usuario cuando se exportan sus reservas.
+    """
+    if 'usuario_id' not in session:
+        return jsonify({'error': 'Debes iniciar sesión'}), 401
+    if usuario_id is not None and session['usuario_id'] == usuario_id:
+        return None
+    usuario = db.session.get(Usuario, session['usuario_id'])
+    if not usuario or usuario.rol != 'admin':
+        return jsonify({'error': 'Solo los administradores pueden exportar reservas'}), 403
+    return None
+
+def _exportar_ndjson(query, seleccion=None):
+    """
+    Exportar las reservas como NDJSON (una por línea) a medida que se leen
+    
+    yield_per lee las filas por lotes con un cursor del lado del servidor y las
+    relaciones de cada lote se cargan juntas (selectinload), así la memoria no
+    crece con el historial y el primer lote sale sin esperar al resto.
+    """
+    lote = current_app.config.get('RESERVAS_EXPORTAR_LOTE', 1000)
+    dumps = current_app.json.dumps
+    
+    def generar():
+        lineas = []
+        for reserva in query.order_by(Reserva.id).yield_per(lote):
+            lineas.append(f'{dumps(reserva.to_dict(seleccion))}\n')
+            if len(lineas) == lote:
+                yield ''.join(lineas)
+                lineas = []
+        if lineas:
+            yield ''.join(lineas)
+    
+    return current_app.response_class(stream_with_context(generar()), mimetype='application/x-ndjson')
+
+def _pagina_reservas(query, seleccion=None, tabla=None, usuario_id=None):
+    """
+    Página de reservas, las más recientes primero (?limit=&after=&total=)
+    
+    Con ?formato=ndjson (o Accept: application/x-ndjson) exporta todas en streaming
+    (solo administradores, o el usuario `usuario_id` si se indica).
+    Con ?fields= y ?expand= se serializan (y cargan) solo los campos y relaciones pedidos.
+    """
+    if _quiere_ndjson():
+        error = _error_exportar(usuario_id)
+        if error:
+            return error
+        return _exportar_ndjson(query, seleccion)
+    try:
+        limite, despues = leer_pagina(limite_defecto=current_app.config.get('PAGINACION_LIMITE', 50))
+        reservas, siguiente = paginar(query, [(Reserva.id, True)], limite, despues)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    total = total_estimado(query, tabla) if pedir_total() else None
+    return respuesta_pagina([r.to_dict(seleccion) for r in reservas], limite, siguiente, total)
+
 @bp.route('', methods=['GET'])
 def listar():
-    return jsonify([r.to_dict() for r in Reserva.query.all()])
+    seleccion = leer_seleccion()
+    return _pagina_reservas(_consulta_reservas(seleccion), seleccion, 'reservas')
 
 @bp.route('/<int:id>', methods=['GET'])
 def obtener(id):
-    return jsonify(Reserva.query.get_or_404(id).to_dict())
+    seleccion = leer_seleccion()
+    return jsonify(_consulta_reservas(seleccion).filter(Reserva.id == id).first_or_404().to_dict(seleccion))
 
 @bp.route('', methods=['POST'])
 @csrf.exempt
@@ -40,6 +130,41 @@ def crear():
         db.session.rollback()
         return jsonify({'error': f'Error al crear reserva: {str(e)}'}), 500
 
+@bp.route('/lote', methods=['POST'])
+@csrf.exempt
+def crear_lote():
+    """Checkout del carrito: crea todas las reservas en una sola transacción"""
+    if 'usuario_id' not in session:
+        return jsonify({'error': 'Debes iniciar sesión'}), 401
+    
+    # Solo los clientes pueden crear reservas
+    if session.get('usuario_rol') != 'cliente':
+        return jsonify({'error': 'Solo los usuarios con rol de cliente pueden crear reservas'}), 403
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not data.get('reservas'):
+        return jsonify({'error': 'reservas requeridas'}), 400
+    if not isinstance(data['reservas'], list):
+        return jsonify({'error': 'reservas debe ser una lista'}), 400
+    
+    try:
+        reservas = ReservaService.crear_reservas_lote(
+            session['usuario_id'],
+            data['reservas'],
+            telefono_contacto=data.get('telefono_contacto'),
+            comentarios=data.get('comentarios')
+        )
+        if data.get('limpiar_carrito', True):
+            from app.blueprints.carrito import vaciar_carrito
+            vaciar_carrito()
+        return jsonify([r.to_dict() for r in reservas]), 201
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Error al crear reservas: {str(e)}'}), 500
+
 @bp.route('/<int:id>', methods=['PUT'])
 @csrf.exempt
 def actualizar(id):
@@ -80,5 +205,7 @@ def eliminar(id):
 
 @bp.route('/usuario/<int:usuario_id>', methods=['GET'])
 def por_usuario(usuario_id):
-    return jsonify([r.to_dict() for r in Reserva.query.filter_by(usuario_id=usuario_id).all()])
+    seleccion = leer_seleccion()
+    return _pagina_reservas(_consulta_reservas(seleccion).filter(Reserva.usuario_id == usuario_id), seleccion,
+                            usuario_id=usuario_id)
 
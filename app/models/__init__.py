@@ -3,3 +3,8 @@ from app.models.destino import Destino
 from app.models.paquete import Paquete, PaqueteDestino
 from app.models.reserva import Reserva
 from app.models.viajero import Viajero
+from app.models.carrito import CarritoItem
+from app.models.estadisticas import EstadisticasGlobales, EstadisticasPaquete
+from app.models.ventas import VentaPeriodo
+from app.models.trigrama import Trigrama
+from app.models.catalogo_version import CatalogoVersion
@@ -0,0 +1,16 @@
+from app import db
+import time
+
+class CarritoItem(db.Model):
+    __tablename__ = 'carrito_items'
+
+    carrito_id = db.Column(db.String(64), primary_key=True)
+    paquete_id = db.Column(db.Integer, db.ForeignKey('paquetes.id', ondelete='CASCADE'), primary_key=True)
+    cantidad = db.Column(db.Integer, default=1, nullable=False)
+    # Cuándo se agregó el paquete (orden del carrito)
+    timestamp = db.Column(db.Float, default=time.time, nullable=False)
+    # Última escritura de la fila: la actividad del carrito es la más reciente
+    actualizado = db.Column(db.Float, default=time.time, nullable=False, server_default='0')
+
+    def __repr__(self):
+        return f'<CarritoItem {self.carrito_id}:{self.paquete_id} x{self.cantidad}>'
@@ -0,0 +1,14 @@
+from app import db
+
+
+class CatalogoVersion(db.Model):
+    """Versión del catálogo compartida entre workers (una sola fila, id=1)"""
+    __tablename__ = 'catalogo_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(40), nullable=False)
+    # Epoch en microsegundos (Last-Modified)
+    modificado_us = db.Column(db.BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f'<CatalogoVersion {self.token}>'
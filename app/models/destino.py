@@ -1,4 +1,6 @@
 from app import db
+from app.utils import normalizar_texto
+from sqlalchemy.orm import validates
 
 class Destino(db.Model):
     __tablename__ = 'destinos'
@@ -10,10 +12,25 @@ class Destino(db.Model):
     actividades = db.Column(db.Text)
     costo_base = db.Column(db.Numeric(10, 2), nullable=False)
     
+    # Copias normalizadas (sin tildes, minúsculas) para búsquedas por prefijo con índice
+    nombre_norm = db.Column(db.String(200), index=True)
+    origen_norm = db.Column(db.String(200), index=True)
+    # Sin índice: solo para la búsqueda por subcadena de administración
+    descripcion_norm = db.Column(db.Text)
+    
+    # Versión de la fila: sube en cada UPDATE (serializadores cacheados por versión)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=db.literal_column('version') + 1)
+    
     paquetes = db.relationship('PaqueteDestino', back_populates='destino', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
+    @validates('nombre', 'origen', 'descripcion')
+    def _normalizar(self, campo, valor):
+        setattr(self, f'{campo}_norm', normalizar_texto(valor))
+        return valor
+    
+    def to_dict(self, seleccion=None):
+        datos = {
             'id': self.id,
             'nombre': self.nombre,
             'origen': getattr(self, 'origen', None),
@@ -21,6 +38,7 @@ class Destino(db.Model):
             'actividades': self.actividades.split(',') if self.actividades else [],
             'costo_base': float(self.costo_base) if self.costo_base else 0.0
         }
+        return seleccion.filtrar(datos) if seleccion else datos
     
     def __repr__(self):
         return f'<Destino {self.nombre}>'
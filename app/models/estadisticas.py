@@ -0,0 +1,39 @@
+from app import db
+
+
+class EstadisticasGlobales(db.Model):
+    """Totales del dashboard de administración (una sola fila, id = 1)"""
+    __tablename__ = 'estadisticas_globales'
+
+    id = db.Column(db.Integer, primary_key=True)
+    destinos = db.Column(db.Integer, default=0, nullable=False)
+    paquetes = db.Column(db.Integer, default=0, nullable=False)
+    paquetes_agotados = db.Column(db.Integer, default=0, nullable=False)
+    reservas = db.Column(db.Integer, default=0, nullable=False)
+    confirmadas = db.Column(db.Integer, default=0, nullable=False)
+    canceladas = db.Column(db.Integer, default=0, nullable=False)
+    pasajeros = db.Column(db.Integer, default=0, nullable=False)
+    # Suma de precio_total de las reservas confirmadas
+    ingresos = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<EstadisticasGlobales {self.reservas} reservas>'
+
+
+class EstadisticasPaquete(db.Model):
+    """Contadores de reservas de un paquete"""
+    __tablename__ = 'estadisticas_paquetes'
+    __table_args__ = (
+        # Paquetes más reservados sin agrupar las reservas
+        db.Index('ix_estadisticas_paquetes_reservas', 'reservas'),
+    )
+
+    paquete_id = db.Column(db.Integer, db.ForeignKey('paquetes.id'), primary_key=True)
+    reservas = db.Column(db.Integer, default=0, nullable=False)
+    confirmadas = db.Column(db.Integer, default=0, nullable=False)
+    canceladas = db.Column(db.Integer, default=0, nullable=False)
+    pasajeros = db.Column(db.Integer, default=0, nullable=False)
+    agotado = db.Column(db.Boolean, default=False, nullable=False)
+
+    def __repr__(self):
+        return f'<EstadisticasPaquete {self.paquete_id}>'
@@ -1,4 +1,6 @@
 from app import db
+from app.utils import normalizar_texto, expandir
+from sqlalchemy.orm import validates
 
 class Paquete(db.Model):
     __tablename__ = 'paquetes'
@@ -11,26 +13,43 @@ class Paquete(db.Model):
     precio_total = db.Column(db.Numeric(10, 2), nullable=False)
     disponibles = db.Column(db.Integer, default=20, nullable=False)
     
+    # Copias normalizadas (sin tildes, minúsculas) para búsquedas por prefijo con índice
+    nombre_norm = db.Column(db.String(200), index=True)
+    origen_norm = db.Column(db.String(200), index=True)
+    
+    # Versión de la fila: sube en cada UPDATE (serializadores cacheados por versión)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=db.literal_column('version') + 1)
+    
     destinos = db.relationship('PaqueteDestino', back_populates='paquete', cascade='all, delete-orphan')
     reservas = db.relationship('Reserva', backref='paquete', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        # Cargar destinos de forma segura
-        destinos_list = []
-        for pd in self.destinos:
-            if pd and pd.destino:
-                destinos_list.append(pd.destino.to_dict())
-        
-        return {
+    @validates('nombre', 'origen')
+    def _normalizar(self, campo, valor):
+        setattr(self, f'{campo}_norm', normalizar_texto(valor))
+        return valor
+    
+    def to_dict(self, seleccion=None):
+        """
+        Args:
+            seleccion: Seleccion de campos/relaciones (None = todo, con destinos)
+        """
+        datos = {
             'id': self.id,
             'nombre': self.nombre,
             'origen': getattr(self, 'origen', None),
             'fecha_inicio': self.fecha_inicio.isoformat() if self.fecha_inicio else None,
             'fecha_fin': self.fecha_fin.isoformat() if self.fecha_fin else None,
             'precio_total': float(self.precio_total) if self.precio_total else 0.0,
-            'disponibles': self.disponibles,
-            'destinos': destinos_list
+            'disponibles': self.disponibles
         }
+        
+        incluir, sub = expandir(seleccion, 'destinos')
+        if incluir:
+            # Cargar destinos de forma segura
+            datos['destinos'] = [pd.destino.to_dict(sub) for pd in self.destinos if pd and pd.destino]
+        
+        return seleccion.filtrar(datos) if seleccion else datos
     
     def __repr__(self):
         return f'<Paquete {self.nombre}>'
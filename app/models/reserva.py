@@ -1,20 +1,37 @@
 from app import db
+from app.utils import expandir
 from datetime import datetime
 
 class Reserva(db.Model):
     __tablename__ = 'reservas'
+    __table_args__ = (
+        # Reservas de un usuario paginadas por id (más recientes primero)
+        db.Index('ix_reservas_usuario_id_id', 'usuario_id', 'id'),
+        # Lista de administración: más recientes primero, con o sin filtro
+        db.Index('ix_reservas_fecha_reserva', 'fecha_reserva'),
+        db.Index('ix_reservas_estado_fecha_reserva', 'estado', 'fecha_reserva'),
+        db.Index('ix_reservas_usuario_id_fecha_reserva', 'usuario_id', 'fecha_reserva'),
+        # Pasajeros confirmados por paquete (popularidad del autocompletado)
+        db.Index('ix_reservas_paquete_id_estado', 'paquete_id', 'estado'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
     paquete_id = db.Column(db.Integer, db.ForeignKey('paquetes.id'), nullable=False)
-    fecha_reserva = db.Column(db.DateTime, default=datetime.utcnow)
+    # NOT NULL: la lista de administración pagina por (fecha_reserva, id)
+    fecha_reserva = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     estado = db.Column(db.String(20), default='confirmada')
     numero_pasajeros = db.Column(db.Integer, default=1, nullable=False)
     telefono_contacto = db.Column(db.String(20))
     comentarios = db.Column(db.Text)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, seleccion=None):
+        """
+        Args:
+            seleccion: Seleccion de campos/relaciones (None = todo: usuario,
+                paquete con destinos y viajeros)
+        """
+        datos = {
             'id': self.id,
             'usuario_id': self.usuario_id,
             'paquete_id': self.paquete_id,
@@ -22,11 +39,21 @@ class Reserva(db.Model):
             'estado': self.estado,
             'numero_pasajeros': self.numero_pasajeros,
             'telefono_contacto': self.telefono_contacto,
-            'comentarios': self.comentarios,
-            'usuario': self.usuario.to_dict() if self.usuario else None,
-            'paquete': self.paquete.to_dict() if self.paquete else None,
-            'viajeros': [v.to_dict() for v in self.viajeros] if hasattr(self, 'viajeros') else []
+            'comentarios': self.comentarios
         }
+        
+        # Las relaciones no pedidas no se tocan, así no se cargan
+        incluir, sub = expandir(seleccion, 'usuario')
+        if incluir:
+            datos['usuario'] = self.usuario.to_dict(sub) if self.usuario else None
+        incluir, sub = expandir(seleccion, 'paquete')
+        if incluir:
+            datos['paquete'] = self.paquete.to_dict(sub) if self.paquete else None
+        incluir, sub = expandir(seleccion, 'viajeros')
+        if incluir:
+            datos['viajeros'] = [v.to_dict(sub) for v in self.viajeros] if hasattr(self, 'viajeros') else []
+        
+        return seleccion.filtrar(datos) if seleccion else datos
     
     def __repr__(self):
         return f'<Reserva {self.id}>'
@@ -0,0 +1,13 @@
+from app import db
+
+
+class Trigrama(db.Model):
+    """Índice invertido de trigramas: qué entidades contienen cada trigrama"""
+    __tablename__ = 'trigramas'
+
+    tipo = db.Column(db.String(10), primary_key=True)  # 'usuario', 'paquete'
+    trigrama = db.Column(db.String(3), primary_key=True)
+    entidad_id = db.Column(db.Integer, primary_key=True)
+
+    def __repr__(self):
+        return f'<Trigrama {self.tipo} {self.trigrama!r} {self.entidad_id}>'
@@ -1,6 +1,8 @@
 from app import db
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils import normalizar_texto
+from sqlalchemy.orm import validates
 
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
@@ -15,16 +17,24 @@ class Usuario(db.Model):
     rol = db.Column(db.String(20), default='cliente')
     fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Copia normalizada (sin tildes, minúsculas) para búsquedas por prefijo con índice
+    nombre_completo_norm = db.Column(db.String(200), index=True)
+    
     reservas = db.relationship('Reserva', backref='usuario', lazy=True, cascade='all, delete-orphan')
     
+    @validates('nombre_completo')
+    def _normalizar(self, campo, valor):
+        self.nombre_completo_norm = normalizar_texto(valor)
+        return valor
+    
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, seleccion=None):
+        datos = {
             'id': self.id,
             'nombre_completo': self.nombre_completo,
             'rut': self.rut,
@@ -34,6 +44,7 @@ class Usuario(db.Model):
             'rol': self.rol,
             'fecha_registro': self.fecha_registro.isoformat() if self.fecha_registro else None
         }
+        return seleccion.filtrar(datos) if seleccion else datos
     
     def __repr__(self):
         return f'<Usuario {self.email}>'
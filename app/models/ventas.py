@@ -0,0 +1,20 @@
+from app import db
+
+
+class VentaPeriodo(db.Model):
+    """
+    Ventas confirmadas de un paquete agregadas por período (día, semana o mes)
+
+    Los ingresos no se guardan: se calculan con el precio actual del paquete,
+    igual que en el dashboard.
+    """
+    __tablename__ = 'ventas_periodos'
+
+    periodo = db.Column(db.String(10), primary_key=True)  # 'dia', 'semana', 'mes'
+    inicio = db.Column(db.Date, primary_key=True)
+    paquete_id = db.Column(db.Integer, primary_key=True)
+    reservas = db.Column(db.Integer, default=0, nullable=False)
+    pasajeros = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<VentaPeriodo {self.periodo} {self.inicio} paquete={self.paquete_id}>'
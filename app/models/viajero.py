@@ -13,8 +13,8 @@ class Viajero(db.Model):
     
     reserva = db.relationship('Reserva', backref='viajeros', lazy=True)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, seleccion=None):
+        datos = {
             'id': self.id,
             'reserva_id': self.reserva_id,
             'nombre_completo': self.nombre_completo,
@@ -23,6 +23,7 @@ class Viajero(db.Model):
             'telefono': self.telefono,
             'email': self.email
         }
+        return seleccion.filtrar(datos) if seleccion else datos
     
     def __repr__(self):
         return f'<Viajero {self.nombre_completo}>'
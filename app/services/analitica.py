@@ -0,0 +1,228 @@
+"""
+Cubo de ventas por período (día, semana, mes) y paquete
+Se mantiene a partir del evento reservas_modificadas, en una transacción
+propia después del commit de la reserva: el checkout no espera a la
+analítica y los reportes no agrupan la tabla de reservas en vivo.
+
+Destino y origen salen del paquete al consultar, así una fila del cubo sirve
+para cualquier desglose. `flask reconstruir-analitica` recalcula el cubo
+desde el historial de reservas por lotes (memoria acotada).
+"""
+from datetime import timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, update, insert, delete, func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app import db
+from app.models.ventas import VentaPeriodo
+from app.models.paquete import Paquete, PaqueteDestino
+from app.models.destino import Destino
+from app.models.reserva import Reserva
+from app.services.esquema import esquema_al_dia
+from app.services.eventos import reservas_modificadas
+
+PERIODOS = ('dia', 'semana', 'mes')
+DESGLOSES = ('paquete', 'destino', 'origen')
+
+
+def inicio_periodo(fecha, periodo):
+    """
+    Primer día del período que contiene la fecha
+
+    Args:
+        fecha: date o datetime
+        periodo: 'dia', 'semana' (comienza el lunes) o 'mes'
+    """
+    dia = fecha.date() if hasattr(fecha, 'date') else fecha
+    if periodo == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if periodo == 'mes':
+        return dia.replace(day=1)
+    return dia
+
+
+def _agregar(deltas, fecha, paquete_id, reservas, pasajeros):
+    for periodo in PERIODOS:
+        acumulado = deltas.setdefault((periodo, inicio_periodo(fecha, periodo), paquete_id), [0, 0])
+        acumulado[0] += reservas
+        acumulado[1] += pasajeros
+
+
+class AnaliticaService:
+    """Mantenimiento y consulta del cubo de ventas"""
+
+    @staticmethod
+    def acumular(deltas):
+        """
+        Sumar deltas al cubo (UPDATE y, si la fila no existe, INSERT)
+
+        Args:
+            deltas: dict {(periodo, inicio, paquete_id): [reservas, pasajeros]}
+        """
+        for (periodo, inicio, paquete_id), (reservas, pasajeros) in deltas.items():
+            if not reservas and not pasajeros:
+                continue
+            actualizar = (
+                update(VentaPeriodo)
+                .where(VentaPeriodo.periodo == periodo, VentaPeriodo.inicio == inicio,
+                       VentaPeriodo.paquete_id == paquete_id)
+                .values(reservas=VentaPeriodo.reservas + reservas,
+                        pasajeros=VentaPeriodo.pasajeros + pasajeros)
+                .execution_options(synchronize_session=False)
+            )
+            if db.session.execute(actualizar).rowcount:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(VentaPeriodo).values(
+                        periodo=periodo, inicio=inicio, paquete_id=paquete_id,
+                        reservas=reservas, pasajeros=pasajeros
+                    ))
+            except IntegrityError:
+                # Otro proceso insertó la misma fila entre el UPDATE y el INSERT
+                db.session.execute(actualizar)
+
+    @staticmethod
+    def registrar(movimientos):
+        """
+        Aplicar al cubo los movimientos de reservas confirmadas
+
+        Args:
+            movimientos: list en el formato de eventos.notificar_reservas
+        """
+        deltas = {}
+        for paquete_id, estado, pasajeros, signo, fecha in movimientos:
+            if estado == 'confirmada' and fecha is not None:
+                _agregar(deltas, fecha, paquete_id, signo, signo * pasajeros)
+        if deltas:
+            AnaliticaService.acumular(deltas)
+            db.session.commit()
+
+    @staticmethod
+    def reporte(periodo='mes', desde=None, hasta=None, por=None):
+        """
+        Ventas confirmadas por período, opcionalmente desglosadas
+
+        Args:
+            periodo: 'dia', 'semana' o 'mes'
+            desde: date (opcional) - se incluye el período que la contiene
+            hasta: date (opcional) - inclusive
+            por: 'paquete', 'destino', 'origen' o None (solo totales)
+
+        Returns:
+            list[dict]: {'inicio', por (si se indicó), 'reservas', 'pasajeros', 'ingresos'}
+
+        Raises:
+            ValueError: Si el período o el desglose no son válidos
+        """
+        if periodo not in PERIODOS:
+            raise ValueError(f'periodo debe ser uno de: {", ".join(PERIODOS)}')
+        if por is not None and por not in DESGLOSES:
+            raise ValueError(f'por debe ser uno de: {", ".join(DESGLOSES)}')
+
+        columnas = [VentaPeriodo.inicio]
+        consulta = select().select_from(VentaPeriodo).join(Paquete, Paquete.id == VentaPeriodo.paquete_id)
+        agrupar = [VentaPeriodo.inicio]
+        if por == 'paquete':
+            columnas.append(Paquete.nombre)
+            agrupar += [Paquete.id, Paquete.nombre]
+        elif por == 'origen':
+            columnas.append(Paquete.origen)
+            agrupar.append(Paquete.origen)
+        elif por == 'destino':
+            # Una venta cuenta para cada destino del paquete
+            consulta = consulta.join(PaqueteDestino, PaqueteDestino.paquete_id == Paquete.id) \
+                .join(Destino, Destino.id == PaqueteDestino.destino_id)
+            columnas.append(Destino.nombre)
+            agrupar += [Destino.id, Destino.nombre]
+
+        reservas = func.sum(VentaPeriodo.reservas)
+        consulta = consulta.add_columns(
+            *columnas, reservas, func.sum(VentaPeriodo.pasajeros),
+            func.sum(VentaPeriodo.reservas * Paquete.precio_total)
+        ).where(VentaPeriodo.periodo == periodo)
+        if desde:
+            consulta = consulta.where(VentaPeriodo.inicio >= inicio_periodo(desde, periodo))
+        if hasta:
+            consulta = consulta.where(VentaPeriodo.inicio <= hasta)
+        consulta = consulta.group_by(*agrupar).having(reservas != 0).order_by(*agrupar)
+
+        resultado = []
+        for fila in db.session.execute(consulta):
+            datos = {'inicio': fila[0].isoformat()}
+            if por:
+                datos[por] = fila[1]
+            datos.update(reservas=int(fila[-3]), pasajeros=int(fila[-2]), ingresos=float(fila[-1] or 0))
+            resultado.append(datos)
+        return resultado
+
+    @staticmethod
+    def reconstruir(lote=None):
+        """
+        Recalcular el cubo desde el historial de reservas
+
+        Recorre las reservas confirmadas por id en lotes de `lote` filas y
+        vuelca lo agregado de cada lote antes de leer el siguiente.
+
+        Returns:
+            int: Reservas procesadas
+        """
+        lote = lote or current_app.config.get('ANALITICA_LOTE', 5000)
+        db.session.execute(delete(VentaPeriodo))
+        procesadas, ultimo_id = 0, 0
+        while True:
+            filas = db.session.execute(
+                select(Reserva.id, Reserva.paquete_id, Reserva.numero_pasajeros, Reserva.fecha_reserva)
+                .where(Reserva.estado == 'confirmada', Reserva.id > ultimo_id)
+                .order_by(Reserva.id)
+                .limit(lote)
+            ).all()
+            if not filas:
+                break
+            deltas = {}
+            for _, paquete_id, pasajeros, fecha in filas:
+                if fecha is not None:
+                    _agregar(deltas, fecha, paquete_id, 1, pasajeros)
+            AnaliticaService.acumular(deltas)
+            procesadas += len(filas)
+            ultimo_id = filas[-1][0]
+        db.session.commit()
+        return procesadas
+
+
+@reservas_modificadas.connect
+def _registrar_ventas(app, movimientos):
+    if not app.config.get('ANALITICA_VENTAS', True):
+        return
+    try:
+        AnaliticaService.registrar(movimientos)
+    except SQLAlchemyError:
+        # La reserva ya está guardada; el cubo se corrige con reconstruir-analitica
+        db.session.rollback()
+        app.logger.exception('No se pudo actualizar la analítica de ventas')
+
+
+def init_analitica(app):
+    """
+    Registrar el comando de reconstrucción y llenar el cubo si está vacío
+
+    Debe llamarse con las tablas ya creadas. Cubre reservas insertadas sin
+    pasar por ReservaService (datos de ejemplo, migraciones de datos).
+    """
+    app.cli.add_command(_comando_reconstruir)
+    if not app.config.get('ANALITICA_VENTAS', True) or not esquema_al_dia(app):
+        return
+    with app.app_context():
+        vacio = db.session.query(VentaPeriodo.periodo).first() is None
+        if vacio and db.session.query(Reserva.id).filter(Reserva.estado == 'confirmada').first():
+            AnaliticaService.reconstruir()
+
+
+@click.command('reconstruir-analitica')
+@click.option('--lote', type=int, default=None, help='Reservas por lote')
+@with_appcontext
+def _comando_reconstruir(lote):
+    """Recalcular el cubo de ventas desde el historial de reservas"""
+    total = AnaliticaService.reconstruir(lote)
+    click.echo(f'✅ {total} reservas confirmadas procesadas')
@@ -0,0 +1,317 @@
+"""
+Autocompletado de orígenes y destinos
+Índice en memoria (arreglo ordenado + bisect) construido desde Destino.nombre,
+Destino.origen y Paquete.origen. Se actualiza de forma incremental cuando los
+servicios escriben y responde sin consultar la base de datos.
+
+El índice vive en la memoria de cada worker: cada AUTOCOMPLETADO_REVISION
+segundos se mira la versión del catálogo y, si otro worker la cambió, el
+índice se reconstruye en la siguiente consulta.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from sqlalchemy import func
+from flask import current_app
+from app import db
+from app.services.esquema import esquema_al_dia
+from app.services.eventos import catalogo_modificado, reservas_modificadas
+from app.utils import normalizar_texto
+
+# Prefijos de hasta este largo coinciden con demasiadas claves para recorrerlas
+# en cada tecla: su resultado se memoriza hasta la siguiente actualización
+PREFIJO_CORTO = 2
+
+
+def _sufijos(norm):
+    """Sufijos que empiezan en cada palabra: 'torres del paine' -> ..., 'del paine', 'paine'"""
+    palabras = norm.split(' ')
+    return [' '.join(palabras[i:]) for i in range(len(palabras))]
+
+
+class Autocompletado:
+    """
+    Índice de prefijos con popularidad por término
+
+    Un término es (tipo, texto normalizado), con tipo 'origen' o 'destino'.
+    Su popularidad es la suma de los aportes de sus fuentes:
+    - cada destino aporta 1 a su nombre y 1 a su origen
+    - cada paquete aporta 1 + pasajeros confirmados a su origen y a los
+      nombres de sus destinos
+    Los aportes se guardan por fuente para poder restarlos cuando cambia.
+    """
+
+    def __init__(self, revision=0):
+        """
+        Args:
+            revision: segundos entre revisiones de la versión del catálogo
+        """
+        # Ordenada: (sufijo, tipo, norm) por cada palabra de cada término
+        self._claves = []
+        # (tipo, norm) -> [texto a mostrar, popularidad]
+        self._terminos = {}
+        # ('paquete' | 'destino', id) -> {(tipo, norm): (texto, peso, veces)}
+        self._aportes = {}
+        # (tipo, norm) -> set de fuentes que aportan al término
+        self._fuentes = {}
+        # (norm, tipo, limite) -> sugerencias, solo para prefijos cortos
+        self._cortos = {}
+        self._lock = threading.Lock()
+        self.revision = revision
+        self.proxima_revision = time.monotonic() + revision
+        # Otro worker cambió el catálogo: reconstruir antes de responder
+        self.desactualizado = False
+
+    def __len__(self):
+        return len(self._terminos)
+
+    def _sumar(self, fuente, termino, texto, peso):
+        actual = self._terminos.get(termino)
+        if actual:
+            actual[1] += peso
+        else:
+            self._terminos[termino] = [texto, peso]
+            for sufijo in _sufijos(termino[1]):
+                insort(self._claves, (sufijo, *termino))
+        self._fuentes.setdefault(termino, set()).add(fuente)
+
+    def _restar(self, fuente, termino, peso):
+        actual = self._terminos[termino]
+        actual[1] -= peso
+        self._fuentes[termino].discard(fuente)
+        if self._fuentes[termino]:
+            return
+        del self._terminos[termino]
+        del self._fuentes[termino]
+        for sufijo in _sufijos(termino[1]):
+            i = bisect_left(self._claves, (sufijo, *termino))
+            del self._claves[i]
+
+    def actualizar(self, aportes):
+        """
+        Reemplazar los aportes de las fuentes indicadas
+
+        Args:
+            aportes: dict {fuente: {(tipo, norm): (texto, peso, veces)} o None si se eliminó}
+        """
+        with self._lock:
+            self._cortos.clear()
+            for fuente, nuevos in aportes.items():
+                for termino, (_, peso, _) in self._aportes.pop(fuente, {}).items():
+                    self._restar(fuente, termino, peso)
+                if nuevos:
+                    for termino, (texto, peso, _) in nuevos.items():
+                        self._sumar(fuente, termino, texto, peso)
+                    self._aportes[fuente] = nuevos
+
+    def reemplazar(self, aportes):
+        """Reemplazar el índice completo por los aportes de todas las fuentes"""
+        nuevo = Autocompletado()
+        nuevo.actualizar(aportes)
+        with self._lock:
+            self._claves, self._terminos = nuevo._claves, nuevo._terminos
+            self._aportes, self._fuentes = nuevo._aportes, nuevo._fuentes
+            self._cortos = {}
+
+    def sumar_pasajeros(self, pasajeros):
+        """
+        Sumar pasajeros confirmados a la popularidad de los paquetes indexados
+
+        Args:
+            pasajeros: dict {paquete_id: pasajeros a sumar (negativo para restar)}
+        """
+        with self._lock:
+            self._cortos.clear()
+            for paquete_id, delta in pasajeros.items():
+                aportes = self._aportes.get(('paquete', paquete_id))
+                if not delta or not aportes:
+                    continue
+                # Un término aporta el peso del paquete tantas veces como aparece en él
+                for termino, (texto, peso, veces) in aportes.items():
+                    aportes[termino] = (texto, peso + delta * veces, veces)
+                    self._terminos[termino][1] += delta * veces
+
+    def paquetes_con_destinos(self, destino_ids):
+        """IDs de paquetes que hoy aportan al nombre de los destinos indicados"""
+        ids = set()
+        with self._lock:
+            for destino_id in destino_ids:
+                for tipo, norm in self._aportes.get(('destino', destino_id), {}):
+                    if tipo != 'destino':
+                        continue
+                    ids.update(i for clase, i in self._fuentes.get((tipo, norm), ()) if clase == 'paquete')
+        return ids
+
+    def sugerir(self, prefijo, tipo=None, limite=8):
+        """
+        Términos que empiezan por `prefijo` (en cualquier palabra), más populares primero
+
+        Args:
+            prefijo: str - texto escrito por el usuario (sin importar tildes ni mayúsculas)
+            tipo: 'origen', 'destino' o None para ambos
+            limite: int - máximo de sugerencias
+
+        Returns:
+            list[dict]: texto, tipo y popularidad de cada sugerencia
+        """
+        norm = normalizar_texto(prefijo)
+        if not norm:
+            return []
+        with self._lock:
+            clave_corta = (norm, tipo, limite) if len(norm) <= PREFIJO_CORTO else None
+            if clave_corta in self._cortos:
+                return self._cortos[clave_corta]
+            candidatos = set()
+            i = bisect_left(self._claves, (norm,))
+            while i < len(self._claves) and self._claves[i][0].startswith(norm):
+                _, tipo_clave, termino = self._claves[i]
+                if tipo is None or tipo_clave == tipo:
+                    candidatos.add((tipo_clave, termino))
+                i += 1
+            mejores = heapq.nsmallest(
+                limite, candidatos, key=lambda t: (-self._terminos[t][1], t[1], t[0])
+            )
+            sugerencias = [
+                {'texto': self._terminos[t][0], 'tipo': t[0], 'popularidad': self._terminos[t][1]}
+                for t in mejores
+            ]
+            if clave_corta:
+                self._cortos[clave_corta] = sugerencias
+            return sugerencias
+
+
+def _termino(aportes, tipo, texto, peso):
+    norm = normalizar_texto(texto)
+    if norm:
+        _, anterior, veces = aportes.get((tipo, norm), (None, 0, 0))
+        aportes[(tipo, norm)] = (texto.strip(), peso + anterior, veces + 1)
+
+
+def aportes_destinos(destino_ids=None):
+    """Aportes de los destinos indicados (todos si es None); los que no existen quedan en None"""
+    from app.models.destino import Destino
+
+    query = db.session.query(Destino.id, Destino.nombre, Destino.origen)
+    if destino_ids is not None:
+        query = query.filter(Destino.id.in_(destino_ids))
+
+    resultado = {('destino', i): None for i in destino_ids or ()}
+    for destino_id, nombre, origen in query:
+        aportes = {}
+        _termino(aportes, 'destino', nombre, 1)
+        _termino(aportes, 'origen', origen, 1)
+        resultado[('destino', destino_id)] = aportes
+    return resultado
+
+
+def aportes_paquetes(paquete_ids=None):
+    """Aportes de los paquetes indicados (todos si es None); los que no existen quedan en None"""
+    from app.models.destino import Destino
+    from app.models.paquete import Paquete, PaqueteDestino
+    from app.models.reserva import Reserva
+
+    pasajeros = db.session.query(
+        Reserva.paquete_id, func.sum(Reserva.numero_pasajeros).label('total')
+    ).filter(Reserva.estado == 'confirmada').group_by(Reserva.paquete_id)
+    destinos = db.session.query(PaqueteDestino.paquete_id, Destino.nombre).join(Destino)
+    paquetes = db.session.query(Paquete.id, Paquete.origen)
+    if paquete_ids is not None:
+        pasajeros = pasajeros.filter(Reserva.paquete_id.in_(paquete_ids))
+        destinos = destinos.filter(PaqueteDestino.paquete_id.in_(paquete_ids))
+        paquetes = paquetes.filter(Paquete.id.in_(paquete_ids))
+
+    pesos = {paquete_id: 1 + (total or 0) for paquete_id, total in pasajeros}
+    nombres = {}
+    for paquete_id, nombre in destinos:
+        nombres.setdefault(paquete_id, []).append(nombre)
+
+    resultado = {('paquete', i): None for i in paquete_ids or ()}
+    for paquete_id, origen in paquetes:
+        peso = pesos.get(paquete_id, 1)
+        aportes = {}
+        _termino(aportes, 'origen', origen, peso)
+        for nombre in nombres.get(paquete_id, ()):
+            _termino(aportes, 'destino', nombre, peso)
+        resultado[('paquete', paquete_id)] = aportes
+    return resultado
+
+
+def todos_los_aportes():
+    """Aportes de todos los destinos y paquetes, para construir el índice completo"""
+    aportes = aportes_destinos()
+    aportes.update(aportes_paquetes())
+    return aportes
+
+
+def obtener_autocompletado():
+    """
+    Índice de la app actual, al día con las escrituras de otros workers
+
+    La versión del catálogo se mira como mucho cada `revision` segundos; si
+    otro worker la cambió, al_cambiar marca el índice y aquí se reconstruye.
+    """
+    indice = current_app.extensions['autocompletado']
+    ahora = time.monotonic()
+    if ahora >= indice.proxima_revision:
+        indice.proxima_revision = ahora + indice.revision
+        version = current_app.extensions.get('catalogo_version')
+        if version:
+            version.actual()
+    if indice.desactualizado:
+        # Se desmarca antes de leer: un cambio durante la lectura vuelve a marcarlo
+        indice.desactualizado = False
+        indice.reemplazar(todos_los_aportes())
+    return indice
+
+
+@catalogo_modificado.connect
+def _actualizar_autocompletado(app, paquetes, destinos, solo_cupos=False):
+    # Los cupos no aportan a la popularidad; los pasajeros llegan por reservas_modificadas
+    indice = app.extensions.get('autocompletado')
+    if indice is None or solo_cupos:
+        return
+    from app.models.paquete import PaqueteDestino
+
+    ids = set(paquetes)
+    if destinos:
+        # Un destino renombrado o eliminado cambia lo que aportan sus paquetes
+        ids.update(indice.paquetes_con_destinos(destinos))
+        ids.update(fila.paquete_id for fila in db.session.query(PaqueteDestino.paquete_id).filter(
+            PaqueteDestino.destino_id.in_(destinos)
+        ))
+    aportes = aportes_destinos(destinos) if destinos else {}
+    if ids:
+        aportes.update(aportes_paquetes(ids))
+    indice.actualizar(aportes)
+
+
+@reservas_modificadas.connect
+def _actualizar_popularidad(app, movimientos):
+    indice = app.extensions.get('autocompletado')
+    if indice is None:
+        return
+    pasajeros = {}
+    for paquete_id, estado, numero_pasajeros, signo, _ in movimientos:
+        if estado == 'confirmada':
+            pasajeros[paquete_id] = pasajeros.get(paquete_id, 0) + signo * numero_pasajeros
+    indice.sumar_pasajeros(pasajeros)
+
+
+def init_autocompletado(app):
+    """
+    Construir el índice de autocompletado
+
+    Debe llamarse con las tablas ya creadas; con el esquema sin migrar el
+    índice queda vacío.
+    """
+    indice = Autocompletado(app.config.get('AUTOCOMPLETADO_REVISION', 5))
+    if esquema_al_dia(app):
+        with app.app_context():
+            # La versión se lee antes: una escritura de otro worker durante la
+            # construcción se detecta en la primera revisión
+            version = app.extensions.get('catalogo_version')
+            if version:
+                version.actual()
+            indice.actualizar(todos_los_aportes())
+    app.extensions['autocompletado'] = indice
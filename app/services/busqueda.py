@@ -0,0 +1,284 @@
+"""
+Índice de búsqueda de texto completo para paquetes
+Indexa nombre, origen, nombres de destinos, descripciones y actividades.
+Usa FTS5 en SQLite y FULLTEXT en MySQL; con otros motores no hay índice y
+la búsqueda vuelve a los filtros ilike
+"""
+import re
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text, table, column, literal_column, func
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from app import db
+from app.services.esquema import esquema_al_dia
+from app.services.eventos import catalogo_modificado
+
+# Columnas del índice y su peso en el ranking
+COLUMNAS = ('nombre', 'origen', 'destinos', 'descripciones', 'actividades')
+PESOS = (10.0, 6.0, 8.0, 1.0, 2.0)
+
+_PALABRA = re.compile(r'\w+', re.UNICODE)
+
+
+def _palabras(texto):
+    return _PALABRA.findall(texto or '')
+
+
+def documentos_paquetes(paquete_ids):
+    """
+    Construir los documentos a indexar de los paquetes indicados
+
+    Returns:
+        dict {paquete_id: dict con las columnas del índice}
+    """
+    from app.models.paquete import Paquete, PaqueteDestino
+
+    paquetes = Paquete.query.options(
+        joinedload(Paquete.destinos).joinedload(PaqueteDestino.destino)
+    ).filter(Paquete.id.in_(paquete_ids))
+
+    documentos = {}
+    for paquete in paquetes:
+        destinos = [pd.destino for pd in paquete.destinos if pd.destino]
+        documentos[paquete.id] = {
+            'nombre': paquete.nombre or '',
+            'origen': paquete.origen or '',
+            'destinos': ' '.join(d.nombre for d in destinos),
+            'descripciones': ' '.join(d.descripcion or '' for d in destinos),
+            'actividades': ' '.join((d.actividades or '').replace(',', ' ') for d in destinos),
+        }
+    return documentos
+
+
+class IndiceFTS5:
+    """Tabla virtual FTS5 de SQLite (rowid = paquete_id)"""
+
+    TABLA = 'paquetes_fts'
+
+    def crear(self):
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.TABLA} USING fts5("
+            f"{', '.join(COLUMNAS)}, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+        db.session.commit()
+
+    def vacio(self):
+        return db.session.execute(text(f'SELECT count(*) FROM {self.TABLA}')).scalar() == 0
+
+    def guardar(self, documentos, eliminados=()):
+        ids = list(documentos) + list(eliminados)
+        if ids:
+            db.session.execute(
+                text(f'DELETE FROM {self.TABLA} WHERE rowid IN ({", ".join(str(int(i)) for i in ids)})')
+            )
+        if documentos:
+            db.session.execute(
+                text(f'INSERT INTO {self.TABLA} (rowid, {", ".join(COLUMNAS)}) '
+                     f'VALUES (:id, {", ".join(":" + c for c in COLUMNAS)})'),
+                [dict(doc, id=paquete_id) for paquete_id, doc in documentos.items()]
+            )
+
+    def vaciar(self):
+        db.session.execute(text(f'DELETE FROM {self.TABLA}'))
+
+    @staticmethod
+    def _consulta(terminos):
+        partes = []
+        for columna, texto in terminos.items():
+            palabras = ' AND '.join(f'"{p}"*' for p in _palabras(texto))
+            if not palabras:
+                continue
+            partes.append(f'({palabras})' if columna is None else f'({columna} : ({palabras}))')
+        return ' AND '.join(partes)
+
+    def aplicar(self, query, modelo, terminos):
+        """
+        Filtrar y ordenar por relevancia una consulta de paquetes
+
+        Args:
+            query: Query de Paquete
+            modelo: clase Paquete
+            terminos: dict {columna o None (todas): texto}
+        """
+        consulta = self._consulta(terminos)
+        if not consulta:
+            return query
+        fts = table(self.TABLA, column('rowid'), column(self.TABLA))
+        return query.join(fts, fts.c.rowid == modelo.id).filter(
+            fts.c[self.TABLA].op('MATCH')(consulta)
+        ).order_by(self.relevancia(terminos))
+
+    def relevancia(self, terminos):
+        """Expresión de orden por relevancia (menor es mejor) o None si no hay términos"""
+        if not self._consulta(terminos):
+            return None
+        return func.bm25(literal_column(self.TABLA), *PESOS)
+
+
+class IndiceFullTextMySQL:
+    """Tabla desnormalizada con índices FULLTEXT (InnoDB)"""
+
+    TABLA = 'paquetes_busqueda'
+
+    def crear(self):
+        db.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLA} ("
+            f"paquete_id INT PRIMARY KEY, "
+            + ', '.join(f'{c} TEXT' for c in COLUMNAS) + ', '
+            f"FULLTEXT KEY ft_todo ({', '.join(COLUMNAS)}), "
+            + ', '.join(f'FULLTEXT KEY ft_{c} ({c})' for c in COLUMNAS) +
+            f") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+        ))
+        db.session.commit()
+
+    def vacio(self):
+        return db.session.execute(text(f'SELECT count(*) FROM {self.TABLA}')).scalar() == 0
+
+    def guardar(self, documentos, eliminados=()):
+        if eliminados:
+            db.session.execute(
+                text(f'DELETE FROM {self.TABLA} WHERE paquete_id IN ({", ".join(str(int(i)) for i in eliminados)})')
+            )
+        if documentos:
+            db.session.execute(
+                text(f'REPLACE INTO {self.TABLA} (paquete_id, {", ".join(COLUMNAS)}) '
+                     f'VALUES (:id, {", ".join(":" + c for c in COLUMNAS)})'),
+                [dict(doc, id=paquete_id) for paquete_id, doc in documentos.items()]
+            )
+
+    def vaciar(self):
+        db.session.execute(text(f'DELETE FROM {self.TABLA}'))
+
+    _tabla = table(TABLA, column('paquete_id'), *(column(c) for c in COLUMNAS))
+
+    def _coincidencias(self, terminos):
+        coincidencias = []
+        for columna, texto in terminos.items():
+            palabras = ' '.join(f'+{p}*' for p in _palabras(texto))
+            if not palabras:
+                continue
+            columnas = COLUMNAS if columna is None else (columna,)
+            coincidencias.append(
+                match(*(self._tabla.c[c] for c in columnas), against=palabras).in_boolean_mode()
+            )
+        return coincidencias
+
+    def aplicar(self, query, modelo, terminos):
+        coincidencias = self._coincidencias(terminos)
+        if not coincidencias:
+            return query
+        query = query.join(self._tabla, self._tabla.c.paquete_id == modelo.id)
+        for coincidencia in coincidencias:
+            query = query.filter(coincidencia)
+        return query.order_by(self.relevancia(terminos))
+
+    def relevancia(self, terminos):
+        """Expresión de orden por relevancia (menor es mejor) o None si no hay términos"""
+        coincidencias = self._coincidencias(terminos)
+        if not coincidencias:
+            return None
+        return -sum(coincidencias[1:], coincidencias[0])
+
+
+def obtener_indice():
+    """Índice de búsqueda de la app actual o None si no hay (usar ilike)"""
+    return current_app.extensions.get('indice_busqueda')
+
+
+def reindexar(paquete_ids):
+    """Actualizar en el índice los paquetes indicados (los borrados se quitan)"""
+    indice = obtener_indice()
+    if not indice or not paquete_ids:
+        return
+    documentos = documentos_paquetes(paquete_ids)
+    indice.guardar(documentos, eliminados=set(paquete_ids) - set(documentos))
+    db.session.commit()
+
+
+def reconstruir_indice(tamano_lote=1000):
+    """Regenerar el índice completo por lotes"""
+    from app.models.paquete import Paquete
+
+    indice = obtener_indice()
+    if not indice:
+        return 0
+    indice.vaciar()
+    total = 0
+    ultimo_id = 0
+    while True:
+        ids = [fila.id for fila in db.session.query(Paquete.id).filter(
+            Paquete.id > ultimo_id
+        ).order_by(Paquete.id).limit(tamano_lote)]
+        if not ids:
+            break
+        indice.guardar(documentos_paquetes(ids))
+        db.session.commit()
+        db.session.expunge_all()
+        total += len(ids)
+        ultimo_id = ids[-1]
+    return total
+
+
+@catalogo_modificado.connect
+def _sincronizar_indice(app, paquetes, destinos, solo_cupos=False):
+    # Los documentos no incluyen `disponibles`: reservas y cancelaciones no los cambian
+    if 'indice_busqueda' not in app.extensions or solo_cupos:
+        return
+    from app.models.paquete import PaqueteDestino
+
+    try:
+        ids = set(paquetes)
+        if destinos:
+            # Los paquetes que incluyen un destino modificado también cambian
+            ids.update(fila.paquete_id for fila in db.session.query(PaqueteDestino.paquete_id).filter(
+                PaqueteDestino.destino_id.in_(destinos)
+            ))
+        reindexar(ids)
+    except SQLAlchemyError:
+        # La escritura ya está guardada; el índice se corrige con `flask reindexar-busqueda`
+        db.session.rollback()
+        app.logger.exception('No se pudo actualizar el índice de búsqueda')
+
+
+def init_indice_busqueda(app):
+    """
+    Crear el índice según el motor de base de datos (si BUSQUEDA_FTS está activo)
+
+    Debe llamarse con las tablas ya creadas; si el índice está vacío, hay
+    paquetes y el esquema está al día, lo construye.
+    """
+    app.cli.add_command(_comando_reindexar)
+    if not app.config.get('BUSQUEDA_FTS', True):
+        return
+
+    with app.app_context():
+        dialecto = db.engine.dialect.name
+        if dialecto == 'sqlite':
+            indice = IndiceFTS5()
+        elif dialecto in ('mysql', 'mariadb'):
+            indice = IndiceFullTextMySQL()
+        else:
+            return
+        try:
+            indice.crear()
+        except OperationalError:
+            # SQLite compilado sin FTS5: se mantiene la búsqueda con ilike
+            db.session.rollback()
+            current_app.logger.warning('Índice de búsqueda no disponible, se usará ilike')
+            return
+        app.extensions['indice_busqueda'] = indice
+
+        from app.models.paquete import Paquete
+        if esquema_al_dia(app) and indice.vacio() and db.session.query(Paquete.id).first():
+            reconstruir_indice()
+
+
+@click.command('reindexar-busqueda')
+@with_appcontext
+def _comando_reindexar():
+    """Reconstruir el índice de búsqueda de paquetes"""
+    total = reconstruir_indice()
+    click.echo(f'✅ {total} paquetes indexados')
@@ -0,0 +1,202 @@
+"""
+Almacenamiento del carrito en el servidor
+La cookie de sesión solo guarda el ID del carrito; el contenido vive en un
+backend intercambiable con una fila por paquete y su cantidad. Los carritos
+sin actividad por más de CARRITO_TTL_DIAS se borran.
+"""
+import threading
+import time
+from collections import OrderedDict
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.carrito import CarritoItem
+
+
+class MemoriaCarritoStore:
+    """Backend en memoria del proceso (un solo worker o desarrollo)"""
+
+    def __init__(self, max_carritos=10000, ttl=None):
+        self.max_carritos = max_carritos
+        self.ttl = ttl
+        self._carritos = OrderedDict()
+        self._ultimo_uso = {}
+        self._lock = threading.Lock()
+
+    def _carrito(self, carrito_id):
+        # Orden LRU: los carritos abandonados más antiguos se descartan primero
+        carrito = self._carritos.get(carrito_id)
+        if carrito is None:
+            carrito = self._carritos[carrito_id] = OrderedDict()
+            while len(self._carritos) > self.max_carritos:
+                self._descartar_primero()
+        else:
+            self._carritos.move_to_end(carrito_id)
+        self._ultimo_uso[carrito_id] = time.time()
+        if self.ttl:
+            self._purgar(time.time() - self.ttl)
+        return carrito
+
+    def _descartar_primero(self):
+        carrito_id, _ = self._carritos.popitem(last=False)
+        self._ultimo_uso.pop(carrito_id, None)
+
+    def _purgar(self, limite):
+        # El orden LRU es el de actividad: los vencidos están al principio
+        borrados = 0
+        while self._carritos and self._ultimo_uso[next(iter(self._carritos))] < limite:
+            self._descartar_primero()
+            borrados += 1
+        return borrados
+
+    def purgar(self, limite):
+        """Borrar los carritos sin actividad desde `limite` (epoch); devuelve cuántos"""
+        with self._lock:
+            return self._purgar(limite)
+
+    def obtener(self, carrito_id):
+        with self._lock:
+            carrito = self._carritos.get(carrito_id, {})
+            return [(paquete_id, cantidad, ts) for paquete_id, (cantidad, ts) in carrito.items()]
+
+    def agregar(self, carrito_id, paquete_id, cantidad):
+        with self._lock:
+            carrito = self._carrito(carrito_id)
+            actual, ts = carrito.get(paquete_id, (0, time.time()))
+            carrito[paquete_id] = (actual + cantidad, ts)
+
+    def establecer(self, carrito_id, paquete_id, cantidad):
+        with self._lock:
+            carrito = self._carrito(carrito_id)
+            _, ts = carrito.get(paquete_id, (0, time.time()))
+            carrito[paquete_id] = (cantidad, ts)
+
+    def quitar(self, carrito_id, paquete_id, cantidad=1):
+        with self._lock:
+            carrito = self._carritos.get(carrito_id, {})
+            if paquete_id not in carrito:
+                return False
+            actual, ts = carrito[paquete_id]
+            if actual <= cantidad:
+                del carrito[paquete_id]
+            else:
+                carrito[paquete_id] = (actual - cantidad, ts)
+            return True
+
+    def vaciar(self, carrito_id):
+        with self._lock:
+            self._carritos.pop(carrito_id, None)
+            self._ultimo_uso.pop(carrito_id, None)
+
+
+class TablaCarritoStore:
+    """
+    Backend en la tabla carrito_items (compartido entre workers)
+
+    La actividad de un carrito es la escritura más reciente de sus filas
+    (`actualizado`). Con `ttl`, los vencidos se purgan al agregar artículos,
+    a lo más una vez cada `intervalo_purga` segundos por proceso.
+    """
+
+    def __init__(self, ttl=None, intervalo_purga=3600):
+        self.ttl = ttl
+        self.intervalo_purga = intervalo_purga
+        self._ultima_purga = time.monotonic()
+
+    def obtener(self, carrito_id):
+        filas = db.session.query(
+            CarritoItem.paquete_id, CarritoItem.cantidad, CarritoItem.timestamp
+        ).filter_by(carrito_id=carrito_id).order_by(CarritoItem.timestamp).all()
+        return [tuple(fila) for fila in filas]
+
+    @staticmethod
+    def _actualizar(carrito_id, paquete_id, **valores):
+        return db.session.execute(
+            update(CarritoItem).where(
+                CarritoItem.carrito_id == carrito_id, CarritoItem.paquete_id == paquete_id
+            ).values(actualizado=time.time(), **valores)
+        ).rowcount
+
+    def _escribir(self, carrito_id, paquete_id, cantidad, sumar):
+        """UPDATE atómico de la fila o INSERT si no existe, y commit"""
+        nueva = CarritoItem.cantidad + cantidad if sumar else cantidad
+        if not self._actualizar(carrito_id, paquete_id, cantidad=nueva):
+            try:
+                with db.session.begin_nested():
+                    db.session.add(CarritoItem(carrito_id=carrito_id, paquete_id=paquete_id, cantidad=cantidad))
+            except IntegrityError:
+                # Otra petición agregó el mismo paquete al mismo tiempo
+                self._actualizar(carrito_id, paquete_id, cantidad=nueva)
+        db.session.commit()
+
+    def agregar(self, carrito_id, paquete_id, cantidad):
+        self._escribir(carrito_id, paquete_id, cantidad, sumar=True)
+        if self.ttl and time.monotonic() - self._ultima_purga >= self.intervalo_purga:
+            self._ultima_purga = time.monotonic()
+            self.purgar(time.time() - self.ttl)
+
+    def establecer(self, carrito_id, paquete_id, cantidad):
+        self._escribir(carrito_id, paquete_id, cantidad, sumar=False)
+
+    def quitar(self, carrito_id, paquete_id, cantidad=1):
+        item = db.session.get(CarritoItem, (carrito_id, paquete_id))
+        if not item:
+            return False
+        if item.cantidad <= cantidad:
+            db.session.delete(item)
+        else:
+            item.cantidad -= cantidad
+            item.actualizado = time.time()
+        db.session.commit()
+        return True
+
+    def vaciar(self, carrito_id):
+        CarritoItem.query.filter_by(carrito_id=carrito_id).delete()
+        db.session.commit()
+
+    def purgar(self, limite):
+        """Borrar los carritos sin actividad desde `limite` (epoch); devuelve cuántos"""
+        vencidos = db.session.query(CarritoItem.carrito_id).group_by(
+            CarritoItem.carrito_id
+        ).having(func.max(CarritoItem.actualizado) < limite).subquery()
+        cantidad = db.session.query(func.count()).select_from(vencidos).scalar()
+        if cantidad:
+            CarritoItem.query.filter(
+                CarritoItem.carrito_id.in_(db.select(vencidos.c.carrito_id))
+            ).delete(synchronize_session=False)
+        db.session.commit()
+        return cantidad
+
+
+def init_carrito_store(app):
+    """Crear el backend configurado en CARRITO_BACKEND ('tabla' o 'memoria')"""
+    backend = app.config.get('CARRITO_BACKEND', 'tabla')
+    ttl = app.config.get('CARRITO_TTL_DIAS', 30) * 86400 or None
+    if backend == 'memoria':
+        store = MemoriaCarritoStore(app.config.get('CARRITO_MAX_MEMORIA', 10000), ttl)
+    elif backend == 'tabla':
+        store = TablaCarritoStore(ttl, app.config.get('CARRITO_PURGA_INTERVALO', 3600))
+    else:
+        raise ValueError(f'CARRITO_BACKEND desconocido: {backend}')
+    app.extensions['carrito_store'] = store
+    app.cli.add_command(_comando_purgar)
+
+
+def get_carrito_store():
+    """Backend del carrito de la aplicación actual"""
+    return current_app.extensions['carrito_store']
+
+
+@click.command('purgar-carritos')
+@with_appcontext
+def _comando_purgar():
+    """Borrar los carritos abandonados (más de CARRITO_TTL_DIAS sin actividad)"""
+    dias = current_app.config.get('CARRITO_TTL_DIAS', 30)
+    if not dias:
+        click.echo('CARRITO_TTL_DIAS es 0: los carritos no vencen')
+        return
+    total = get_carrito_store().purgar(time.time() - dias * 86400)
+    click.echo(f'✅ {total} carritos purgados')
@@ -0,0 +1,100 @@
+"""
+Caché en memoria del catálogo (paquetes y destinos)
+Guarda las respuestas JSON ya serializadas y las invalida con precisión
+cuando los servicios avisan de escrituras (ver app.services.eventos)
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from app.services.eventos import catalogo_modificado
+from app.services.compresion import marcar_precomprimible
+
+
+class CatalogoCache:
+    """
+    Caché LRU acotada de respuestas JSON del catálogo
+
+    Cada entrada lleva etiquetas de las que depende:
+    - 'paquetes' / 'destinos': cualquier cambio en esa tabla la invalida
+    - ('paquete', id) / ('destino', id): solo cambios en esa fila la invalidan
+
+    Cada invalidación incrementa `version`; una entrada construida mientras
+    ocurría una escritura no se guarda, así no se cachean datos ya obsoletos.
+    """
+
+    def __init__(self, max_entradas=256, ttl=10):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.version = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, construir):
+        """
+        Devolver el JSON cacheado de `clave` o construirlo
+
+        Args:
+            clave: tuple hashable que identifica la respuesta
+            construir: callable que devuelve (datos, etiquetas)
+
+        Returns:
+            bytes: Cuerpo JSON de la respuesta
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada and entrada[1] > ahora:
+                self._entradas.move_to_end(clave)
+                return entrada[0]
+            version = self.version
+
+        datos, etiquetas = construir()
+        cuerpo = f'{current_app.json.dumps(datos)}\n'.encode('utf-8')
+
+        with self._lock:
+            if self.version == version:
+                self._entradas[clave] = (cuerpo, ahora + self.ttl, frozenset(etiquetas))
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+        return cuerpo
+
+    def invalidar(self, paquetes=(), destinos=()):
+        """Eliminar las entradas que dependen de los paquetes/destinos indicados"""
+        afectadas = {('paquete', i) for i in paquetes} | {('destino', i) for i in destinos}
+        if paquetes:
+            afectadas.add('paquetes')
+        if destinos:
+            afectadas.add('destinos')
+
+        with self._lock:
+            self.version += 1
+            for clave in [c for c, e in self._entradas.items() if e[2] & afectadas]:
+                del self._entradas[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self.version += 1
+            self._entradas.clear()
+
+
+@catalogo_modificado.connect
+def _invalidar_catalogo(app, paquetes, destinos, solo_cupos=False):
+    cache = app.extensions.get('catalogo_cache')
+    if cache:
+        cache.invalidar(paquetes=paquetes, destinos=destinos)
+
+
+def init_catalogo_cache(app):
+    """Crear la caché del catálogo con CATALOGO_CACHE_MAX y CATALOGO_CACHE_TTL"""
+    app.extensions['catalogo_cache'] = CatalogoCache(
+        max_entradas=app.config.get('CATALOGO_CACHE_MAX', 256),
+        ttl=app.config.get('CATALOGO_CACHE_TTL', 10)
+    )
+
+
+def respuesta_catalogo(clave, construir):
+    """Respuesta JSON servida desde la caché del catálogo"""
+    cuerpo = current_app.extensions['catalogo_cache'].obtener(clave, construir)
+    return marcar_precomprimible(current_app.response_class(cuerpo, mimetype='application/json'))
@@ -0,0 +1,220 @@
+"""
+Snapshot del catálogo compartido entre workers
+El catálogo serializado (paquetes y destinos) se escribe en un archivo que cada worker mapea en memoria (mmap) y solo vuelve
+a mapear cuando cambia la versión. Así todos los workers comparten las
+mismas páginas del sistema operativo en lugar de una copia por proceso.
+
+Formato del archivo:
+    cabecera  : magic (8 bytes) | versión (uint64) | largo del índice (uint32)
+    índice    : JSON {sección: [offset, largo]}
+    secciones : JSON de cada sección, tal como lo devuelve la API
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from flask import current_app
+from app import db
+from app.services.esquema import esquema_al_dia
+from app.services.eventos import catalogo_modificado
+from app.services.compresion import marcar_precomprimible
+
+MAGIC = b'TURCAT01'
+CABECERA = struct.Struct('<8sQI')
+# Tamaño de los trozos en que se envía una sección al servidor WSGI
+TAMANO_TROZO = 64 * 1024
+
+
+def construir_snapshot(ruta):
+    """
+    Generar el snapshot desde la base de datos y reemplazar el archivo
+
+    El archivo se escribe aparte y se renombra de forma atómica, por lo que
+    un lector nunca ve un snapshot a medio escribir.
+
+    Returns:
+        int: Versión del snapshot escrito
+    """
+    from app.services.serializadores import listar_paquetes, listar_destinos
+
+    dumps = current_app.json.dumps
+    secciones = {
+        'paquetes': f'{dumps(listar_paquetes())}\n'.encode('utf-8'),
+        'destinos': f'{dumps(listar_destinos())}\n'.encode('utf-8'),
+    }
+
+    indice = {}
+    offset = 0
+    for nombre, contenido in secciones.items():
+        indice[nombre] = [offset, len(contenido)]
+        offset += len(contenido)
+    indice_bytes = json.dumps(indice).encode('utf-8')
+    version = time.time_ns()
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.catalogo-')
+    try:
+        with os.fdopen(fd, 'wb') as archivo:
+            archivo.write(CABECERA.pack(MAGIC, version, len(indice_bytes)))
+            archivo.write(indice_bytes)
+            for contenido in secciones.values():
+                archivo.write(contenido)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    return version
+
+
+class CatalogoSnapshot:
+    """Lector del snapshot: mapea el archivo y lo vuelve a mapear si cambia"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        # (firma del archivo, mmap, versión, índice); se reemplaza completo
+        self._estado = None
+        self._lock = threading.Lock()
+
+    def _actual(self):
+        try:
+            st = os.stat(self.ruta)
+        except FileNotFoundError:
+            return None
+        firma = (st.st_ino, st.st_mtime_ns, st.st_size)
+        estado = self._estado
+        if estado and estado[0] == firma:
+            return estado
+
+        with self._lock:
+            estado = self._estado
+            if estado and estado[0] == firma:
+                return estado
+            with open(self.ruta, 'rb') as archivo:
+                mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, largo_indice = CABECERA.unpack_from(mapa, 0)
+            if magic != MAGIC:
+                raise ValueError(f'Snapshot del catálogo inválido: {self.ruta}')
+            inicio = CABECERA.size + largo_indice
+            indice = {
+                nombre: (inicio + offset, largo)
+                for nombre, (offset, largo) in json.loads(mapa[CABECERA.size:inicio]).items()
+            }
+            # El mmap anterior se libera cuando ninguna respuesta lo use
+            self._estado = (firma, mapa, version, indice)
+            return self._estado
+
+    @property
+    def version(self):
+        estado = self._actual()
+        return estado[2] if estado else None
+
+    def seccion(self, nombre):
+        """
+        Sección del snapshot sin copiarla (memoryview sobre el mmap)
+
+        Returns:
+            tuple (versión, memoryview) o None si todavía no hay snapshot
+        """
+        estado = self._actual()
+        if not estado:
+            return None
+        offset, largo = estado[3][nombre]
+        return estado[2], memoryview(estado[1])[offset:offset + largo]
+
+
+class _Regenerador:
+    """Agrupa las escrituras cercanas en una sola regeneración del snapshot"""
+
+    def __init__(self, app, ruta, intervalo):
+        self.app = app
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self._pendiente = None
+        self._lock = threading.Lock()
+
+    def solicitar(self):
+        if self.intervalo <= 0:
+            self._construir()
+            return
+        with self._lock:
+            if self._pendiente:
+                return
+            self._pendiente = threading.Timer(self.intervalo, self._ejecutar)
+            self._pendiente.daemon = True
+            self._pendiente.start()
+
+    def _ejecutar(self):
+        with self._lock:
+            self._pendiente = None
+        with self.app.app_context():
+            try:
+                self._construir()
+            finally:
+                db.session.remove()
+
+    def _construir(self):
+        construir_snapshot(self.ruta)
+        # Las respuestas servidas entre la escritura y este momento salieron del
+        # snapshot anterior: una nueva versión hace que los clientes las descarten
+        version = self.app.extensions.get('catalogo_version')
+        if version:
+            version.incrementar()
+
+
+@catalogo_modificado.connect
+def _regenerar_snapshot(app, paquetes, destinos, solo_cupos=False):
+    regenerador = app.extensions.get('catalogo_regenerador')
+    if regenerador:
+        regenerador.solicitar()
+
+
+def init_catalogo_snapshot(app):
+    """
+    Activar el snapshot si CATALOGO_SNAPSHOT_PATH está configurado
+
+    Debe llamarse con las tablas ya creadas. El archivo se regenera siempre:
+    uno de una ejecución anterior puede no reflejar cambios hechos con la app
+    detenida (migraciones, scripts de datos). Con el esquema sin migrar el
+    snapshot no se activa y el catálogo se lee de la base de datos.
+    """
+    ruta = app.config.get('CATALOGO_SNAPSHOT_PATH')
+    if not ruta or not esquema_al_dia(app):
+        return
+    app.extensions['catalogo_snapshot'] = CatalogoSnapshot(ruta)
+    app.extensions['catalogo_regenerador'] = _Regenerador(
+        app, ruta, app.config.get('CATALOGO_SNAPSHOT_INTERVALO', 0.5)
+    )
+    with app.app_context():
+        construir_snapshot(ruta)
+
+
+def _trozos(contenido):
+    """Enviar la sección por trozos: nunca se copia completa a la memoria del proceso"""
+    for inicio in range(0, len(contenido), TAMANO_TROZO):
+        yield contenido[inicio:inicio + TAMANO_TROZO].tobytes()
+
+
+def respuesta_snapshot(seccion):
+    """
+    Respuesta JSON servida directamente desde el snapshot
+
+    Returns:
+        Response o None si el snapshot no está activo
+    """
+    snapshot = current_app.extensions.get('catalogo_snapshot')
+    if not snapshot:
+        return None
+    leido = snapshot.seccion(seccion)
+    if leido is None:
+        return None
+    version, contenido = leido
+    respuesta = current_app.response_class(_trozos(contenido), mimetype='application/json',
+                                           direct_passthrough=True)
+    respuesta.content_length = len(contenido)
+    # La variante comprimida se genera una vez por sección y versión del snapshot
+    return marcar_precomprimible(respuesta, clave=('snapshot', seccion, version),
+                                 origen=contenido.tobytes)
@@ -0,0 +1,199 @@
+"""
+Versión del catálogo para peticiones condicionales (ETag / Last-Modified)
+Los servicios avisan sus escrituras (notificar_catalogo) y la versión sube.
+Las lecturas del catálogo comparan If-None-Match / If-Modified-Since con la
+versión actual y responden 304 antes de consultar o serializar nada.
+
+La versión debe ser la misma para todos los workers; si no, un worker que no
+atendió la escritura seguiría respondiendo 304 a ETags viejos. Backends
+(CATALOGO_VERSION_BACKEND):
+    'tabla'   (por defecto) fila de catalogo_version; cada lectura cuesta un
+              SELECT por clave primaria
+    'archivo' CATALOGO_VERSION_PATH en un disco compartido; cada lectura
+              cuesta un stat (si se define la ruta se usa este backend)
+    'memoria' solo este proceso: válido únicamente con un worker
+"""
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, make_response, request
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.http import is_resource_modified
+from app import db
+from app.models.catalogo_version import CatalogoVersion
+
+
+def _nuevo_token():
+    return f'{time.time_ns():x}-{os.getpid():x}'
+
+
+class VersionCatalogo:
+    """Token de versión y fecha de última modificación del catálogo"""
+
+    def __init__(self, ruta=None, al_cambiar=None):
+        """
+        Args:
+            ruta: archivo compartido entre workers o None (solo este proceso)
+            al_cambiar: callable a ejecutar cuando otro proceso cambia la versión
+        """
+        self.ruta = ruta
+        self.al_cambiar = al_cambiar
+        # (firma del archivo, token, última modificación); se reemplaza completo
+        self._estado = (None, _nuevo_token(), time.time())
+        self._lock = threading.Lock()
+        if ruta and not os.path.exists(ruta):
+            self.incrementar()
+
+    def actual(self):
+        """
+        Returns:
+            tuple (token: str, ultima_modificacion: datetime UTC)
+        """
+        estado = self._estado
+        if self.ruta:
+            try:
+                st = os.stat(self.ruta)
+            except FileNotFoundError:
+                pass
+            else:
+                firma = (st.st_ino, st.st_mtime_ns, st.st_size)
+                if firma != estado[0]:
+                    with open(self.ruta, encoding='utf-8') as archivo:
+                        token, modificado = archivo.read().split()
+                    if estado[0] is not None and self.al_cambiar:
+                        self.al_cambiar()
+                    estado = self._estado = (firma, token, float(modificado))
+        return estado[1], datetime.fromtimestamp(estado[2], timezone.utc)
+
+    def incrementar(self):
+        """Registrar una escritura: nuevo token y última modificación = ahora"""
+        token, ahora = _nuevo_token(), time.time()
+        with self._lock:
+            if not self.ruta:
+                self._estado = (None, token, ahora)
+                return
+            # Se escribe aparte y se renombra: un lector nunca ve el archivo a medias
+            directorio = os.path.dirname(os.path.abspath(self.ruta))
+            os.makedirs(directorio, exist_ok=True)
+            fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.version-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as archivo:
+                    archivo.write(f'{token} {ahora!r}\n')
+                os.replace(temporal, self.ruta)
+            except BaseException:
+                os.unlink(temporal)
+                raise
+            # Versión propia: no cuenta como cambio de otro proceso (salvo que
+            # otro worker ya la haya reemplazado; eso lo detecta actual())
+            with open(self.ruta, encoding='utf-8') as archivo:
+                st = os.fstat(archivo.fileno())
+                if archivo.read().split()[0] == token:
+                    self._estado = ((st.st_ino, st.st_mtime_ns, st.st_size), token, ahora)
+
+
+class VersionCatalogoTabla:
+    """Versión guardada en la tabla catalogo_version (compartida entre workers)"""
+
+    FILA = 1
+
+    def __init__(self, al_cambiar=None):
+        self.al_cambiar = al_cambiar
+        self._visto = None  # último token leído o escrito por este proceso
+
+    def actual(self):
+        """
+        Returns:
+            tuple (token: str, ultima_modificacion: datetime UTC)
+        """
+        fila = db.session.execute(
+            select(CatalogoVersion.token, CatalogoVersion.modificado_us).where(CatalogoVersion.id == self.FILA)
+        ).first()
+        if fila is None:
+            token, modificado_us = self.incrementar()
+        else:
+            token, modificado_us = fila
+        if token != self._visto:
+            if self._visto is not None and self.al_cambiar:
+                self.al_cambiar()
+            self._visto = token
+        return token, datetime.fromtimestamp(modificado_us / 1e6, timezone.utc)
+
+    def incrementar(self):
+        """
+        Registrar una escritura: nuevo token y última modificación = ahora
+
+        Returns:
+            tuple (token: str, modificado_us: int)
+        """
+        token, modificado_us = _nuevo_token(), time.time_ns() // 1000
+        valores = {'token': token, 'modificado_us': modificado_us}
+        actualizadas = db.session.execute(
+            update(CatalogoVersion).where(CatalogoVersion.id == self.FILA).values(**valores)
+        ).rowcount
+        if not actualizadas:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(CatalogoVersion(id=self.FILA, **valores))
+            except IntegrityError:
+                # Otro worker creó la fila al mismo tiempo
+                db.session.execute(
+                    update(CatalogoVersion).where(CatalogoVersion.id == self.FILA).values(**valores)
+                )
+        db.session.commit()
+        self._visto = token
+        return token, modificado_us
+
+
+def init_catalogo_version(app):
+    """Crear el registro de versión del catálogo según CATALOGO_VERSION_BACKEND"""
+    def descartar_derivados():
+        # Otro worker escribió: sus invalidaciones precisas no llegan a este proceso
+        cache = app.extensions.get('catalogo_cache')
+        if cache:
+            cache.limpiar()
+        autocompletado = app.extensions.get('autocompletado')
+        if autocompletado:
+            autocompletado.desactualizado = True
+
+    ruta = app.config.get('CATALOGO_VERSION_PATH')
+    backend = 'archivo' if ruta else app.config.get('CATALOGO_VERSION_BACKEND', 'tabla')
+    if backend == 'tabla':
+        version = VersionCatalogoTabla(al_cambiar=descartar_derivados)
+    elif backend == 'archivo':
+        if not ruta:
+            raise ValueError("CATALOGO_VERSION_BACKEND='archivo' requiere CATALOGO_VERSION_PATH")
+        version = VersionCatalogo(ruta, al_cambiar=descartar_derivados)
+    elif backend == 'memoria':
+        version = VersionCatalogo(al_cambiar=descartar_derivados)
+    else:
+        raise ValueError(f'CATALOGO_VERSION_BACKEND desconocido: {backend}')
+    app.extensions['catalogo_version'] = version
+
+
+def condicional_catalogo(vista):
+    """
+    Decorador para lecturas del catálogo: ETag fuerte + Last-Modified
+
+    La versión se lee antes de ejecutar la vista; si una escritura ocurre
+    mientras tanto, el cliente recibe el token anterior y la próxima vez
+    obtiene un 200, nunca un 304 con datos viejos.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        token, modificado = current_app.extensions['catalogo_version'].actual()
+        if is_resource_modified(request.environ, etag=token, last_modified=modificado):
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code != 200:
+                return respuesta
+        else:
+            respuesta = current_app.response_class(status=304)
+        respuesta.set_etag(token)
+        respuesta.last_modified = modificado
+        # El navegador guarda la respuesta pero revalida en cada uso
+        respuesta.cache_control.no_cache = True
+        return respuesta
+    return envoltura
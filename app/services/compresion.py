@@ -0,0 +1,218 @@
+"""
+Compresión de respuestas (gzip y, si está instalado, brotli)
+Se negocia con Accept-Encoding en un after_request. Las respuestas marcadas
+como precomprimibles (catálogo cacheado, snapshot, archivos estáticos) se
+comprimen una sola vez por versión y se guardan en una caché LRU; el resto
+de las respuestas dinámicas se comprimen al vuelo si superan el umbral.
+
+Los ETag de una variante comprimida llevan sufijo ("v-gzip", "v-br"). Antes
+de cada petición el sufijo se quita de If-None-Match, así las validaciones
+(catálogo, send_file) comparan contra el ETag sin comprimir, y un 304
+devuelve el mismo ETag que el cliente envió.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from flask import current_app, g, request
+from werkzeug.datastructures import ETags
+from werkzeug.http import parse_etags
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+TIPOS_COMPRIMIBLES = (
+    'text/', 'application/json', 'application/javascript', 'application/x-ndjson',
+    'image/svg+xml',
+)
+
+
+def codificaciones():
+    """Codificaciones soportadas, en orden de preferencia"""
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def comprimir(datos, codificacion, nivel):
+    """Comprimir bytes con 'gzip' o 'br' (nivel de 1 a 9)"""
+    if codificacion == 'br':
+        # brotli usa calidad 0-11; se escala el nivel de gzip (1-9)
+        return brotli.compress(datos, quality=min(11, round(nivel * 11 / 9)))
+    return gzip.compress(datos, compresslevel=nivel, mtime=0)
+
+
+class CacheComprimidos:
+    """LRU de variantes comprimidas acotada por tamaño total en bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, construir):
+        with self._lock:
+            datos = self._entradas.get(clave)
+            if datos is not None:
+                self._entradas.move_to_end(clave)
+                return datos
+        datos = construir()
+        if len(datos) > self.max_bytes:
+            return datos
+        with self._lock:
+            if clave not in self._entradas:
+                self._entradas[clave] = datos
+                self.bytes += len(datos)
+                while self.bytes > self.max_bytes:
+                    _, viejo = self._entradas.popitem(last=False)
+                    self.bytes -= len(viejo)
+        return datos
+
+
+def marcar_precomprimible(respuesta, clave=None, origen=None):
+    """
+    Indicar que el cuerpo de la respuesta se repite y conviene guardar su
+    versión comprimida
+
+    Args:
+        clave: identifica el contenido (p. ej. sección y versión del snapshot);
+            si es None se usa un hash del cuerpo
+        origen: función que devuelve el cuerpo en bytes, para respuestas que
+            se envían por trozos (direct_passthrough); requiere clave
+    """
+    respuesta.clave_compresion = clave if clave is not None else ('cuerpo',)
+    respuesta.origen_compresion = origen
+    return respuesta
+
+
+def _elegir_codificacion():
+    aceptadas = request.accept_encodings
+    for codificacion in codificaciones():
+        if aceptadas[codificacion] > 0:
+            return codificacion
+    return None
+
+
+def _normalizar_if_none_match():
+    """Quitar los sufijos de compresión de If-None-Match (antes de la vista)"""
+    cabecera = request.environ.get('HTTP_IF_NONE_MATCH')
+    if not cabecera:
+        return
+    etags = parse_etags(cabecera)
+    if etags.star_tag:
+        return
+    originales = {}
+    fuertes, debiles = [], []
+    for lista, debil in ((etags._strong, False), (etags._weak, True)):
+        for etag in lista:
+            base = etag
+            for codificacion in ('gzip', 'br'):
+                if etag.endswith(f'-{codificacion}'):
+                    base = etag[:-len(codificacion) - 1]
+                    originales[base] = etag
+            (debiles if debil else fuertes).append(base)
+    if originales:
+        g.etags_comprimidos = originales
+        request.environ['HTTP_IF_NONE_MATCH'] = ETags(fuertes, debiles).to_header()
+        request.__dict__.pop('if_none_match', None)
+
+
+def _agregar_sufijo_etag(respuesta, codificacion):
+    etag, debil = respuesta.get_etag()
+    if etag:
+        respuesta.set_etag(f'{etag}-{codificacion}', weak=debil)
+
+
+def es_comprimible(nombre):
+    """Si vale la pena comprimir un archivo según su tipo MIME"""
+    tipo, _ = mimetypes.guess_type(nombre)
+    return bool(tipo) and tipo.startswith(TIPOS_COMPRIMIBLES)
+
+
+def clave_estatico(ruta):
+    """Clave de caché de un archivo: cambia si cambia su contenido en disco"""
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return ('estatico', ruta, st.st_mtime_ns, st.st_size)
+
+
+def _cuerpo_estatico():
+    """Clave del archivo estático servido, o None si no aplica"""
+    if request.endpoint != 'static' or not request.view_args:
+        return None
+    ruta = safe_join(current_app.static_folder, request.view_args['filename'])
+    return clave_estatico(ruta) if ruta and os.path.isfile(ruta) else None
+
+
+def _comprimir_respuesta(respuesta):
+    config = current_app.config
+    respuesta.vary.add('Accept-Encoding')
+
+    # 304: devolver el ETag con el mismo sufijo que envió el cliente
+    if respuesta.status_code == 304:
+        etag, debil = respuesta.get_etag()
+        original = getattr(g, 'etags_comprimidos', {}).get(etag)
+        if original:
+            respuesta.set_etag(original, weak=debil)
+        return respuesta
+
+    if (respuesta.status_code != 200 or respuesta.is_streamed and not respuesta.direct_passthrough
+            or 'Content-Encoding' in respuesta.headers
+            or not (respuesta.mimetype or '').startswith(TIPOS_COMPRIMIBLES)
+            or request.method == 'HEAD'):
+        return respuesta
+    codificacion = _elegir_codificacion()
+    if not codificacion:
+        return respuesta
+
+    estatico = _cuerpo_estatico() if respuesta.direct_passthrough else None
+    origen = getattr(respuesta, 'origen_compresion', None)
+    if respuesta.direct_passthrough and not (estatico or origen):
+        return respuesta
+    tamano = estatico[-1] if estatico else respuesta.content_length or 0
+    if tamano < config.get('COMPRESION_MIN_BYTES', 1024):
+        return respuesta
+
+    cache = current_app.extensions['compresion_cache']
+    nivel_cache = config.get('COMPRESION_NIVEL_CACHE', 9)
+    if estatico:
+        def construir():
+            with open(estatico[1], 'rb') as archivo:
+                return comprimir(archivo.read(), codificacion, nivel_cache)
+        datos = cache.obtener(estatico + (codificacion,), construir)
+        respuesta.direct_passthrough = False
+    elif origen:
+        # El cuerpo solo se lee entero si la variante comprimida no está en caché
+        datos = cache.obtener(respuesta.clave_compresion + (codificacion,),
+                              lambda: comprimir(origen(), codificacion, nivel_cache))
+        respuesta.direct_passthrough = False
+    elif getattr(respuesta, 'clave_compresion', None) is not None:
+        cuerpo = respuesta.get_data()
+        clave = respuesta.clave_compresion
+        if clave == ('cuerpo',):
+            clave = ('cuerpo', hashlib.blake2b(cuerpo, digest_size=16).digest())
+        datos = cache.obtener(clave + (codificacion,), lambda: comprimir(cuerpo, codificacion, nivel_cache))
+    else:
+        datos = comprimir(respuesta.get_data(), codificacion, config.get('COMPRESION_NIVEL', 6))
+
+    respuesta.set_data(datos)
+    respuesta.headers['Content-Encoding'] = codificacion
+    _agregar_sufijo_etag(respuesta, codificacion)
+    return respuesta
+
+
+def init_compresion(app):
+    """Registrar la compresión de respuestas (COMPRESION_ACTIVA, por defecto sí)"""
+    if not app.config.get('COMPRESION_ACTIVA', True):
+        return
+    app.extensions['compresion_cache'] = CacheComprimidos(
+        app.config.get('COMPRESION_CACHE_MB', 64) * 1024 * 1024
+    )
+    app.before_request(_normalizar_if_none_match)
+    app.after_request(_comprimir_respuesta)
@@ -5,6 +5,8 @@ Contiene la lógica de negocio para crear, editar y eliminar destinos
 from app import db
 from app.models.destino import Destino
 from app.models.paquete import PaqueteDestino
+from app.services.eventos import notificar_catalogo
+from app.services.estadisticas import EstadisticasService
 
 
 class DestinoService:
@@ -34,7 +36,9 @@ class DestinoService:
             costo_base=datos['costo_base']
         )
         db.session.add(destino)
+        EstadisticasService.destinos_cambiados(1)
         db.session.commit()
+        notificar_catalogo(destinos=[destino.id])
         return destino
     
     @staticmethod
@@ -63,6 +67,7 @@ class DestinoService:
             destino.costo_base = datos['costo_base']
         
         db.session.commit()
+        notificar_catalogo(destinos=[destino_id])
         return destino
     
     @staticmethod
@@ -91,6 +96,8 @@ class DestinoService:
             )
         
         db.session.delete(destino)
+        EstadisticasService.destinos_cambiados(-1)
         db.session.commit()
+        notificar_catalogo(destinos=[destino_id])
         return nombre
 
@@ -0,0 +1,46 @@
+"""
+Estado del esquema de la base de datos
+Las reconstrucciones al iniciar (índices, snapshot, estadísticas) consultan
+columnas agregadas por las migraciones. Sobre una base sin migrar fallarían
+dentro de create_app, es decir, antes de que `flask db upgrade` alcance a
+aplicar las migraciones; por eso se omiten hasta que el esquema esté al día.
+"""
+from sqlalchemy import inspect
+from app import db
+
+
+def columnas_faltantes():
+    """
+    Tablas y columnas de los modelos que no existen en la base de datos
+
+    Returns:
+        list[str]: 'tabla' o 'tabla.columna' por cada faltante
+    """
+    inspector = inspect(db.engine)
+    existentes = set(inspector.get_table_names())
+    faltantes = []
+    for tabla in db.metadata.sorted_tables:
+        if tabla.name not in existentes:
+            faltantes.append(tabla.name)
+            continue
+        columnas = {c['name'] for c in inspector.get_columns(tabla.name)}
+        faltantes.extend(f'{tabla.name}.{c.name}' for c in tabla.columns if c.name not in columnas)
+    return faltantes
+
+
+def esquema_al_dia(app):
+    """
+    Si la base de datos tiene todas las tablas y columnas de los modelos
+
+    Se calcula una vez por app (debe llamarse con las tablas ya creadas).
+    """
+    if 'esquema_al_dia' not in app.extensions:
+        with app.app_context():
+            faltantes = columnas_faltantes()
+        if faltantes:
+            app.logger.warning(
+                'Esquema sin migrar (faltan %s): se omiten las reconstrucciones al iniciar; '
+                'ejecutar `flask db upgrade`', ', '.join(faltantes)
+            )
+        app.extensions['esquema_al_dia'] = not faltantes
+    return app.extensions['esquema_al_dia']
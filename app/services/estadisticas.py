@@ -0,0 +1,264 @@
+"""
+Servicio de estadísticas del dashboard de administración
+Mantiene contadores acumulados (por paquete y globales) que los servicios de
+reservas, paquetes y destinos actualizan dentro de su misma transacción, con
+UPDATE ... SET col = col + delta. Así el dashboard lee una fila por clave
+primaria en vez de recorrer la tabla de reservas.
+
+`flask reconstruir-estadisticas` recalcula todo desde cero.
+"""
+from decimal import Decimal
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, update, insert, delete, case, func
+from app import db
+from app.models.estadisticas import EstadisticasGlobales, EstadisticasPaquete
+from app.models.paquete import Paquete
+from app.models.destino import Destino
+from app.models.reserva import Reserva
+from app.services.esquema import esquema_al_dia
+
+GLOBAL_ID = 1
+CONTADORES = ('reservas', 'confirmadas', 'canceladas', 'pasajeros')
+
+
+def _sumar(modelo, filtro, **deltas):
+    """UPDATE modelo SET campo = campo + delta (solo los deltas distintos de 0)"""
+    valores = {campo: getattr(modelo, campo) + delta for campo, delta in deltas.items()
+               if not isinstance(delta, int) or delta}
+    if valores:
+        db.session.execute(
+            update(modelo).where(filtro).values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _sumar_global(**deltas):
+    _sumar(EstadisticasGlobales, EstadisticasGlobales.id == GLOBAL_ID, **deltas)
+
+
+class EstadisticasService:
+    """Mantenimiento y lectura de las estadísticas acumuladas"""
+
+    @staticmethod
+    def registrar_reservas(movimientos):
+        """
+        Aplicar altas, bajas y cambios de estado de reservas
+
+        Args:
+            movimientos: iterable de (paquete_id, estado, numero_pasajeros, signo,
+                fecha_reserva), el mismo formato de eventos.notificar_reservas
+        """
+        por_paquete = {}
+        for paquete_id, estado, pasajeros, signo, _ in movimientos:
+            deltas = por_paquete.setdefault(paquete_id, dict.fromkeys(CONTADORES, 0))
+            deltas['reservas'] += signo
+            if estado == 'confirmada':
+                deltas['confirmadas'] += signo
+                deltas['pasajeros'] += signo * pasajeros
+            elif estado == 'cancelada':
+                deltas['canceladas'] += signo
+        if not por_paquete:
+            return
+        EstadisticasService._asegurar_filas(por_paquete)
+
+        # Un solo UPDATE para todos los paquetes, con el delta de cada uno vía CASE
+        valores = {}
+        for campo in CONTADORES:
+            por_id = {pid: d[campo] for pid, d in por_paquete.items() if d[campo]}
+            if por_id:
+                valores[campo] = case(por_id, value=EstadisticasPaquete.paquete_id, else_=0)
+        _sumar(EstadisticasPaquete, EstadisticasPaquete.paquete_id.in_(por_paquete), **valores)
+
+        totales = {campo: sum(d[campo] for d in por_paquete.values()) for campo in CONTADORES}
+        confirmadas = {pid: d['confirmadas'] for pid, d in por_paquete.items() if d['confirmadas']}
+        if confirmadas:
+            totales['ingresos'] = select(func.coalesce(func.sum(
+                case(confirmadas, value=Paquete.id, else_=0) * Paquete.precio_total
+            ), 0)).where(Paquete.id.in_(confirmadas)).scalar_subquery()
+        _sumar_global(**totales)
+
+    @staticmethod
+    def _asegurar_filas(paquete_ids):
+        """
+        Crear en cero las filas por paquete que falten (paquetes insertados sin
+        pasar por PaqueteService), para que los UPDATE incrementales no se pierdan
+        """
+        existentes = set(db.session.scalars(
+            select(EstadisticasPaquete.paquete_id).where(EstadisticasPaquete.paquete_id.in_(list(paquete_ids)))
+        ))
+        faltantes = [paquete_id for paquete_id in paquete_ids if paquete_id not in existentes]
+        if faltantes:
+            db.session.execute(insert(EstadisticasPaquete).from_select(
+                ['paquete_id', 'agotado'],
+                select(Paquete.id, Paquete.disponibles == 0).where(Paquete.id.in_(faltantes))
+            ))
+
+    @staticmethod
+    def sincronizar_agotados(paquete_ids):
+        """
+        Actualizar la marca de agotado de los paquetes cuyos cupos cambiaron
+
+        Debe llamarse en la misma transacción, después del UPDATE de cupos.
+        """
+        if not paquete_ids:
+            return
+        filas = db.session.execute(
+            select(EstadisticasPaquete.paquete_id, EstadisticasPaquete.agotado, Paquete.disponibles == 0)
+            .join(Paquete, Paquete.id == EstadisticasPaquete.paquete_id)
+            .where(EstadisticasPaquete.paquete_id.in_(list(paquete_ids)))
+        )
+        cambios = {paquete_id: agotado for paquete_id, antes, agotado in filas if bool(antes) != bool(agotado)}
+        if not cambios:
+            return
+        db.session.execute(
+            update(EstadisticasPaquete)
+            .where(EstadisticasPaquete.paquete_id.in_(cambios))
+            .values(agotado=case(cambios, value=EstadisticasPaquete.paquete_id))
+            .execution_options(synchronize_session=False)
+        )
+        _sumar_global(paquetes_agotados=sum(1 if agotado else -1 for agotado in cambios.values()))
+
+    @staticmethod
+    def paquete_creado(paquete):
+        """Registrar un paquete nuevo (ya con id)"""
+        agotado = paquete.disponibles == 0
+        db.session.execute(insert(EstadisticasPaquete).values(paquete_id=paquete.id, agotado=agotado))
+        _sumar_global(paquetes=1, paquetes_agotados=int(agotado))
+
+    @staticmethod
+    def precio_cambiado(paquete_id, precio_anterior, precio_nuevo):
+        """Ajustar los ingresos de las reservas confirmadas al nuevo precio"""
+        diferencia = Decimal(str(precio_nuevo)) - Decimal(str(precio_anterior))
+        if diferencia:
+            confirmadas = select(EstadisticasPaquete.confirmadas).where(
+                EstadisticasPaquete.paquete_id == paquete_id
+            ).scalar_subquery()
+            _sumar_global(ingresos=func.coalesce(confirmadas, 0) * diferencia)
+
+    @staticmethod
+    def paquete_eliminado(paquete_id):
+        """Restar los contadores de un paquete que se elimina junto con sus reservas"""
+        fila = db.session.get(EstadisticasPaquete, paquete_id)
+        if fila is None:
+            return
+        precio = select(Paquete.precio_total).where(Paquete.id == paquete_id).scalar_subquery()
+        _sumar_global(
+            paquetes=-1, paquetes_agotados=-int(fila.agotado),
+            **{campo: -getattr(fila, campo) for campo in CONTADORES},
+            **({'ingresos': -fila.confirmadas * precio} if fila.confirmadas else {})
+        )
+        db.session.delete(fila)
+
+    @staticmethod
+    def destinos_cambiados(delta):
+        """Registrar altas (1) o bajas (-1) de destinos"""
+        _sumar_global(destinos=delta)
+
+    @staticmethod
+    def obtener():
+        """
+        Returns:
+            EstadisticasGlobales: Totales actuales (se reconstruyen si no existen)
+        """
+        return db.session.get(EstadisticasGlobales, GLOBAL_ID) or EstadisticasService.reconstruir()
+
+    @staticmethod
+    def al_dia():
+        """
+        Comparar los totales acumulados con COUNT(*) de las tablas
+
+        Detecta datos insertados sin pasar por los servicios (scripts de datos
+        de ejemplo, cargas masivas, SQL a mano).
+
+        Returns:
+            bool: True si la fila global existe y sus conteos coinciden
+        """
+        estadisticas = db.session.get(EstadisticasGlobales, GLOBAL_ID)
+        if estadisticas is None:
+            return False
+        conteos = db.session.execute(select(
+            select(func.count(Destino.id)).scalar_subquery(),
+            select(func.count(Paquete.id)).scalar_subquery(),
+            select(func.count(Reserva.id)).scalar_subquery(),
+            select(func.count(EstadisticasPaquete.paquete_id)).scalar_subquery(),
+        )).one()
+        return tuple(conteos) == (estadisticas.destinos, estadisticas.paquetes,
+                                  estadisticas.reservas, estadisticas.paquetes)
+
+    @staticmethod
+    def paquetes_mas_reservados(limite=5):
+        """
+        Returns:
+            list[tuple]: (nombre, total de reservas) de los paquetes más reservados
+        """
+        return db.session.execute(
+            select(Paquete.nombre, EstadisticasPaquete.reservas)
+            .join(Paquete, Paquete.id == EstadisticasPaquete.paquete_id)
+            .where(EstadisticasPaquete.reservas > 0)
+            .order_by(EstadisticasPaquete.reservas.desc(), EstadisticasPaquete.paquete_id)
+            .limit(limite)
+        ).all()
+
+    @staticmethod
+    def reconstruir():
+        """
+        Recalcular todas las estadísticas a partir de las tablas
+
+        Returns:
+            EstadisticasGlobales: Los totales recalculados
+        """
+        db.session.execute(delete(EstadisticasPaquete))
+        db.session.execute(delete(EstadisticasGlobales))
+
+        confirmada = Reserva.estado == 'confirmada'
+        db.session.execute(insert(EstadisticasPaquete).from_select(
+            ['paquete_id', 'reservas', 'confirmadas', 'canceladas', 'pasajeros', 'agotado'],
+            select(
+                Paquete.id,
+                func.count(Reserva.id),
+                func.coalesce(func.sum(case((confirmada, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((Reserva.estado == 'cancelada', 1), else_=0)), 0),
+                func.coalesce(func.sum(case((confirmada, Reserva.numero_pasajeros), else_=0)), 0),
+                Paquete.disponibles == 0,
+            ).outerjoin(Reserva, Reserva.paquete_id == Paquete.id).group_by(Paquete.id, Paquete.disponibles)
+        ))
+
+        sumas = db.session.execute(select(
+            func.count(),
+            func.coalesce(func.sum(case((EstadisticasPaquete.agotado, 1), else_=0)), 0),
+            *(func.coalesce(func.sum(getattr(EstadisticasPaquete, campo)), 0) for campo in CONTADORES),
+            func.coalesce(func.sum(EstadisticasPaquete.confirmadas * Paquete.precio_total), 0),
+        ).join(Paquete, Paquete.id == EstadisticasPaquete.paquete_id)).one()
+        paquetes, agotados, *contadores, ingresos = sumas
+
+        estadisticas = EstadisticasGlobales(
+            id=GLOBAL_ID,
+            destinos=db.session.scalar(select(func.count(Destino.id))),
+            paquetes=paquetes,
+            paquetes_agotados=agotados,
+            ingresos=ingresos,
+            **dict(zip(CONTADORES, contadores))
+        )
+        db.session.add(estadisticas)
+        db.session.commit()
+        return estadisticas
+
+
+def init_estadisticas(app):
+    """Registrar el comando de reconstrucción y recalcular los totales si faltan o no cuadran"""
+    app.cli.add_command(_comando_reconstruir)
+    if not esquema_al_dia(app):
+        return
+    with app.app_context():
+        if not EstadisticasService.al_dia():
+            EstadisticasService.reconstruir()
+
+
+@click.command('reconstruir-estadisticas')
+@with_appcontext
+def _comando_reconstruir():
+    """Recalcular las estadísticas del dashboard"""
+    estadisticas = EstadisticasService.reconstruir()
+    click.echo(f'✅ Estadísticas recalculadas: {estadisticas.reservas} reservas, '
+               f'{estadisticas.paquetes} paquetes')
@@ -0,0 +1,146 @@
+"""
+Manifiesto de archivos estáticos con huella (fingerprint)
+Al iniciar se calcula el hash de cada archivo de app/static y las plantillas
+piden la URL con url_estatico('js/carrito.js') -> /static/js/carrito.3fa9c1d2e4b5.js.
+Como la URL cambia con el contenido, esas respuestas se sirven con caché de
+un año e `immutable`; tras un deploy el navegador pide la URL nueva.
+
+La URL con huella apunta al mismo archivo: antes de la vista se traduce el
+nombre al original, así send_file, el ETag y la compresión no cambian.
+Con ESTATICOS_PRECOMPRIMIR las variantes gzip/br se generan en el arranque.
+"""
+import hashlib
+import os
+import threading
+from flask import current_app, g, request, url_for
+
+UN_ANIO = 365 * 24 * 3600
+
+
+class ManifiestoEstaticos:
+    """Mapa archivo original <-> nombre con huella"""
+
+    def __init__(self, carpeta, recargar=False):
+        """
+        Args:
+            carpeta: carpeta de estáticos de la app
+            recargar: recalcular el hash si el archivo cambió (modo desarrollo)
+        """
+        self.carpeta = carpeta
+        self.recargar = recargar
+        self._entradas = {}   # original -> (firma, nombre con huella)
+        self._originales = {}  # nombre con huella -> original
+        self._lock = threading.Lock()
+        for raiz, _, archivos in os.walk(carpeta):
+            for archivo in archivos:
+                if not archivo.startswith('.'):
+                    relativo = os.path.relpath(os.path.join(raiz, archivo), carpeta)
+                    self._registrar(relativo.replace(os.sep, '/'))
+
+    @staticmethod
+    def _con_huella(nombre, huella):
+        base, extension = os.path.splitext(nombre)
+        return f'{base}.{huella}{extension}'
+
+    def _registrar(self, nombre):
+        ruta = os.path.join(self.carpeta, nombre)
+        try:
+            st = os.stat(ruta)
+            with open(ruta, 'rb') as archivo:
+                huella = hashlib.sha256(archivo.read()).hexdigest()[:12]
+        except OSError:
+            return None
+        con_huella = self._con_huella(nombre, huella)
+        with self._lock:
+            anterior = self._entradas.get(nombre)
+            if anterior:
+                self._originales.pop(anterior[1], None)
+            self._entradas[nombre] = ((st.st_mtime_ns, st.st_size), con_huella)
+            self._originales[con_huella] = nombre
+        return con_huella
+
+    def con_huella(self, nombre):
+        """
+        Returns:
+            str: Nombre con huella, o None si el archivo no existe
+        """
+        entrada = self._entradas.get(nombre)
+        if entrada and not self.recargar:
+            return entrada[1]
+        if entrada:
+            try:
+                st = os.stat(os.path.join(self.carpeta, nombre))
+            except OSError:
+                return None
+            if (st.st_mtime_ns, st.st_size) == entrada[0]:
+                return entrada[1]
+        return self._registrar(nombre)
+
+    def original(self, con_huella):
+        """Nombre original de una URL con huella, o None si no es una"""
+        return self._originales.get(con_huella)
+
+    def nombres(self):
+        return list(self._entradas)
+
+
+def url_estatico(nombre):
+    """
+    URL con huella de un archivo estático (helper de plantillas)
+
+    Si el archivo no está en el manifiesto se devuelve la URL normal.
+    """
+    manifiesto = current_app.extensions.get('estaticos')
+    con_huella = manifiesto.con_huella(nombre) if manifiesto else None
+    return url_for('static', filename=con_huella or nombre)
+
+
+def _resolver_huella():
+    """Traducir /static/<con huella> al archivo original antes de la vista"""
+    if request.endpoint != 'static' or not request.view_args:
+        return
+    original = current_app.extensions['estaticos'].original(request.view_args.get('filename'))
+    if original:
+        request.view_args['filename'] = original
+        g.estatico_inmutable = True
+
+
+def _cache_inmutable(respuesta):
+    if g.get('estatico_inmutable') and respuesta.status_code in (200, 304):
+        respuesta.cache_control.public = True
+        respuesta.cache_control.max_age = UN_ANIO
+        respuesta.cache_control.immutable = True
+        respuesta.cache_control.no_cache = None
+    return respuesta
+
+
+def _precomprimir(app, manifiesto):
+    """Generar en el arranque las variantes comprimidas de los estáticos"""
+    from app.services import compresion
+
+    cache = app.extensions.get('compresion_cache')
+    if cache is None:
+        return
+    nivel = app.config.get('COMPRESION_NIVEL_CACHE', 9)
+    minimo = app.config.get('COMPRESION_MIN_BYTES', 1024)
+    for nombre in manifiesto.nombres():
+        clave = compresion.clave_estatico(os.path.join(manifiesto.carpeta, nombre))
+        if clave is None or clave[-1] < minimo or not compresion.es_comprimible(nombre):
+            continue
+        with open(clave[1], 'rb') as archivo:
+            datos = archivo.read()
+        for codificacion in compresion.codificaciones():
+            cache.obtener(clave + (codificacion,), lambda: compresion.comprimir(datos, codificacion, nivel))
+
+
+def init_estaticos(app):
+    """Crear el manifiesto de estáticos y registrar url_estatico en las plantillas"""
+    manifiesto = ManifiestoEstaticos(
+        app.static_folder, recargar=app.config.get('ESTATICOS_RECARGAR', app.debug)
+    )
+    app.extensions['estaticos'] = manifiesto
+    app.add_template_global(url_estatico)
+    app.before_request(_resolver_huella)
+    app.after_request(_cache_inmutable)
+    if app.config.get('ESTATICOS_PRECOMPRIMIR', True):
+        _precomprimir(app, manifiesto)
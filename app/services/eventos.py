@@ -0,0 +1,50 @@
+"""
+Eventos de la capa de servicios
+Los servicios avisan aquí de sus escrituras (después del commit) para que
+cachés e índices derivados se actualicen sin acoplarse a cada servicio
+"""
+from blinker import Namespace
+from flask import current_app
+
+_senales = Namespace()
+
+# Enviada tras cada escritura que cambia el catálogo público
+# kwargs: paquetes (set[int]), destinos (set[int]), solo_cupos (bool: solo
+# cambió `disponibles`, como en reservas y cancelaciones)
+catalogo_modificado = _senales.signal('catalogo-modificado')
+
+# Enviada tras crear, cancelar, reconfirmar o eliminar reservas
+# kwargs: movimientos (list de tuplas, ver notificar_reservas)
+reservas_modificadas = _senales.signal('reservas-modificadas')
+
+
+def notificar_catalogo(paquetes=(), destinos=(), solo_cupos=False):
+    """
+    Avisar que cambiaron paquetes y/o destinos
+
+    Args:
+        paquetes: iterable de IDs de paquetes modificados (incluye cambios de cupos)
+        destinos: iterable de IDs de destinos modificados
+        solo_cupos: bool - Solo cambiaron los cupos de los paquetes; los
+            índices que no guardan `disponibles` pueden ignorar el aviso
+    """
+    app = current_app._get_current_object()
+    catalogo_modificado.send(app, paquetes=set(paquetes), destinos=set(destinos), solo_cupos=solo_cupos)
+    # La versión (ETag) sube después de invalidar cachés e índices: quien vea
+    # la versión nueva ya no puede recibir datos anteriores a la escritura
+    version = app.extensions.get('catalogo_version')
+    if version:
+        version.incrementar()
+
+
+def notificar_reservas(movimientos):
+    """
+    Avisar altas, bajas y cambios de estado de reservas
+
+    Args:
+        movimientos: list de (paquete_id, estado, numero_pasajeros, signo,
+            fecha_reserva); signo 1 suma la reserva en ese estado y -1 la resta
+            (un cambio de estado son dos movimientos)
+    """
+    if movimientos:
+        reservas_modificadas.send(current_app._get_current_object(), movimientos=list(movimientos))
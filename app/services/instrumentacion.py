@@ -0,0 +1,117 @@
+"""
+Instrumentación de consultas SQL por petición
+Con eventos del engine (before/after_cursor_execute) se cuentan las
+sentencias, el tiempo total en la base de datos y cuántas veces se repite
+cada forma de consulta (el SQL con literales y listas IN normalizados).
+Cuando una misma forma se repite INSTRUMENTACION_N1_UMBRAL veces o más en una
+petición se registra una advertencia con el endpoint: es la huella de un N+1
+(una consulta por fila de una lista).
+
+Los números se exponen en la cabecera Server-Timing ("db" y "app"), visible
+en las herramientas de desarrollo del navegador, y quedan en
+g.consultas_sql para otros after_request.
+
+Solo se mide dentro de una petición; las consultas de una respuesta en
+streaming posteriores al after_request no se cuentan.
+"""
+import re
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from app import db
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def forma_consulta(sentencia):
+    """SQL normalizado: literales como ?, listas IN como (?) y espacios colapsados"""
+    forma = _LITERALES.sub('?', sentencia)
+    forma = _LISTAS.sub('(?)', forma)
+    return _ESPACIOS.sub(' ', forma).strip()
+
+
+class MedicionConsultas:
+    """Consultas ejecutadas durante una petición"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.cantidad = 0
+        self.segundos = 0.0
+        self.formas = Counter()
+
+    def registrar(self, sentencia, segundos):
+        self.cantidad += 1
+        self.segundos += segundos
+        self.formas[forma_consulta(sentencia)] += 1
+
+    @property
+    def repetidas(self):
+        """Consultas que repiten una forma ya ejecutada en la petición"""
+        return sum(veces - 1 for veces in self.formas.values())
+
+    def sospechas_n1(self, umbral):
+        """Formas ejecutadas umbral veces o más, de la más repetida a la menos"""
+        return [(forma, veces) for forma, veces in self.formas.most_common() if veces >= umbral]
+
+    def server_timing(self):
+        total = (time.perf_counter() - self.inicio) * 1000
+        return (f'db;dur={self.segundos * 1000:.2f};desc="{self.cantidad} consultas, '
+                f'{self.repetidas} repetidas", app;dur={total:.2f}')
+
+
+def _medicion():
+    if not has_request_context():
+        return None
+    return g.get('consultas_sql')
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if _medicion() is not None:
+        conn.info['inicio_consulta'] = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    medicion = _medicion()
+    inicio = conn.info.pop('inicio_consulta', None)
+    if medicion is not None and inicio is not None:
+        medicion.registrar(statement, time.perf_counter() - inicio)
+
+
+def _iniciar_medicion():
+    g.consultas_sql = MedicionConsultas()
+
+
+def _reportar_medicion(respuesta):
+    medicion = g.get('consultas_sql')
+    if medicion is None:
+        return respuesta
+    config = current_app.config
+    umbral = config.get('INSTRUMENTACION_N1_UMBRAL', 10)
+    for forma, veces in medicion.sospechas_n1(umbral):
+        current_app.logger.warning(
+            'Posible N+1 en %s %s (%s): %d ejecuciones de %s',
+            request.method, request.path, request.endpoint, veces, forma[:300]
+        )
+    if config.get('INSTRUMENTACION_SERVER_TIMING', False):
+        respuesta.headers.add('Server-Timing', medicion.server_timing())
+    return respuesta
+
+
+def init_instrumentacion(app):
+    """
+    Registrar la medición de consultas por petición (INSTRUMENTACION_SQL)
+
+    Debe llamarse antes que las demás extensiones con after_request: Flask los
+    ejecuta en orden inverso, así el reporte incluye sus consultas.
+    """
+    if not app.config.get('INSTRUMENTACION_SQL', True):
+        return
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _antes_de_ejecutar)
+    event.listen(engine, 'after_cursor_execute', _despues_de_ejecutar)
+    app.before_request(_iniciar_medicion)
+    app.after_request(_reportar_medicion)
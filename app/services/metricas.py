@@ -0,0 +1,357 @@
+"""
+Métricas en formato de texto de Prometheus (/metrics)
+Registro propio, sin dependencias: histogramas de latencia por endpoint,
+método y estado HTTP, tiempo SQL por petición (de la instrumentación de
+consultas), contadores de reservas creadas y canceladas y de cupos vendidos,
+y el uso del pool de conexiones.
+
+Con varios workers cada proceso guarda su registro en METRICAS_DIR como
+<pid>.json (escritura atómica, a lo más cada METRICAS_INTERVALO segundos y
+al terminar). /metrics suma los archivos de todos los procesos y usa los
+datos en memoria para el propio. Los contadores e histogramas de procesos
+ya terminados se siguen sumando (así no retroceden); los medidores solo de
+procesos vivos. Los archivos de procesos terminados se fusionan en
+terminados.json al iniciar cada proceso y al leer /metrics, para que el
+directorio no crezca con cada reinicio de workers. El directorio debe
+vaciarse al desplegar, como con el modo multiproceso de prometheus_client.
+Sin METRICAS_DIR solo se expone el proceso que atiende: con varios workers
+es obligatorio.
+
+/metrics exige METRICAS_TOKEN ("Authorization: Bearer <token>"); sin token
+responde 404 salvo que METRICAS_PUBLICAS esté activo.
+"""
+import atexit
+import contextlib
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from flask import current_app, g, request, Response, abort
+from app import db
+from app.services.eventos import reservas_modificadas
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos ni compactación
+    fcntl = None
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_SQL = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+# nombre: (tipo, ayuda, buckets)
+METRICAS = {
+    'turismo_http_duracion_segundos': (
+        'histogram', 'Latencia de las peticiones HTTP por endpoint, método y estado', BUCKETS_LATENCIA),
+    'turismo_http_sql_segundos': (
+        'histogram', 'Tiempo en la base de datos por petición HTTP', BUCKETS_SQL),
+    'turismo_http_sql_consultas_total': (
+        'counter', 'Consultas SQL ejecutadas en peticiones HTTP', None),
+    'turismo_reservas_creadas_total': ('counter', 'Reservas creadas', None),
+    'turismo_reservas_canceladas_total': ('counter', 'Reservas canceladas', None),
+    'turismo_cupos_vendidos_total': ('counter', 'Cupos vendidos (reservas confirmadas o reconfirmadas)', None),
+    'turismo_cupos_liberados_total': ('counter', 'Cupos devueltos al cancelar o eliminar reservas', None),
+    'turismo_db_pool_conexiones': ('gauge', 'Conexiones del pool por estado', None),
+}
+
+
+def _etiquetas(etiquetas):
+    return tuple(sorted(etiquetas.items()))
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formato_etiquetas(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in pares) + '}'
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) and not valor.is_integer() else str(int(valor))
+
+
+ARCHIVO_TERMINADOS = 'terminados.json'
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # existe pero es de otro usuario
+    return True
+
+
+def _sumar(estados):
+    """Sumar contadores, histogramas y medidores de varios estados por (nombre, etiquetas)"""
+    contadores, histogramas, medidores = {}, {}, {}
+    for estado in estados:
+        for nombre, etiquetas, valor in estado['contadores']:
+            clave = (nombre, tuple(map(tuple, etiquetas)))
+            contadores[clave] = contadores.get(clave, 0) + valor
+        for nombre, etiquetas, buckets, suma, cantidad in estado['histogramas']:
+            clave = (nombre, tuple(map(tuple, etiquetas)))
+            actual = histogramas.setdefault(clave, [[0] * len(buckets), 0.0, 0])
+            actual[0] = [a + b for a, b in zip(actual[0], buckets)]
+            actual[1] += suma
+            actual[2] += cantidad
+        for nombre, etiquetas, valor in estado['medidores']:
+            clave = (nombre, tuple(map(tuple, etiquetas)))
+            medidores[clave] = medidores.get(clave, 0) + valor
+    return contadores, histogramas, medidores
+
+
+class RegistroMetricas:
+    """Contadores e histogramas de un proceso, con persistencia opcional en un directorio"""
+
+    def __init__(self, directorio=None, intervalo=1.0):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.pid = os.getpid()
+        self._contadores = {}
+        self._histogramas = {}
+        self._guardado = 0.0
+
+    def _verificar_proceso(self):
+        # Tras un fork (gunicorn --preload) el hijo no hereda las cuentas del padre
+        if os.getpid() != self.pid:
+            self._reiniciar()
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        with self._lock:
+            self._verificar_proceso()
+            clave = (nombre, _etiquetas(etiquetas))
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        buckets = METRICAS[nombre][2]
+        with self._lock:
+            self._verificar_proceso()
+            clave = (nombre, _etiquetas(etiquetas))
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = [[0] * (len(buckets) + 1), 0.0, 0]
+            posicion = next((i for i, limite in enumerate(buckets) if valor <= limite), len(buckets))
+            histograma[0][posicion] += 1
+            histograma[1] += valor
+            histograma[2] += 1
+
+    def estado(self, medidores=()):
+        """Copia serializable del registro (y de los medidores del proceso)"""
+        with self._lock:
+            self._verificar_proceso()
+            return {
+                'pid': self.pid,
+                'contadores': [[n, list(map(list, e)), v] for (n, e), v in self._contadores.items()],
+                'histogramas': [[n, list(map(list, e)), list(h[0]), h[1], h[2]]
+                                for (n, e), h in self._histogramas.items()],
+                'medidores': [[n, list(map(list, e)), v] for n, e, v in medidores],
+            }
+
+    def guardar(self, medidores=(), forzar=False):
+        """Escribir <pid>.json en el directorio (como mucho cada `intervalo` segundos)"""
+        if not self.directorio:
+            return
+        ahora = time.monotonic()
+        if not forzar and ahora - self._guardado < self.intervalo:
+            return
+        self._guardado = ahora
+        estado = self.estado(medidores)
+        os.makedirs(self.directorio, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        with os.fdopen(fd, 'w') as archivo:
+            json.dump(estado, archivo)
+        os.replace(temporal, os.path.join(self.directorio, f'{estado["pid"]}.json'))
+
+    @contextlib.contextmanager
+    def _bloqueo(self, exclusivo):
+        """Bloqueo entre procesos del directorio (compactar frente a leer)"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(os.path.join(self.directorio, '.lock'), 'a') as archivo:
+            fcntl.flock(archivo, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(archivo, fcntl.LOCK_UN)
+
+    def _leer_archivos(self):
+        """(ruta, estado) de cada archivo del directorio"""
+        leidos = []
+        for ruta in glob.glob(os.path.join(self.directorio, '*.json')):
+            try:
+                with open(ruta) as archivo:
+                    leidos.append((ruta, json.load(archivo)))
+            except (OSError, ValueError):
+                continue  # archivo de un proceso a medio escribir o eliminado
+        return leidos
+
+    def compactar(self):
+        """
+        Fusionar los archivos de procesos terminados en terminados.json
+
+        Returns:
+            int: Cantidad de archivos fusionados y eliminados
+        """
+        if not self.directorio or fcntl is None:
+            return 0
+        with self._bloqueo(exclusivo=True):
+            terminados = {'pid': None, 'contadores': [], 'histogramas': [], 'medidores': []}
+            muertos = []
+            for ruta, estado in self._leer_archivos():
+                if estado['pid'] is None:
+                    terminados = estado
+                elif estado['pid'] != os.getpid() and not _proceso_vivo(estado['pid']):
+                    muertos.append((ruta, estado))
+            if not muertos:
+                return 0
+            contadores, histogramas, _ = _sumar([terminados] + [e for _, e in muertos])
+            terminados['contadores'] = [[n, list(map(list, e)), v] for (n, e), v in contadores.items()]
+            terminados['histogramas'] = [[n, list(map(list, e)), h[0], h[1], h[2]]
+                                         for (n, e), h in histogramas.items()]
+            fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+            with os.fdopen(fd, 'w') as archivo:
+                json.dump(terminados, archivo)
+            os.replace(temporal, os.path.join(self.directorio, ARCHIVO_TERMINADOS))
+            for ruta, _ in muertos:
+                os.remove(ruta)
+            return len(muertos)
+
+    def estados(self, medidores=()):
+        """Estado propio en memoria más los archivos de los demás procesos"""
+        propio = self.estado(medidores)
+        estados = [propio]
+        if not self.directorio:
+            return estados
+        with self._bloqueo(exclusivo=False):
+            leidos = self._leer_archivos()
+        for _, estado in leidos:
+            if estado['pid'] == propio['pid']:
+                continue
+            if estado['pid'] is None or not _proceso_vivo(estado['pid']):
+                estado['medidores'] = []
+            estados.append(estado)
+        return estados
+
+    def exponer(self, medidores=()):
+        """Texto de exposición de Prometheus sumando todos los procesos"""
+        contadores, histogramas, valores_medidores = _sumar(self.estados(medidores))
+
+        lineas = []
+        for nombre, (tipo, ayuda, buckets) in METRICAS.items():
+            lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+            if tipo == 'histogram':
+                for (n, etiquetas), (cuentas, suma, cantidad) in sorted(histogramas.items()):
+                    if n != nombre:
+                        continue
+                    acumulado = 0
+                    for limite, cuenta in zip(buckets + (float('inf'),), cuentas):
+                        acumulado += cuenta
+                        lineas.append(f'{nombre}_bucket{_formato_etiquetas(etiquetas, [("le", _numero(limite))])} '
+                                      f'{acumulado}')
+                    lineas.append(f'{nombre}_sum{_formato_etiquetas(etiquetas)} {_numero(suma)}')
+                    lineas.append(f'{nombre}_count{_formato_etiquetas(etiquetas)} {cantidad}')
+            else:
+                valores = contadores if tipo == 'counter' else valores_medidores
+                for etiquetas, valor in sorted((e, v) for (n, e), v in valores.items() if n == nombre):
+                    lineas.append(f'{nombre}{_formato_etiquetas(etiquetas)} {_numero(valor)}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _medidores_pool():
+    """Conexiones del pool de este proceso (si el pool las informa)"""
+    pool = db.engine.pool
+    medidores = []
+    for estado, metodo in (('en_uso', 'checkedout'), ('libres', 'checkedin'),
+                           ('tamano', 'size'), ('desborde', 'overflow')):
+        if hasattr(pool, metodo):
+            medidores.append(('turismo_db_pool_conexiones', (('estado', estado),), getattr(pool, metodo)()))
+    return medidores
+
+
+def _iniciar_peticion():
+    g.inicio_metricas = time.perf_counter()
+
+
+def _registrar_peticion(respuesta):
+    registro = current_app.extensions['metricas']
+    inicio = g.get('inicio_metricas')
+    if inicio is None:
+        return respuesta
+    endpoint = request.endpoint or 'sin_endpoint'
+    registro.observar('turismo_http_duracion_segundos', time.perf_counter() - inicio,
+                      endpoint=endpoint, metodo=request.method, estado=str(respuesta.status_code))
+    consultas = g.get('consultas_sql')
+    if consultas is not None:
+        registro.observar('turismo_http_sql_segundos', consultas.segundos, endpoint=endpoint)
+        registro.incrementar('turismo_http_sql_consultas_total', consultas.cantidad, endpoint=endpoint)
+    if registro.directorio:
+        registro.guardar(_medidores_pool())
+    return respuesta
+
+
+def _vista_metricas():
+    token = current_app.config.get('METRICAS_TOKEN')
+    if not token and not current_app.config.get('METRICAS_PUBLICAS', False):
+        abort(404)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(403)
+    registro = current_app.extensions['metricas']
+    registro.compactar()
+    return Response(registro.exponer(_medidores_pool()), mimetype='text/plain; version=0.0.4')
+
+
+@reservas_modificadas.connect
+def _registrar_reservas(app, movimientos):
+    registro = app.extensions.get('metricas')
+    if registro is None:
+        return
+    # Un alta solo trae movimientos positivos; un cambio de estado trae un par -1/+1
+    # y una eliminación un -1
+    if all(signo > 0 for _, _, _, signo, _ in movimientos):
+        registro.incrementar('turismo_reservas_creadas_total', len(movimientos))
+    for _, estado, pasajeros, signo, _ in movimientos:
+        if signo > 0 and estado == 'cancelada':
+            registro.incrementar('turismo_reservas_canceladas_total')
+        elif signo > 0 and estado == 'confirmada':
+            registro.incrementar('turismo_cupos_vendidos_total', pasajeros)
+        elif signo < 0 and estado == 'confirmada':
+            registro.incrementar('turismo_cupos_liberados_total', pasajeros)
+
+
+def init_metricas(app):
+    """
+    Registrar las métricas y la ruta /metrics (METRICAS_ACTIVAS, por defecto sí)
+
+    Debe llamarse después de init_instrumentacion (usa g.consultas_sql) y
+    antes que las demás extensiones con after_request, para que la latencia
+    incluya su trabajo (p. ej. la compresión).
+    """
+    if not app.config.get('METRICAS_ACTIVAS', True):
+        return
+    registro = RegistroMetricas(app.config.get('METRICAS_DIR'), app.config.get('METRICAS_INTERVALO', 1.0))
+    # Los contadores de reservas se exponen desde 0 aunque aún no haya movimientos
+    for nombre in ('turismo_reservas_creadas_total', 'turismo_reservas_canceladas_total',
+                   'turismo_cupos_vendidos_total', 'turismo_cupos_liberados_total'):
+        registro.incrementar(nombre, 0)
+    app.extensions['metricas'] = registro
+    app.before_request(_iniciar_peticion)
+    app.after_request(_registrar_peticion)
+    app.add_url_rule('/metrics', 'metricas', _vista_metricas)
+    if registro.directorio:
+        registro.compactar()
+        atexit.register(registro.guardar, forzar=True)
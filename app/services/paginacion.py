@@ -0,0 +1,187 @@
+"""
+Paginación por cursor (keyset) para los endpoints de listas
+En vez de OFFSET, cada página continúa después de la última fila de la
+anterior (WHERE (orden) > (cursor) ... LIMIT n), por lo que el costo de una
+página no depende de cuántas filas haya antes.
+
+Las respuestas siguen siendo un arreglo JSON; la página siguiente se indica
+en la cabecera Link (rel="next") y el total estimado, si se pide con
+total=true, en X-Total-Estimado.
+"""
+import base64
+import json
+from datetime import date, datetime
+from flask import current_app, request, jsonify, url_for
+from sqlalchemy import and_, or_, func, text, Date, DateTime
+from app import db
+
+
+def _a_json(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f'Valor no serializable en el cursor: {valor!r}')
+
+
+def codificar_cursor(valores):
+    """Cursor opaco (base64 url-safe) con los valores de orden de la última fila"""
+    crudo = json.dumps(list(valores), separators=(',', ':'), default=_a_json).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).rstrip(b'=').decode('ascii')
+
+
+def decodificar_cursor(cursor):
+    """
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(crudo)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
+    if not isinstance(valores, list):
+        raise ValueError('Cursor inválido')
+    return valores
+
+
+def leer_pagina(limite_defecto=None):
+    """
+    Leer `limit` y `after` de la petición
+
+    Args:
+        limite_defecto: tamaño de página si no se indica `limit`; con None la
+            paginación solo se aplica cuando la petición la pide
+
+    Returns:
+        tuple (limite, valores del cursor o None) o None si no se pagina
+
+    Raises:
+        ValueError: Si limit o after son inválidos
+    """
+    limite = request.args.get('limit')
+    despues = request.args.get('after')
+    if limite is None and despues is None and limite_defecto is None:
+        return None
+
+    if limite is None:
+        limite = limite_defecto or current_app.config.get('PAGINACION_LIMITE', 50)
+    else:
+        try:
+            limite = int(limite)
+        except ValueError:
+            raise ValueError('limit debe ser un número entero')
+        if limite < 1:
+            raise ValueError('limit debe ser mayor que 0')
+    limite = min(limite, current_app.config.get('PAGINACION_LIMITE_MAX', 500))
+    return limite, decodificar_cursor(despues) if despues else None
+
+
+def _valor_cursor(expresion, valor):
+    """Volver a datetime/date los valores que el cursor guardó como texto"""
+    if isinstance(valor, str):
+        try:
+            if isinstance(expresion.type, DateTime):
+                return datetime.fromisoformat(valor)
+            if isinstance(expresion.type, Date):
+                return date.fromisoformat(valor)
+        except ValueError:
+            raise ValueError('Cursor inválido')
+    return valor
+
+
+def _despues_de(orden, valores):
+    """(a, b) > (va, vb) respetando el sentido de cada columna, sin comparar tuplas"""
+    condiciones = []
+    for i, (expresion, descendente) in enumerate(orden):
+        iguales = [orden[j][0] == valores[j] for j in range(i)]
+        siguiente = expresion < valores[i] if descendente else expresion > valores[i]
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
+
+
+def paginar(query, orden, limite, despues=None):
+    """
+    Obtener una página de una consulta ORM
+
+    Args:
+        query: Query de una entidad
+        orden: lista de (expresión, descendente); la última debe ser única (el id)
+        limite: int - filas por página
+        despues: valores del cursor recibido o None para la primera página
+
+    Returns:
+        tuple (list de entidades, cursor de la página siguiente o None)
+
+    Raises:
+        ValueError: Si el cursor no corresponde a este orden
+    """
+    if despues is not None:
+        if len(despues) != len(orden):
+            raise ValueError('Cursor inválido')
+        despues = [_valor_cursor(expresion, valor) for (expresion, _), valor in zip(orden, despues)]
+        query = query.filter(_despues_de(orden, despues))
+
+    expresiones = [expresion for expresion, _ in orden]
+    query = query.order_by(None).order_by(
+        *(e.desc() if descendente else e.asc() for e, descendente in orden)
+    )
+    filas = query.add_columns(*expresiones).limit(limite + 1).all()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1][1:])
+    return [fila[0] for fila in filas], siguiente
+
+
+def total_estimado(query, tabla=None):
+    """
+    Total aproximado de filas de la consulta
+
+    Con `tabla` (consulta sin filtros) se usan las estadísticas del motor en
+    MySQL y PostgreSQL. En otro caso se cuenta hasta PAGINACION_TOTAL_MAX, así
+    el costo queda acotado; un resultado igual al tope significa "al menos".
+    """
+    dialecto = db.engine.dialect.name
+    total = None
+    if tabla and dialecto in ('mysql', 'mariadb'):
+        total = db.session.execute(text(
+            'SELECT TABLE_ROWS FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabla'
+        ), {'tabla': tabla}).scalar()
+    elif tabla and dialecto == 'postgresql':
+        total = db.session.execute(text(
+            'SELECT reltuples::bigint FROM pg_class WHERE relname = :tabla'
+        ), {'tabla': tabla}).scalar()
+        if total is not None and total < 0:
+            total = None
+    if total is None:
+        tope = current_app.config.get('PAGINACION_TOTAL_MAX', 10000)
+        total = db.session.query(func.count()).select_from(
+            query.order_by(None).limit(tope).subquery()
+        ).scalar()
+    return int(total)
+
+
+def respuesta_pagina(elementos, limite, siguiente, total=None):
+    """
+    Respuesta JSON de una página con las cabeceras de paginación
+
+    Args:
+        elementos: list de dicts ya serializados
+        limite: int - tamaño de página usado
+        siguiente: cursor de la página siguiente o None
+        total: total estimado o None si no se pidió
+    """
+    respuesta = jsonify(elementos)
+    if siguiente:
+        argumentos = request.args.to_dict(flat=False)
+        argumentos.update(after=siguiente, limit=limite)
+        url = url_for(request.endpoint, **(request.view_args or {}), **argumentos)
+        respuesta.headers['Link'] = f'<{url}>; rel="next"'
+    if total is not None:
+        respuesta.headers['X-Total-Estimado'] = str(total)
+    return respuesta
+
+
+def pedir_total():
+    return request.args.get('total', '').lower() == 'true'
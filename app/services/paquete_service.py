@@ -5,6 +5,8 @@ Contiene la lógica de negocio para crear, editar y eliminar paquetes
 from app import db
 from app.models.paquete import Paquete, PaqueteDestino
 from app.models.destino import Destino
+from app.services.eventos import notificar_catalogo
+from app.services.estadisticas import EstadisticasService
 from datetime import date
 
 
@@ -47,6 +49,7 @@ class PaqueteService:
         )
         db.session.add(paquete)
         db.session.flush()
+        EstadisticasService.paquete_creado(paquete)
         
         # Agregar destinos
         destinos_ids = datos.get('destinos', [])
@@ -59,6 +62,7 @@ class PaqueteService:
                 ))
         
         db.session.commit()
+        notificar_catalogo(paquetes=[paquete.id])
         return paquete
     
     @staticmethod
@@ -83,6 +87,8 @@ class PaqueteService:
             if datos['fecha_fin'] < datos['fecha_inicio']:
                 raise ValueError('La fecha fin debe ser posterior a la fecha inicio')
         
+        precio_anterior = paquete.precio_total
+        
         # Actualizar campos
         if 'nombre' in datos:
             paquete.nombre = datos['nombre']
@@ -110,7 +116,13 @@ class PaqueteService:
                         destino_id=destino_id
                     ))
         
+        if 'precio_total' in datos:
+            EstadisticasService.precio_cambiado(paquete_id, precio_anterior, datos['precio_total'])
+        if 'disponibles' in datos:
+            EstadisticasService.sincronizar_agotados([paquete_id])
+        
         db.session.commit()
+        notificar_catalogo(paquetes=[paquete_id])
         return paquete
     
     @staticmethod
@@ -143,6 +155,8 @@ class PaqueteService:
                 f'Debes cancelar todas las reservas antes de eliminar el paquete.'
             )
         
+        EstadisticasService.paquete_eliminado(paquete_id)
+        
         # Obtener todas las reservas asociadas al paquete (solo canceladas si las hay)
         reservas = Reserva.query.filter_by(paquete_id=paquete_id).all()
         
@@ -158,5 +172,6 @@ class PaqueteService:
         # Finalmente eliminar el paquete
         db.session.delete(paquete)
         db.session.commit()
+        notificar_catalogo(paquetes=[paquete_id])
         return nombre
 
@@ -0,0 +1,141 @@
+"""
+Perfilado bajo demanda de peticiones (cProfile y, opcionalmente, tracemalloc)
+Desactivado salvo con PERFILADO_ACTIVO. Un administrador pide perfilar una
+petición con la cabecera `X-Perfilar: cpu` (o `memoria` para sumar
+tracemalloc) o activa el perfilado de todas sus peticiones desde
+POST /admin/api/perfilado. Los últimos PERFILADO_MAX perfiles quedan en un
+buffer circular en memoria del proceso y se descargan como archivos pstats
+(`python -m pstats perfil.pstats`, snakeviz, etc.).
+
+cProfile y tracemalloc son globales al intérprete: se perfila una petición a
+la vez por proceso y las demás siguen sin perfilar.
+"""
+import cProfile
+import marshal
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from flask import current_app, g, request, session
+from app import db
+from app.models.usuario import Usuario
+
+MODOS = ('cpu', 'memoria')
+LINEAS_MEMORIA = 15
+
+_en_uso = threading.Lock()
+
+
+class BufferPerfiles:
+    """Últimos N perfiles del proceso (los más antiguos se descartan)"""
+
+    def __init__(self, maximo):
+        self._perfiles = deque(maxlen=maximo)
+        self._lock = threading.Lock()
+        self._siguiente = 1
+
+    def agregar(self, perfil):
+        with self._lock:
+            perfil['id'] = self._siguiente
+            self._siguiente += 1
+            self._perfiles.append(perfil)
+            return perfil['id']
+
+    def listar(self):
+        """Metadatos de los perfiles, del más reciente al más antiguo (sin los pstats)"""
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != 'pstats'} for p in reversed(self._perfiles)]
+
+    def obtener(self, perfil_id):
+        with self._lock:
+            return next((p for p in self._perfiles if p['id'] == perfil_id), None)
+
+
+def _modo_solicitado():
+    """'cpu', 'memoria' o None según la cabecera o la preferencia guardada en la sesión"""
+    modo = request.headers.get('X-Perfilar', '').strip().lower() or session.get('perfilar')
+    if modo not in MODOS or 'usuario_id' not in session:
+        return None
+    # El rol se verifica en la base de datos, como en admin_required
+    usuario = db.session.get(Usuario, session['usuario_id'])
+    return modo if usuario and usuario.rol == 'admin' else None
+
+
+def _iniciar_perfil():
+    if request.path.startswith('/admin/api/perfil'):
+        return
+    modo = _modo_solicitado()
+    if modo is None or not _en_uso.acquire(blocking=False):
+        return
+    # Si tracemalloc ya estaba activo (PYTHONTRACEMALLOC) no se detiene al terminar
+    propio = modo == 'memoria' and not tracemalloc.is_tracing()
+    if propio:
+        tracemalloc.start()
+    elif modo == 'memoria':
+        tracemalloc.reset_peak()
+    perfilador = cProfile.Profile()
+    g.perfil = (perfilador, modo, propio, time.perf_counter())
+    perfilador.enable()
+
+
+def _detener_perfil():
+    """Detener el perfilado en curso y liberar el candado; devuelve (perfilador, modo, segundos, memoria)"""
+    perfilador, modo, propio, inicio = g.pop('perfil')
+    try:
+        perfilador.disable()
+        segundos = time.perf_counter() - inicio
+        memoria = None
+        if modo == 'memoria':
+            _, pico = tracemalloc.get_traced_memory()
+            estadisticas = tracemalloc.take_snapshot().statistics('lineno')[:LINEAS_MEMORIA]
+            if propio:
+                tracemalloc.stop()
+            memoria = {
+                'pico_kb': round(pico / 1024, 1),
+                'lineas': [
+                    {'linea': f'{e.traceback[0].filename}:{e.traceback[0].lineno}',
+                     'kb': round(e.size / 1024, 1), 'bloques': e.count}
+                    for e in estadisticas
+                ],
+            }
+        return perfilador, modo, segundos, memoria
+    finally:
+        _en_uso.release()
+
+
+def _guardar_perfil(respuesta):
+    if 'perfil' not in g:
+        return respuesta
+    perfilador, modo, segundos, memoria = _detener_perfil()
+    perfilador.create_stats()
+    perfil_id = current_app.extensions['perfiles'].agregar({
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'metodo': request.method,
+        'ruta': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'estado': respuesta.status_code,
+        'modo': modo,
+        'duracion_ms': round(segundos * 1000, 2),
+        'memoria': memoria,
+        # Mismo formato que pstats.Stats.dump_stats
+        'pstats': marshal.dumps(perfilador.stats),
+    })
+    respuesta.headers['X-Perfil-Id'] = str(perfil_id)
+    return respuesta
+
+
+def _liberar_perfil(error=None):
+    # Si la petición terminó sin pasar por after_request, no dejar el perfilador activo
+    if 'perfil' in g:
+        _detener_perfil()
+
+
+def init_perfilado(app):
+    """Registrar el perfilado bajo demanda (PERFILADO_ACTIVO, por defecto no)"""
+    if not app.config.get('PERFILADO_ACTIVO', False):
+        return
+    app.extensions['perfiles'] = BufferPerfiles(app.config.get('PERFILADO_MAX', 20))
+    app.before_request(_iniciar_perfil)
+    app.after_request(_guardar_perfil)
+    app.teardown_request(_liberar_perfil)
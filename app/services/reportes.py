@@ -0,0 +1,187 @@
+"""
+Reportes de operación vectorizados con NumPy
+Ocupación e ingresos por paquete y tasa de cancelación según la anticipación
+de la reserva. Las reservas se leen como columnas (sin instancias ORM) en
+lotes de REPORTES_LOTE filas por id; cada lote se convierte a arreglos y se
+acumula con np.bincount, así la memoria no depende del tamaño del historial.
+
+numpy es opcional: solo lo necesitan estos reportes.
+"""
+import json
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, case, func
+from app import db
+from app.models.paquete import Paquete
+from app.models.reserva import Reserva
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional
+    np = None
+
+# Límites superiores (días entre la reserva y la salida) de los tramos; el último es abierto
+TRAMOS_ANTICIPACION = (7, 30, 90, 180)
+
+
+def _etiquetas_tramos():
+    etiquetas, desde = [], 0
+    for hasta in TRAMOS_ANTICIPACION:
+        etiquetas.append(f'{desde}-{hasta}')
+        desde = hasta + 1
+    return etiquetas + [f'{desde}+']
+
+
+def _dividir(numerador, denominador):
+    """Cociente elemento a elemento con 0 donde el denominador es 0"""
+    return np.divide(numerador, denominador, out=np.zeros(len(numerador)), where=denominador > 0)
+
+
+class ReportesService:
+    """Reportes de operación sobre todo el historial de reservas"""
+
+    @staticmethod
+    def operaciones(lote=None):
+        """
+        Calcular el reporte de operación
+
+        Por paquete: capacidad (cupos vendidos + disponibles), ocupación,
+        reservas confirmadas/canceladas, tasa de cancelación, ingresos (suma de
+        precio_total de las confirmadas, como el dashboard) e ingreso por cupo.
+        Por tramo de anticipación (días entre fecha_reserva y fecha_inicio del
+        paquete): reservas, canceladas y tasa de cancelación.
+
+        Args:
+            lote: int (opcional) - Reservas leídas por lote (REPORTES_LOTE)
+
+        Returns:
+            dict: {'paquetes': list[dict], 'cancelacion_por_anticipacion': list[dict]}
+
+        Raises:
+            RuntimeError: Si numpy no está instalado
+        """
+        if np is None:
+            raise RuntimeError('Los reportes de operación requieren numpy (pip install numpy)')
+        lote = lote or current_app.config.get('REPORTES_LOTE', 100000)
+
+        paquetes = db.session.execute(
+            select(Paquete.id, Paquete.nombre, Paquete.precio_total, Paquete.disponibles, Paquete.fecha_inicio)
+            .order_by(Paquete.id)
+        ).all()
+        columnas = list(zip(*paquetes)) or [()] * 5
+        ids = np.array(columnas[0], dtype=np.int64)
+        precios = np.array([float(p) for p in columnas[2]], dtype=np.float64)
+        disponibles = np.array(columnas[3], dtype=np.int64)
+        salidas = np.array(columnas[4], dtype='datetime64[D]')
+        cantidad = len(ids)
+        tramos = np.array(TRAMOS_ANTICIPACION, dtype=np.int64)
+        cantidad_tramos = len(tramos) + 1
+
+        confirmadas = np.zeros(cantidad, dtype=np.int64)
+        canceladas = np.zeros(cantidad, dtype=np.int64)
+        vendidos = np.zeros(cantidad, dtype=np.int64)
+        reservas_tramo = np.zeros(cantidad_tramos, dtype=np.int64)
+        canceladas_tramo = np.zeros(cantidad_tramos, dtype=np.int64)
+
+        # El estado llega como código y la fecha como 'YYYY-MM-DD' (o date): NumPy
+        # los convierte en bloque sin crear objetos datetime por fila
+        estado = case((Reserva.estado == 'confirmada', 1), (Reserva.estado == 'cancelada', 2), else_=0)
+        # Core sobre la conexión: sin el procesamiento de filas del ORM
+        conexion = db.session.connection()
+        ultimo_id = 0
+        while cantidad:
+            filas = conexion.execute(
+                select(Reserva.id, Reserva.paquete_id, estado, Reserva.numero_pasajeros,
+                       func.date(Reserva.fecha_reserva))
+                .where(Reserva.id > ultimo_id)
+                .order_by(Reserva.id)
+                .limit(lote)
+            ).all()
+            if not filas:
+                break
+            ultimo_id = filas[-1][0]
+            _, paquete_ids, estados, pasajeros, fechas = zip(*filas)
+
+            # Posición de cada reserva en los arreglos de paquetes (ids ordenados)
+            paquete_ids = np.array(paquete_ids, dtype=np.int64)
+            posicion = np.minimum(np.searchsorted(ids, paquete_ids), cantidad - 1)
+            valida = ids[posicion] == paquete_ids  # paquetes creados durante el reporte
+            estados = np.array(estados, dtype=np.int8)
+            es_confirmada = valida & (estados == 1)
+            es_cancelada = valida & (estados == 2)
+            pasajeros = np.array(pasajeros, dtype=np.int64)
+
+            confirmadas += np.bincount(posicion[es_confirmada], minlength=cantidad)
+            canceladas += np.bincount(posicion[es_cancelada], minlength=cantidad)
+            vendidos += np.bincount(posicion[es_confirmada], weights=pasajeros[es_confirmada],
+                                    minlength=cantidad).astype(np.int64)
+
+            fechas = np.array(fechas, dtype='datetime64[D]')
+            con_fecha = valida & ~np.isnat(fechas)
+            anticipacion = (salidas[posicion] - fechas)[con_fecha].astype(np.int64)
+            tramo = np.searchsorted(tramos, anticipacion, side='left')
+            reservas_tramo += np.bincount(tramo, minlength=cantidad_tramos)
+            canceladas_tramo += np.bincount(tramo[es_cancelada[con_fecha]], minlength=cantidad_tramos)
+
+        capacidad = vendidos + disponibles
+        ingresos = confirmadas * precios
+        ocupacion = _dividir(vendidos, capacidad)
+        tasa_cancelacion = _dividir(canceladas, confirmadas + canceladas)
+        ingreso_por_cupo = _dividir(ingresos, capacidad)
+
+        reporte_paquetes = [
+            {
+                'id': int(ids[i]),
+                'nombre': columnas[1][i],
+                'capacidad': int(capacidad[i]),
+                'vendidos': int(vendidos[i]),
+                'ocupacion': round(float(ocupacion[i]), 4),
+                'reservas_confirmadas': int(confirmadas[i]),
+                'reservas_canceladas': int(canceladas[i]),
+                'tasa_cancelacion': round(float(tasa_cancelacion[i]), 4),
+                'ingresos': round(float(ingresos[i]), 2),
+                'ingreso_por_cupo': round(float(ingreso_por_cupo[i]), 2),
+            }
+            for i in range(cantidad)
+        ]
+        tasa_tramo = _dividir(canceladas_tramo, reservas_tramo)
+        reporte_tramos = [
+            {
+                'dias_anticipacion': etiqueta,
+                'reservas': int(reservas_tramo[i]),
+                'canceladas': int(canceladas_tramo[i]),
+                'tasa_cancelacion': round(float(tasa_tramo[i]), 4),
+            }
+            for i, etiqueta in enumerate(_etiquetas_tramos())
+        ]
+        return {'paquetes': reporte_paquetes, 'cancelacion_por_anticipacion': reporte_tramos}
+
+
+def init_reportes(app):
+    """Registrar el comando del reporte de operación"""
+    app.cli.add_command(_comando_reporte)
+
+
+@click.command('reporte-operaciones')
+@click.option('--lote', type=int, default=None, help='Reservas leídas por lote')
+@click.option('--json', 'como_json', is_flag=True, help='Imprimir el reporte completo en JSON')
+@with_appcontext
+def _comando_reporte(lote, como_json):
+    """Reporte de ocupación, ingresos y cancelaciones"""
+    try:
+        reporte = ReportesService.operaciones(lote)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    if como_json:
+        click.echo(json.dumps(reporte, ensure_ascii=False, indent=2))
+        return
+    click.echo(f'{"Paquete":<40} {"Ocupación":>10} {"Cancel.":>8} {"Ingresos":>14} {"Por cupo":>12}')
+    for p in sorted(reporte['paquetes'], key=lambda p: p['ocupacion'], reverse=True):
+        click.echo(f'{p["nombre"][:40]:<40} {p["ocupacion"]:>10.1%} {p["tasa_cancelacion"]:>8.1%} '
+                   f'{p["ingresos"]:>14,.0f} {p["ingreso_por_cupo"]:>12,.0f}')
+    click.echo('')
+    click.echo(f'{"Anticipación (días)":<20} {"Reservas":>10} {"Canceladas":>11} {"Tasa":>8}')
+    for t in reporte['cancelacion_por_anticipacion']:
+        click.echo(f'{t["dias_anticipacion"]:<20} {t["reservas"]:>10} {t["canceladas"]:>11} '
+                   f'{t["tasa_cancelacion"]:>8.1%}')
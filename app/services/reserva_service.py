@@ -6,12 +6,174 @@ from app import db
 from app.models.reserva import Reserva
 from app.models.paquete import Paquete
 from app.models.viajero import Viajero
+from app.services.eventos import notificar_catalogo, notificar_reservas
+from app.services.estadisticas import EstadisticasService
+from sqlalchemy import update, insert, case
 from datetime import datetime
 
 
 class ReservaService:
     """Servicio para operaciones con reservas"""
     
+    @staticmethod
+    def _descontar_cupos(paquete_id, cantidad):
+        """
+        Descontar cupos de un paquete de forma atómica
+        
+        Usa un único UPDATE condicional (disponibles >= cantidad), por lo que
+        dos transacciones concurrentes nunca pueden vender el mismo cupo.
+        La base de datos bloquea la fila mientras dura la transacción.
+        
+        Args:
+            paquete_id: int - ID del paquete
+            cantidad: int - Cupos a descontar
+        
+        Raises:
+            ValueError: Si no hay cupos suficientes
+        """
+        resultado = db.session.execute(
+            update(Paquete)
+            .where(Paquete.id == paquete_id, Paquete.disponibles >= cantidad)
+            .values(disponibles=Paquete.disponibles - cantidad)
+            .execution_options(synchronize_session=False)
+        )
+        
+        if resultado.rowcount == 0:
+            # Solo en el caso de fallo se consulta el paquete (404 si no existe)
+            paquete = Paquete.query.get_or_404(paquete_id)
+            raise ValueError(
+                f'No hay suficientes cupos disponibles. '
+                f'Disponibles: {paquete.disponibles}, Solicitados: {cantidad}'
+            )
+    
+    @staticmethod
+    def _devolver_cupos(paquete_id, cantidad):
+        """
+        Devolver cupos a un paquete de forma atómica
+        
+        Args:
+            paquete_id: int - ID del paquete
+            cantidad: int - Cupos a devolver
+        """
+        db.session.execute(
+            update(Paquete)
+            .where(Paquete.id == paquete_id)
+            .values(disponibles=Paquete.disponibles + cantidad)
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    def _descontar_cupos_lote(cupos_por_paquete):
+        """
+        Descontar cupos de varios paquetes con un único UPDATE condicional
+        
+        La sentencia solo modifica filas con cupos suficientes, de modo que si
+        el número de filas afectadas no coincide con el de paquetes pedidos,
+        al menos uno está agotado. El UPDATE corre en un savepoint que se
+        deshace en ese caso; la transacción sigue abierta y, como en
+        _descontar_cupos, deshacerla le corresponde a quien llama.
+        
+        Args:
+            cupos_por_paquete: dict {paquete_id: cantidad}
+        
+        Raises:
+            ValueError: Si algún paquete no existe o no tiene cupos suficientes
+        """
+        cantidad = case(cupos_por_paquete, value=Paquete.id)
+        savepoint = db.session.begin_nested()
+        resultado = db.session.execute(
+            update(Paquete)
+            .where(Paquete.id.in_(cupos_por_paquete), Paquete.disponibles >= cantidad)
+            .values(disponibles=Paquete.disponibles - cantidad)
+            .execution_options(synchronize_session=False)
+        )
+        
+        if resultado.rowcount == len(cupos_por_paquete):
+            savepoint.commit()
+        else:
+            # Deshacer los paquetes que sí se descontaron para informar los cupos reales
+            savepoint.rollback()
+            paquetes = {
+                p.id: p for p in Paquete.query.filter(Paquete.id.in_(cupos_por_paquete))
+            }
+            for paquete_id, solicitados in cupos_por_paquete.items():
+                paquete = paquetes.get(paquete_id)
+                if not paquete:
+                    raise ValueError(f'Paquete {paquete_id} no encontrado')
+                if paquete.disponibles < solicitados:
+                    raise ValueError(
+                        f'No hay suficientes cupos disponibles en "{paquete.nombre}". '
+                        f'Disponibles: {paquete.disponibles}, Solicitados: {solicitados}'
+                    )
+            raise ValueError('No hay suficientes cupos disponibles')
+    
+    @staticmethod
+    def _entero(valor, campo):
+        """
+        Validar un entero enviado por el cliente (JSON)
+        
+        Raises:
+            ValueError: Si no es un entero (los booleanos no cuentan)
+        """
+        if not isinstance(valor, int) or isinstance(valor, bool):
+            raise ValueError(f'{campo} debe ser un número entero')
+        return valor
+    
+    @staticmethod
+    def _movimiento(reserva, signo, estado=None):
+        """
+        Movimiento de una reserva para estadísticas y eventos
+        
+        Args:
+            reserva: Reserva - ya con fecha_reserva (después del flush)
+            signo: int - 1 si la reserva se suma en ese estado, -1 si se resta
+            estado: str (opcional) - Estado a registrar; por defecto el actual
+        
+        Returns:
+            tuple: (paquete_id, estado, numero_pasajeros, signo, fecha_reserva)
+        """
+        return (reserva.paquete_id, estado or reserva.estado, reserva.numero_pasajeros,
+                signo, reserva.fecha_reserva)
+    
+    @staticmethod
+    def _datos_viajero(viajero_data):
+        """
+        Validar y normalizar los datos de un viajero
+        
+        Args:
+            viajero_data: dict con los datos enviados por el cliente
+        
+        Returns:
+            dict: Columnas del viajero (sin reserva_id)
+        
+        Raises:
+            ValueError: Si no es un objeto o falta el teléfono (obligatorio)
+        """
+        if not isinstance(viajero_data, dict):
+            raise ValueError('Cada viajero debe ser un objeto')
+        fecha_nacimiento = None
+        if viajero_data.get('fecha_nacimiento'):
+            try:
+                fecha_nacimiento = datetime.strptime(
+                    viajero_data['fecha_nacimiento'], 
+                    '%Y-%m-%d'
+                ).date()
+            except (ValueError, TypeError):
+                pass
+        
+        # Validar que el teléfono esté presente (obligatorio)
+        telefono = (viajero_data.get('telefono') or '').strip()
+        if not telefono:
+            raise ValueError('El teléfono del viajero es obligatorio')
+        
+        return {
+            'nombre_completo': viajero_data.get('nombre_completo', ''),
+            'rut': viajero_data.get('rut', ''),
+            'fecha_nacimiento': fecha_nacimiento,
+            'telefono': telefono,
+            'email': viajero_data.get('email')
+        }
+    
     @staticmethod
     def crear_reserva(usuario_id, datos):
         """
@@ -33,17 +195,13 @@ class ReservaService:
         Raises:
             ValueError: Si los datos son inválidos o no hay cupos disponibles
         """
-        paquete = Paquete.query.get_or_404(datos['paquete_id'])
-        numero_pasajeros = datos.get('numero_pasajeros', 1)
+        numero_pasajeros = ReservaService._entero(datos.get('numero_pasajeros', 1), 'numero_pasajeros')
         
         if numero_pasajeros < 1:
             raise ValueError('El número de pasajeros debe ser al menos 1')
         
-        if paquete.disponibles < numero_pasajeros:
-            raise ValueError(
-                f'No hay suficientes cupos disponibles. '
-                f'Disponibles: {paquete.disponibles}, Solicitados: {numero_pasajeros}'
-            )
+        # Reducir cupos disponibles (UPDATE condicional, sin leer antes el paquete)
+        ReservaService._descontar_cupos(datos['paquete_id'], numero_pasajeros)
         
         # Crear reserva
         reserva = Reserva(
@@ -55,44 +213,106 @@ class ReservaService:
             comentarios=datos.get('comentarios')
         )
         
-        # Reducir cupos disponibles
-        paquete.disponibles -= numero_pasajeros
-        
         db.session.add(reserva)
         db.session.flush()  # Para obtener el ID de la reserva
         
         # Guardar datos de viajeros si se proporcionan
-        viajeros_data = datos.get('viajeros', [])
-        if viajeros_data:
-            for viajero_data in viajeros_data:
-                fecha_nacimiento = None
-                if viajero_data.get('fecha_nacimiento'):
-                    try:
-                        fecha_nacimiento = datetime.strptime(
-                            viajero_data['fecha_nacimiento'], 
-                            '%Y-%m-%d'
-                        ).date()
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Validar que el teléfono esté presente (obligatorio)
-                telefono = viajero_data.get('telefono', '').strip()
-                if not telefono:
-                    raise ValueError('El teléfono del viajero es obligatorio')
-                
-                viajero = Viajero(
-                    reserva_id=reserva.id,
-                    nombre_completo=viajero_data.get('nombre_completo', ''),
-                    rut=viajero_data.get('rut', ''),
-                    fecha_nacimiento=fecha_nacimiento,
-                    telefono=telefono,
-                    email=viajero_data.get('email')
-                )
-                db.session.add(viajero)
+        for viajero_data in datos.get('viajeros', []):
+            db.session.add(Viajero(
+                reserva_id=reserva.id,
+                **ReservaService._datos_viajero(viajero_data)
+            ))
         
+        movimientos = [ReservaService._movimiento(reserva, 1)]
+        EstadisticasService.registrar_reservas(movimientos)
+        EstadisticasService.sincronizar_agotados([reserva.paquete_id])
         db.session.commit()
+        # Los cupos del paquete cambiaron
+        notificar_catalogo(paquetes=[reserva.paquete_id], solo_cupos=True)
+        notificar_reservas(movimientos)
         return reserva
     
+    @staticmethod
+    def crear_reservas_lote(usuario_id, lineas, telefono_contacto=None, comentarios=None):
+        """
+        Crear varias reservas (checkout del carrito) en una sola transacción
+        
+        Todas las líneas se validan antes de escribir; los cupos de todos los
+        paquetes se descuentan con un único UPDATE y los viajeros se insertan
+        en bloque. Si una línea falla no se guarda ninguna reserva.
+        
+        Args:
+            usuario_id: int - ID del usuario que hace las reservas
+            lineas: list[dict] con los datos de cada reserva:
+                - paquete_id: int
+                - numero_pasajeros: int
+                - viajeros: list[dict] (opcional) - Datos de los viajeros
+            telefono_contacto: str (opcional) - Teléfono común a todas las reservas
+            comentarios: str (opcional)
+        
+        Returns:
+            list[Reserva]: Las reservas creadas, en el orden de las líneas
+        
+        Raises:
+            ValueError: Si los datos son inválidos o algún paquete no tiene cupos
+        """
+        if not isinstance(lineas, list):
+            raise ValueError('reservas debe ser una lista')
+        if not lineas:
+            raise ValueError('Debes incluir al menos una reserva')
+        
+        # Validar todas las líneas antes de tocar la base de datos
+        cupos_por_paquete = {}
+        viajeros_por_linea = []
+        for linea in lineas:
+            if not isinstance(linea, dict):
+                raise ValueError('Cada reserva debe ser un objeto')
+            if not linea.get('paquete_id'):
+                raise ValueError('paquete_id requerido')
+            paquete_id = ReservaService._entero(linea['paquete_id'], 'paquete_id')
+            numero_pasajeros = ReservaService._entero(linea.get('numero_pasajeros', 1), 'numero_pasajeros')
+            if numero_pasajeros < 1:
+                raise ValueError('El número de pasajeros debe ser al menos 1')
+            if not isinstance(linea.get('viajeros', []), list):
+                raise ValueError('viajeros debe ser una lista')
+            
+            cupos_por_paquete[paquete_id] = cupos_por_paquete.get(paquete_id, 0) + numero_pasajeros
+            viajeros_por_linea.append(
+                [ReservaService._datos_viajero(v) for v in linea.get('viajeros', [])]
+            )
+        
+        ReservaService._descontar_cupos_lote(cupos_por_paquete)
+        
+        reservas = [
+            Reserva(
+                usuario_id=usuario_id,
+                paquete_id=linea['paquete_id'],
+                estado='confirmada',
+                numero_pasajeros=linea.get('numero_pasajeros', 1),
+                telefono_contacto=telefono_contacto,
+                comentarios=comentarios
+            )
+            for linea in lineas
+        ]
+        db.session.add_all(reservas)
+        db.session.flush()  # Un INSERT por lotes para obtener los IDs
+        
+        filas_viajeros = [
+            dict(viajero, reserva_id=reserva.id)
+            for reserva, viajeros in zip(reservas, viajeros_por_linea)
+            for viajero in viajeros
+        ]
+        if filas_viajeros:
+            db.session.execute(insert(Viajero), filas_viajeros)
+        
+        movimientos = [ReservaService._movimiento(reserva, 1) for reserva in reservas]
+        EstadisticasService.registrar_reservas(movimientos)
+        EstadisticasService.sincronizar_agotados(cupos_por_paquete)
+        db.session.commit()
+        notificar_catalogo(paquetes=cupos_por_paquete, solo_cupos=True)
+        notificar_reservas(movimientos)
+        return reservas
+    
     @staticmethod
     def actualizar_estado_reserva(reserva_id, nuevo_estado):
         """
@@ -116,14 +336,26 @@ class ReservaService:
         # Manejar cambios de estado que afectan cupos
         if estado_anterior == 'confirmada' and nuevo_estado == 'cancelada':
             # Devolver cupos al paquete
-            reserva.paquete.disponibles += reserva.numero_pasajeros
+            ReservaService._devolver_cupos(reserva.paquete_id, reserva.numero_pasajeros)
         elif estado_anterior == 'cancelada' and nuevo_estado == 'confirmada':
-            # Verificar que haya cupos disponibles
-            if reserva.paquete.disponibles < reserva.numero_pasajeros:
+            # Verificar y descontar cupos en una sola operación
+            try:
+                ReservaService._descontar_cupos(reserva.paquete_id, reserva.numero_pasajeros)
+            except ValueError:
                 raise ValueError('No hay cupos suficientes para reconfirmar esta reserva')
-            reserva.paquete.disponibles -= reserva.numero_pasajeros
         
+        movimientos = []
+        if estado_anterior != nuevo_estado:
+            movimientos = [
+                ReservaService._movimiento(reserva, -1, estado_anterior),
+                ReservaService._movimiento(reserva, 1),
+            ]
+            EstadisticasService.registrar_reservas(movimientos)
+            EstadisticasService.sincronizar_agotados([reserva.paquete_id])
         db.session.commit()
+        if estado_anterior != nuevo_estado:
+            notificar_catalogo(paquetes=[reserva.paquete_id], solo_cupos=True)
+            notificar_reservas(movimientos)
         return reserva
     
     @staticmethod
@@ -141,9 +373,15 @@ class ReservaService:
         
         # Si estaba confirmada, devolver cupos
         if reserva.estado == 'confirmada':
-            reserva.paquete.disponibles += reserva.numero_pasajeros
+            ReservaService._devolver_cupos(reserva.paquete_id, reserva.numero_pasajeros)
         
+        paquete_id = reserva.paquete_id
+        movimientos = [ReservaService._movimiento(reserva, -1)]
+        EstadisticasService.registrar_reservas(movimientos)
+        EstadisticasService.sincronizar_agotados([paquete_id])
         db.session.delete(reserva)
         db.session.commit()
+        notificar_catalogo(paquetes=[paquete_id], solo_cupos=True)
+        notificar_reservas(movimientos)
         return 'Reserva eliminada exitosamente'
 
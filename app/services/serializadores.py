@@ -0,0 +1,144 @@
+"""
+Serializadores compilados a partir de filas (tuplas de columnas)
+Equivalen a los to_dict() de los modelos pero trabajan sobre filas de un
+select() de Core, sin instancias ORM. Para cada modelo se genera una sola vez
+una función que arma el dict con las conversiones ya resueltas (Decimal ->
+float, fechas -> isoformat, actividades -> lista).
+
+Los modelos con columna `version` (Paquete, Destino) guardan cada entidad ya
+serializada por clave primaria: si la fila llega con la misma versión se
+reutiliza el dict sin convertir nada. La versión sube en cada UPDATE (también
+en los UPDATE masivos de cupos), así que un cambio nunca sirve datos viejos.
+"""
+from flask import current_app
+from sqlalchemy import select, Numeric, Date, DateTime
+from app import db
+from app.models import Usuario, Destino, Paquete, PaqueteDestino, Reserva, Viajero
+
+# Campos de to_dict() de cada modelo, en el mismo orden. Un campo puede
+# indicar su conversión; si no, se deduce del tipo de la columna.
+CAMPOS = {
+    Usuario: ('id', 'nombre_completo', 'rut', 'email', 'fecha_nacimiento', 'telefono', 'rol',
+              'fecha_registro'),
+    Destino: ('id', 'nombre', 'origen', 'descripcion', ('actividades', 'lista'), 'costo_base'),
+    Paquete: ('id', 'nombre', 'origen', 'fecha_inicio', 'fecha_fin', 'precio_total', 'disponibles'),
+    Reserva: ('id', 'usuario_id', 'paquete_id', 'fecha_reserva', 'estado', 'numero_pasajeros',
+              'telefono_contacto', 'comentarios'),
+    Viajero: ('id', 'reserva_id', 'nombre_completo', 'rut', 'fecha_nacimiento', 'telefono', 'email'),
+}
+
+_CONVERSIONES = {
+    None: '{v}',
+    'decimal': 'float({v}) if {v} else 0.0',
+    'fecha': '{v}.isoformat() if {v} else None',
+    'lista': "{v}.split(',') if {v} else []",
+}
+
+
+def _conversion(columna):
+    if isinstance(columna.type, Numeric):
+        return 'decimal'
+    if isinstance(columna.type, (Date, DateTime)):
+        return 'fecha'
+    return None
+
+
+class SerializadorFilas:
+    """
+    Serializador de un modelo compilado desde su lista de campos
+
+    Uso:
+        s = serializador(Destino)
+        for fila in db.session.execute(s.select()):
+            datos = s(fila)
+    """
+
+    def __init__(self, modelo, campos, max_cache=100000):
+        tabla = modelo.__table__
+        self.columnas = []
+        expresiones = []
+        for i, campo in enumerate(campos):
+            nombre, conversion = campo if isinstance(campo, tuple) else (campo, _conversion(tabla.c[campo]))
+            self.columnas.append(tabla.c[nombre])
+            expresiones.append(f'{nombre!r}: {_CONVERSIONES[conversion].format(v=f"fila[{i}]")}')
+
+        # La versión va al final de la fila y no forma parte del dict
+        self.versionado = 'version' in tabla.c
+        if self.versionado:
+            self.columnas.append(tabla.c.version)
+        self.max_cache = max_cache
+        self._cache = {}
+
+        codigo = f"def serializar(fila):\n    return {{{', '.join(expresiones)}}}\n"
+        espacio = {}
+        exec(compile(codigo, f'<serializador {modelo.__name__}>', 'exec'), espacio)
+        self._serializar = espacio['serializar']
+
+    def select(self):
+        """select() de Core con las columnas en el orden que espera el serializador"""
+        return select(*self.columnas)
+
+    def __call__(self, fila):
+        """
+        Serializar una fila de select()
+
+        Returns:
+            dict: Igual a to_dict() sin relaciones. Puede venir de la caché, no modificarlo.
+        """
+        if not self.versionado:
+            return self._serializar(fila)
+        clave, version = fila[0], fila[-1]
+        entrada = self._cache.get(clave)
+        if entrada is not None and entrada[0] == version:
+            return entrada[1]
+        datos = self._serializar(fila)
+        if len(self._cache) >= self.max_cache:
+            self._cache.clear()
+        self._cache[clave] = (version, datos)
+        return datos
+
+    def limpiar(self):
+        self._cache.clear()
+
+
+def serializador(modelo):
+    """
+    Serializador compilado del modelo para la app actual
+
+    Se crea una vez por app: la caché por (id, versión) solo vale para una
+    misma base de datos.
+    """
+    serializadores = current_app.extensions.setdefault('serializadores', {})
+    existente = serializadores.get(modelo)
+    if existente is None:
+        existente = serializadores[modelo] = SerializadorFilas(modelo, CAMPOS[modelo])
+    return existente
+
+
+def listar_destinos():
+    """Equivalente a [d.to_dict() for d in Destino.query.order_by(Destino.id)]"""
+    s = serializador(Destino)
+    return [s(fila) for fila in db.session.execute(s.select().order_by(Destino.id))]
+
+
+def listar_paquetes():
+    """
+    Equivalente a [p.to_dict() for p in Paquete.query.order_by(Paquete.id)] con
+    sus destinos, en tres consultas y sin instancias ORM
+    """
+    s_destino = serializador(Destino)
+    s_paquete = serializador(Paquete)
+
+    destinos = {fila[0]: s_destino(fila) for fila in db.session.execute(s_destino.select())}
+    por_paquete = {}
+    for paquete_id, destino_id in db.session.execute(
+        select(PaqueteDestino.paquete_id, PaqueteDestino.destino_id)
+        .order_by(PaqueteDestino.paquete_id, PaqueteDestino.destino_id)
+    ):
+        if destino_id in destinos:
+            por_paquete.setdefault(paquete_id, []).append(destinos[destino_id])
+
+    return [
+        {**s_paquete(fila), 'destinos': por_paquete.get(fila[0], [])}
+        for fila in db.session.execute(s_paquete.select().order_by(Paquete.id))
+    ]
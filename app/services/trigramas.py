@@ -0,0 +1,157 @@
+"""
+Índice de trigramas para la búsqueda de reservas en administración
+Guarda en la tabla `trigramas` los trigramas (normalizados) del nombre y
+email de cada usuario y del nombre de cada paquete. Una búsqueda por
+subcadena intersecta las listas de sus trigramas (GROUP BY ... HAVING
+COUNT = n) y solo compara el texto de los candidatos, en vez de recorrer el
+join de reservas con LIKE '%x%'.
+
+El índice se mantiene con eventos del ORM en el mismo flush que modifica
+al usuario o paquete; las inserciones masivas de Core no pasan por ahí y
+se corrigen con `flask reindexar-trigramas`.
+"""
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, select, insert, delete, func, or_, inspect
+from app import db
+from app.models.trigrama import Trigrama
+from app.models.usuario import Usuario
+from app.models.paquete import Paquete
+from app.services.esquema import esquema_al_dia
+from app.utils import normalizar_texto, filtro_prefijo
+
+LARGO = 3
+
+# Por tipo: modelo, columnas normalizadas que se indexan y cómo obtener el texto
+ENTIDADES = {
+    'usuario': (Usuario, ('nombre_completo_norm', 'email')),
+    'paquete': (Paquete, ('nombre_norm',)),
+}
+
+
+def trigramas(texto):
+    """Conjunto de subcadenas de 3 caracteres del texto normalizado"""
+    texto = normalizar_texto(texto) or ''
+    return {texto[i:i + LARGO] for i in range(len(texto) - LARGO + 1)}
+
+
+def _textos(entidad, columnas):
+    return [getattr(entidad, columna) for columna in columnas]
+
+
+def _filas(tipo, entidad_id, textos):
+    conjunto = set()
+    for texto in textos:
+        conjunto |= trigramas(texto)
+    return [{'tipo': tipo, 'trigrama': t, 'entidad_id': entidad_id} for t in conjunto]
+
+
+def _indexar(conexion, tipo, entidad_id, textos=None):
+    conexion.execute(delete(Trigrama).where(Trigrama.tipo == tipo, Trigrama.entidad_id == entidad_id))
+    filas = _filas(tipo, entidad_id, textos or [])
+    if filas:
+        conexion.execute(insert(Trigrama), filas)
+
+
+def _registrar_eventos(tipo, modelo, columnas):
+    @event.listens_for(modelo, 'after_insert')
+    def _insertado(mapper, conexion, entidad):
+        _indexar(conexion, tipo, entidad.id, _textos(entidad, columnas))
+
+    @event.listens_for(modelo, 'after_update')
+    def _actualizado(mapper, conexion, entidad):
+        estado = inspect(entidad)
+        if any(estado.attrs[columna].history.has_changes() for columna in columnas):
+            _indexar(conexion, tipo, entidad.id, _textos(entidad, columnas))
+
+    @event.listens_for(modelo, 'after_delete')
+    def _eliminado(mapper, conexion, entidad):
+        _indexar(conexion, tipo, entidad.id)
+
+
+for _tipo, (_modelo, _columnas) in ENTIDADES.items():
+    _registrar_eventos(_tipo, _modelo, _columnas)
+
+
+def coincidencias(tipo, texto):
+    """
+    Subconsulta con los ids de las entidades que contienen el texto
+
+    Con menos de 3 caracteres no hay trigramas: se busca por prefijo.
+
+    Args:
+        tipo: 'usuario' o 'paquete'
+        texto: str - texto buscado (se normaliza)
+
+    Returns:
+        Select de una columna (ids), para usar con in_()
+    """
+    modelo, columnas = ENTIDADES[tipo]
+    norm = normalizar_texto(texto) or ''
+    columnas = [getattr(modelo, columna) for columna in columnas]
+    buscados = trigramas(norm)
+    if not buscados:
+        return select(modelo.id).where(or_(*(filtro_prefijo(c, texto) for c in columnas)))
+
+    # Intersección de listas: entidades que tienen todos los trigramas
+    candidatos = (
+        select(Trigrama.entidad_id)
+        .where(Trigrama.tipo == tipo, Trigrama.trigrama.in_(buscados))
+        .group_by(Trigrama.entidad_id)
+        .having(func.count() == len(buscados))
+    )
+    # Los trigramas pueden venir de campos distintos o en otro orden: se confirma la subcadena
+    return select(modelo.id).where(
+        modelo.id.in_(candidatos),
+        or_(*(func.lower(c).contains(norm, autoescape=True) for c in columnas))
+    )
+
+
+def reconstruir_trigramas(lote=1000):
+    """
+    Reconstruir el índice completo
+
+    Returns:
+        int: Entidades indexadas
+    """
+    db.session.execute(delete(Trigrama))
+    total = 0
+    for tipo, (modelo, columnas) in ENTIDADES.items():
+        ultimo_id = 0
+        while True:
+            filas = db.session.execute(
+                select(modelo.id, *(getattr(modelo, c) for c in columnas))
+                .where(modelo.id > ultimo_id).order_by(modelo.id).limit(lote)
+            ).all()
+            if not filas:
+                break
+            trigramas_lote = [t for fila in filas for t in _filas(tipo, fila[0], fila[1:])]
+            if trigramas_lote:
+                db.session.execute(insert(Trigrama), trigramas_lote)
+            total += len(filas)
+            ultimo_id = filas[-1][0]
+    db.session.commit()
+    return total
+
+
+def init_trigramas(app):
+    """
+    Registrar el comando de reindexación y construir el índice si está vacío
+
+    Debe llamarse con las tablas ya creadas.
+    """
+    app.cli.add_command(_comando_reindexar)
+    if not esquema_al_dia(app):
+        return
+    with app.app_context():
+        vacio = db.session.query(Trigrama.tipo).first() is None
+        if vacio and (db.session.query(Usuario.id).first() or db.session.query(Paquete.id).first()):
+            reconstruir_trigramas()
+
+
+@click.command('reindexar-trigramas')
+@with_appcontext
+def _comando_reindexar():
+    """Reconstruir el índice de trigramas de usuarios y paquetes"""
+    total = reconstruir_trigramas()
+    click.echo(f'✅ {total} usuarios y paquetes indexados')
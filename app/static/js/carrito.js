@@ -1140,27 +1140,25 @@ function procederReserva() {
  */
 async function crearReservas(datosPorPaquete, telefonoContacto, comentarios) {
     try {
-        for (const datos of datosPorPaquete) {
-            const response = await fetch('/api/reservas', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
+        // Todas las reservas en una sola petición y transacción (también limpia el carrito)
+        const response = await fetch('/api/reservas/lote', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                telefono_contacto: telefonoContacto,
+                comentarios: comentarios,
+                reservas: datosPorPaquete.map(datos => ({
                     paquete_id: datos.paquete_id,
-                    estado: 'confirmada',
                     numero_pasajeros: datos.numero_pasajeros,
-                    telefono_contacto: telefonoContacto,
-                    comentarios: comentarios,
                     viajeros: datos.viajeros
-                })
-            });
-            
-            if (!response.ok) {
-                const error = await response.json();
-                throw new Error(error.error || 'Error al crear reserva');
-            }
-        }
+                }))
+            })
+        });
         
-        await fetch('/api/carrito/limpiar', { method: 'POST' });
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.error || 'Error al crear las reservas');
+        }
         
         Swal.fire({
             title: '¡Reservas Confirmadas!',
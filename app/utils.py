@@ -2,6 +2,7 @@
 Módulo de utilidades compartidas
 Funciones auxiliares utilizadas en múltiples partes de la aplicación
 """
+import unicodedata
 
 
 def validar_rut_chileno(rut_raw: str) -> bool:
@@ -40,3 +41,117 @@ def validar_rut_chileno(rut_raw: str) -> bool:
         dv_calc_str = str(dv_calc)
 
     return dv == dv_calc_str
+
+
+def normalizar_texto(texto):
+    """
+    Normaliza un texto para búsquedas:
+    - Quita tildes y diacríticos ("Valparaíso" -> "valparaiso").
+    - Pasa a minúsculas y colapsa espacios.
+    """
+    if texto is None:
+        return None
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.casefold().split())
+
+
+def filtro_prefijo(columna, texto):
+    """
+    Condición "columna empieza con texto" sobre una columna normalizada.
+
+    Se expresa como rango (columna >= texto AND columna < siguiente) en vez
+    de LIKE 'texto%', para que cualquier motor use el índice de la columna.
+    """
+    from sqlalchemy import true
+
+    prefijo = normalizar_texto(texto)
+    if not prefijo:
+        return true()
+    siguiente = prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+    return (columna >= prefijo) & (columna < siguiente)
+
+
+class Seleccion:
+    """
+    Campos y relaciones pedidos por el cliente para los serializadores to_dict.
+
+    Se arma desde ?fields=id,estado,paquete.nombre&expand=paquete.destinos:
+    - campos: nombres a incluir en este nivel (None = todos); 'id' siempre va.
+    - relaciones: relaciones a incluir, cada una con su propia Seleccion.
+    Una relación no pedida no se serializa ni necesita cargarse.
+    """
+
+    def __init__(self):
+        self.campos = None
+        self.relaciones = {}
+
+    @classmethod
+    def desde_parametros(cls, fields=None, expand=None):
+        """Devuelve None si no se pidió nada (serialización completa)"""
+        if not fields and not expand:
+            return None
+        raiz = cls()
+        for ruta in (expand or '').split(','):
+            if ruta.strip():
+                raiz._nivel(ruta.strip().split('.'))
+        for ruta in (fields or '').split(','):
+            if not ruta.strip():
+                continue
+            # 'paquete.nombre' pide el campo paquete aquí y el campo nombre dentro de paquete
+            *relaciones, campo = ruta.strip().split('.')
+            nivel = raiz
+            for nombre in relaciones:
+                nivel._pedir(nombre)
+                nivel = nivel.relaciones.setdefault(nombre, Seleccion())
+            nivel._pedir(campo)
+        return raiz
+
+    def _pedir(self, campo):
+        if self.campos is None:
+            self.campos = set()
+        self.campos.add(campo)
+
+    def _nivel(self, relaciones):
+        nivel = self
+        for nombre in relaciones:
+            nivel = nivel.relaciones.setdefault(nombre, Seleccion())
+        return nivel
+
+    def expande(self, relacion):
+        """La relación se incluye si se pidió en expand o como campo"""
+        return relacion in self.relaciones or (self.campos is not None and relacion in self.campos)
+
+    def de(self, relacion):
+        """Selección anidada de una relación (sin relaciones si no se especificó)"""
+        return self.relaciones.get(relacion) or Seleccion()
+
+    def filtrar(self, datos):
+        if self.campos is None:
+            return datos
+        return {k: v for k, v in datos.items() if k == 'id' or k in self.campos or k in self.relaciones}
+
+    def clave(self):
+        """Representación hashable, para usarla en claves de caché"""
+        return (
+            frozenset(self.campos) if self.campos is not None else None,
+            tuple(sorted((nombre, sub.clave()) for nombre, sub in self.relaciones.items()))
+        )
+
+
+def expandir(seleccion, relacion):
+    """
+    Para usar en to_dict: (incluir la relación, selección anidada).
+
+    Sin selección se incluye todo, como antes de existir ?fields/?expand.
+    """
+    if seleccion is None:
+        return True, None
+    return seleccion.expande(relacion), seleccion.de(relacion)
+
+
+def leer_seleccion():
+    """Selección de la petición actual (?fields= y ?expand=) o None"""
+    from flask import request
+
+    return Seleccion.desde_parametros(request.args.get('fields'), request.args.get('expand'))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark de búsqueda: índice de texto completo vs filtros sin índice
+Genera un catálogo sintético en una base SQLite temporal y mide las mismas
+búsquedas de /api/buscar con ambos caminos
+
+Uso:
+    python benchmarks/bench_busqueda.py --paquetes 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+ORIGENES = ['Santiago', 'Valparaíso', 'Concepción', 'La Serena', 'Puerto Montt',
+            'Antofagasta', 'Temuco', 'Punta Arenas', 'Arica', 'Iquique']
+LUGARES = ['Torres del Paine', 'San Pedro de Atacama', 'Isla de Pascua', 'Chiloé',
+           'Valle del Elqui', 'Pucón', 'Viña del Mar', 'Puerto Natales', 'Frutillar',
+           'Carretera Austral', 'Cajón del Maipo', 'Mendoza', 'Bariloche', 'Cusco']
+ACTIVIDADES = ['Trekking', 'Kayak', 'Tour astronómico', 'Degustación de vinos',
+               'Cabalgata', 'Rafting', 'Termas', 'Observación de fauna', 'Ski']
+
+CONSULTAS = [
+    {'origen': 'Santiago'},
+    {'destino': 'Torres'},
+    {'texto': 'kayak'},
+    {'origen': 'Punta', 'destino': 'Natales'},
+    {'texto': 'vinos elqui'},
+]
+
+
+def poblar(db, cantidad, semilla=42):
+    """Insertar destinos y paquetes sintéticos con inserciones masivas"""
+    from sqlalchemy import insert
+    from app.models import Destino, Paquete, PaqueteDestino
+    from app.utils import normalizar_texto
+
+    aleatorio = random.Random(semilla)
+    destinos = []
+    for i, lugar in enumerate(LUGARES * 10):
+        actividades = aleatorio.sample(ACTIVIDADES, 3)
+        destinos.append({
+            'id': i + 1,
+            'nombre': f'{lugar} {i // len(LUGARES) + 1}',
+            'origen': aleatorio.choice(ORIGENES),
+            'descripcion': f'Recorrido por {lugar} con {actividades[0].lower()} y paisajes únicos',
+            'actividades': ','.join(actividades),
+            'costo_base': aleatorio.randint(50, 500) * 1000,
+        })
+        # Las inserciones masivas no pasan por los validadores del modelo
+        destinos[-1]['nombre_norm'] = normalizar_texto(destinos[-1]['nombre'])
+        destinos[-1]['origen_norm'] = normalizar_texto(destinos[-1]['origen'])
+    db.session.execute(insert(Destino), destinos)
+
+    hoy = date.today()
+    for inicio in range(0, cantidad, 5000):
+        paquetes, relaciones = [], []
+        for paquete_id in range(inicio + 1, min(inicio + 5000, cantidad) + 1):
+            elegidos = aleatorio.sample(destinos, aleatorio.randint(1, 3))
+            salida = hoy + timedelta(days=aleatorio.randint(0, 365))
+            paquetes.append({
+                'id': paquete_id,
+                'nombre': f'Paquete {elegidos[0]["nombre"]} #{paquete_id}',
+                'origen': aleatorio.choice(ORIGENES),
+                'fecha_inicio': salida,
+                'fecha_fin': salida + timedelta(days=aleatorio.randint(3, 14)),
+                'precio_total': sum(d['costo_base'] for d in elegidos),
+                'disponibles': aleatorio.randint(0, 40),
+            })
+            paquetes[-1]['nombre_norm'] = normalizar_texto(paquetes[-1]['nombre'])
+            paquetes[-1]['origen_norm'] = normalizar_texto(paquetes[-1]['origen'])
+            relaciones.extend({'paquete_id': paquete_id, 'destino_id': d['id']} for d in elegidos)
+        db.session.execute(insert(Paquete), paquetes)
+        db.session.execute(insert(PaqueteDestino), relaciones)
+    db.session.commit()
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'mediana_ms': round(statistics.median(tiempos), 3),
+        'min_ms': round(min(tiempos), 3),
+        'resultados': len(resultado),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--paquetes', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--limite', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from app import create_app, db
+
+        class ConfigBenchmark(Config):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+
+        app = create_app(ConfigBenchmark)
+        with app.app_context():
+            from app.blueprints.buscar import filtrar_texto_sin_indice
+            from app.models import Paquete
+            from app.services.busqueda import obtener_indice, reconstruir_indice
+
+            inicio = time.perf_counter()
+            poblar(db, args.paquetes)
+            carga = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            reconstruir_indice()
+            indexado = time.perf_counter() - inicio
+
+            indice = obtener_indice()
+            resultados = []
+            for consulta in CONSULTAS:
+                origen = consulta.get('origen', '')
+                destino = consulta.get('destino', '')
+                texto = consulta.get('texto', '')
+                base = db.session.query(Paquete.id)
+
+                sin_indice = medir(lambda: filtrar_texto_sin_indice(base, origen, destino, texto)
+                                   .limit(args.limite).all(), args.repeticiones)
+                fts = medir(lambda: indice.aplicar(base, Paquete, {
+                    'origen': origen, 'destinos': destino, None: texto
+                }).limit(args.limite).all(), args.repeticiones)
+                resultados.append({
+                    'consulta': consulta,
+                    'sin_indice': sin_indice,
+                    'indice': fts,
+                    'aceleracion': round(sin_indice['mediana_ms'] / max(fts['mediana_ms'], 1e-6), 1),
+                })
+
+            print(json.dumps({
+                'paquetes': args.paquetes,
+                'carga_s': round(carga, 2),
+                'indexado_s': round(indexado, 2),
+                'consultas': resultados,
+            }, indent=2, ensure_ascii=False))
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
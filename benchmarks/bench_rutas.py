@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de las rutas críticas de servicios y API
+Para cada tamaño genera una base SQLite temporal con ese número de reservas
+(paquetes y usuarios en proporción) y mide crear_reserva, crear_paquete,
+/api/buscar, /api/carrito y los to_dict, directamente y con el cliente de
+pruebas de Flask. Reporta rendimiento (ops/s) y percentiles de latencia en
+JSON y, con --base, los compara con una corrida anterior (sale con código 1
+si algún caso empeora más que la tolerancia).
+
+Cada caso se mide --corridas veces (por defecto 5) y se reporta la mediana
+de las corridas: una pausa del sistema o del recolector de basura afecta a
+una corrida, no al resultado. Aun así, entre máquinas o con carga de fondo
+las latencias varían más que eso; la tolerancia por defecto (25 %) es para
+comparar corridas en la misma máquina y conviene ampliarla en CI compartido.
+
+Uso:
+    python benchmarks/bench_rutas.py --tamanos 1000,100000 --salida base.json
+    python benchmarks/bench_rutas.py --tamanos 1000,100000 --base base.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from bench_busqueda import poblar, CONSULTAS
+
+CASOS = ('crear_reserva', 'crear_paquete', 'api_crear_reserva', 'api_buscar', 'api_carrito',
+         'reserva_to_dict', 'paquete_to_dict')
+# Paquetes con cupos de sobra donde se crean las reservas del benchmark
+PAQUETES_OBJETIVO = 20
+
+
+def poblar_reservas(db, cantidad, paquetes, semilla=42):
+    """
+    Insertar usuarios y reservas sintéticos con inserciones masivas
+
+    Returns:
+        list[int]: IDs de los usuarios (clientes) creados
+    """
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from app.models import Usuario, Reserva
+    from app.utils import normalizar_texto
+
+    aleatorio = random.Random(semilla)
+    # Un solo hash para todos: calcularlo por usuario dominaría la carga
+    password_hash = generate_password_hash('123456')
+    usuarios = []
+    for usuario_id in range(1, max(50, cantidad // 100) + 1):
+        nombre = f'Cliente {usuario_id}'
+        usuarios.append({
+            'id': usuario_id, 'nombre_completo': nombre, 'nombre_completo_norm': normalizar_texto(nombre),
+            'rut': f'{usuario_id}-K', 'email': f'cliente{usuario_id}@example.com',
+            'password_hash': password_hash, 'fecha_nacimiento': date(1990, 1, 1), 'rol': 'cliente',
+        })
+    db.session.execute(insert(Usuario), usuarios)
+
+    ahora = datetime.now()
+    for inicio in range(0, cantidad, 5000):
+        db.session.execute(insert(Reserva), [
+            {
+                'usuario_id': aleatorio.randint(1, len(usuarios)),
+                'paquete_id': aleatorio.randint(1, paquetes),
+                'fecha_reserva': ahora - timedelta(minutes=aleatorio.randint(0, 525600)),
+                'estado': 'cancelada' if aleatorio.random() < 0.15 else 'confirmada',
+                'numero_pasajeros': aleatorio.randint(1, 4),
+            }
+            for _ in range(inicio, min(inicio + 5000, cantidad))
+        ])
+    db.session.commit()
+    return [u['id'] for u in usuarios]
+
+
+def medir(funcion, repeticiones, calentamiento=5, desde=0):
+    """Latencias por llamada (ms) y rendimiento secuencial (ops/s) de una corrida"""
+    for i in range(desde, desde + calentamiento):
+        funcion(i)
+    tiempos = []
+    inicio_total = time.perf_counter()
+    for i in range(desde + calentamiento, desde + calentamiento + repeticiones):
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    total = time.perf_counter() - inicio_total
+    percentiles = statistics.quantiles(tiempos, n=100, method='inclusive')
+    return {
+        'ops_s': repeticiones / total,
+        'media_ms': statistics.fmean(tiempos),
+        'p50_ms': percentiles[49],
+        'p90_ms': percentiles[89],
+        'p99_ms': percentiles[98],
+        'max_ms': max(tiempos),
+    }
+
+
+def medir_corridas(funcion, repeticiones, corridas, calentamiento=5):
+    """
+    Medir `corridas` veces y resumir con la mediana de cada métrica
+
+    Returns:
+        dict: Medianas, más el mejor p50 (p50_min_ms) y la dispersión del p50
+            entre corridas (p50_rango_ms) para ver cuánto ruido hubo
+    """
+    resultados = [medir(funcion, repeticiones, calentamiento, desde=n * (repeticiones + calentamiento))
+                  for n in range(corridas)]
+    resumen = {'repeticiones': repeticiones, 'corridas': corridas}
+    for metrica in ('ops_s', 'media_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'):
+        resumen[metrica] = round(statistics.median(r[metrica] for r in resultados), 1 if metrica == 'ops_s' else 3)
+    p50s = [r['p50_ms'] for r in resultados]
+    resumen['p50_min_ms'] = round(min(p50s), 3)
+    resumen['p50_rango_ms'] = round(max(p50s) - min(p50s), 3)
+    return resumen
+
+
+def correr_tamano(tamano, casos, repeticiones, corridas):
+    """Poblar una base nueva con `tamano` reservas y medir los casos pedidos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        from app import create_app, db
+
+        class ConfigBenchmark(Config):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+            WTF_CSRF_ENABLED = False
+            ESTATICOS_PRECOMPRIMIR = False
+            INSTRUMENTACION_SERVER_TIMING = False
+
+        app = create_app(ConfigBenchmark)
+        with app.app_context():
+            from sqlalchemy import update
+            from sqlalchemy.orm import joinedload
+            from app.blueprints.reservas import _consulta_reservas
+            from app.models import Paquete, PaqueteDestino, Reserva
+            from app.services.busqueda import reconstruir_indice
+            from app.services.estadisticas import EstadisticasService
+            from app.services.paquete_service import PaqueteService
+            from app.services.reserva_service import ReservaService
+
+            inicio = time.perf_counter()
+            cantidad_paquetes = max(100, tamano // 10)
+            poblar(db, cantidad_paquetes)
+            usuarios = poblar_reservas(db, tamano, cantidad_paquetes)
+            objetivos = list(range(1, PAQUETES_OBJETIVO + 1))
+            db.session.execute(update(Paquete).where(Paquete.id.in_(objetivos)).values(disponibles=10 ** 9))
+            db.session.commit()
+            reconstruir_indice()
+            EstadisticasService.reconstruir()
+            carga = time.perf_counter() - inicio
+
+            cliente = app.test_client()
+            with cliente.session_transaction() as sesion:
+                sesion['usuario_id'] = usuarios[0]
+                sesion['usuario_rol'] = 'cliente'
+            for paquete_id in objetivos[:5]:
+                cliente.post('/api/carrito/agregar', json={'tipo': 'paquete', 'id': paquete_id})
+
+            def crear_reserva(i):
+                ReservaService.crear_reserva(usuarios[i % len(usuarios)],
+                                             {'paquete_id': objetivos[i % len(objetivos)]})
+
+            def crear_paquete(i):
+                PaqueteService.crear_paquete({
+                    'nombre': f'Paquete benchmark {i}', 'origen': 'Santiago',
+                    'fecha_inicio': date(2030, 1, 1), 'fecha_fin': date(2030, 1, 8),
+                    'precio_total': 500000, 'disponibles': 20, 'destinos': [1 + i % 10, 11 + i % 10],
+                })
+
+            def api_crear_reserva(i):
+                respuesta = cliente.post('/api/reservas', json={'paquete_id': objetivos[i % len(objetivos)]})
+                assert respuesta.status_code == 201, respuesta.get_data(as_text=True)
+
+            def api_buscar(i):
+                consulta = dict(CONSULTAS[i % len(CONSULTAS)])
+                if 'texto' in consulta:
+                    consulta['q'] = consulta.pop('texto')
+                assert cliente.get('/api/buscar', query_string=consulta).status_code == 200
+
+            def api_carrito(i):
+                assert cliente.get('/api/carrito').status_code == 200
+
+            def reserva_to_dict(i):
+                # Misma carga de relaciones que la API (usuario, paquete con destinos y viajeros)
+                reservas = _consulta_reservas().order_by(Reserva.id.desc()).offset(i % 10 * 100).limit(100).all()
+                [r.to_dict() for r in reservas]
+                db.session.expunge_all()
+
+            def paquete_to_dict(i):
+                paquetes = Paquete.query.options(
+                    joinedload(Paquete.destinos).joinedload(PaqueteDestino.destino)
+                ).order_by(Paquete.id).offset(i % 10 * 100).limit(100).all()
+                [p.to_dict() for p in paquetes]
+                db.session.expunge_all()
+
+            funciones = {
+                'crear_reserva': crear_reserva, 'crear_paquete': crear_paquete,
+                'api_crear_reserva': api_crear_reserva, 'api_buscar': api_buscar, 'api_carrito': api_carrito,
+                'reserva_to_dict': reserva_to_dict, 'paquete_to_dict': paquete_to_dict,
+            }
+            resultados = {caso: medir_corridas(funciones[caso], repeticiones, corridas) for caso in casos}
+            db.engine.dispose()
+    return {'reservas': tamano, 'paquetes': cantidad_paquetes, 'usuarios': len(usuarios),
+            'carga_s': round(carga, 2), 'casos': resultados}
+
+
+def comparar(actual, base, tolerancia):
+    """
+    Comparar p50 y ops/s de cada caso con los de la corrida base
+
+    Ambos lados son medianas de varias corridas (medir_corridas).
+
+    Returns:
+        list[dict]: Una fila por caso presente en ambas corridas
+    """
+    filas = []
+    for tamano, corrida in actual['resultados'].items():
+        casos_base = base.get('resultados', {}).get(tamano, {}).get('casos', {})
+        for caso, medicion in corrida['casos'].items():
+            anterior = casos_base.get(caso)
+            if not anterior:
+                continue
+            cambio_p50 = medicion['p50_ms'] / max(anterior['p50_ms'], 1e-9) - 1
+            cambio_ops = medicion['ops_s'] / max(anterior['ops_s'], 1e-9) - 1
+            filas.append({
+                'tamano': int(tamano), 'caso': caso,
+                'p50_base_ms': anterior['p50_ms'], 'p50_ms': medicion['p50_ms'],
+                'cambio_p50': round(cambio_p50, 4), 'cambio_ops_s': round(cambio_ops, 4),
+                'regresion': cambio_p50 > tolerancia or cambio_ops < -tolerancia,
+            })
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tamanos', default='1000',
+                        help='Reservas por corrida, separadas por coma (p. ej. 1000,100000,1000000)')
+    parser.add_argument('--casos', default=','.join(CASOS), help=f'Subconjunto de: {", ".join(CASOS)}')
+    parser.add_argument('--repeticiones', type=int, default=200, help='Llamadas medidas por corrida')
+    parser.add_argument('--corridas', type=int, default=5,
+                        help='Corridas por caso; se compara la mediana entre corridas')
+    parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto, salida estándar)')
+    parser.add_argument('--base', help='Resultados anteriores con los que comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='Empeoramiento relativo permitido de p50 y ops/s (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    casos = [c.strip() for c in args.casos.split(',') if c.strip()]
+    desconocidos = set(casos) - set(CASOS)
+    if desconocidos:
+        parser.error(f'Casos desconocidos: {", ".join(sorted(desconocidos))}')
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'entorno': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+        },
+        'repeticiones': args.repeticiones,
+        'corridas': args.corridas,
+        'resultados': {},
+    }
+    for tamano in (int(t) for t in args.tamanos.split(',')):
+        print(f'Tamaño {tamano}...', file=sys.stderr)
+        resultado['resultados'][str(tamano)] = correr_tamano(tamano, casos, args.repeticiones, args.corridas)
+
+    regresiones = []
+    if args.base:
+        with open(args.base) as archivo:
+            comparacion = comparar(resultado, json.load(archivo), args.tolerancia)
+        resultado['comparacion'] = comparacion
+        for fila in comparacion:
+            marca = 'REGRESIÓN' if fila['regresion'] else 'ok'
+            print(f'{fila["tamano"]:>9} {fila["caso"]:<18} p50 {fila["p50_base_ms"]:>9.3f} -> '
+                  f'{fila["p50_ms"]:>9.3f} ms ({fila["cambio_p50"]:+.1%})  ops/s {fila["cambio_ops_s"]:+.1%}  '
+                  f'{marca}', file=sys.stderr)
+        regresiones = [f for f in comparacion if f['regresion']]
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            archivo.write(texto + '\n')
+    else:
+        print(texto)
+    if regresiones:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialización: to_dict() sobre instancias ORM vs serializadores compilados
+Genera un catálogo sintético en una base SQLite temporal y mide la lista
+completa de paquetes (con destinos) de ambas formas
+
+Uso:
+    python benchmarks/bench_serializadores.py --paquetes 50000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from bench_busqueda import poblar
+
+
+def medir(funcion, repeticiones, preparar=None):
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {'mediana_ms': round(statistics.median(tiempos), 1), 'min_ms': round(min(tiempos), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--paquetes', type=int, default=50000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from app import create_app, db
+
+        class ConfigBenchmark(Config):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+            BUSQUEDA_FTS = False
+
+        app = create_app(ConfigBenchmark)
+        with app.app_context():
+            from sqlalchemy.orm import joinedload
+            from app.models import Paquete, PaqueteDestino
+            from app.services.serializadores import CAMPOS, serializador, listar_paquetes
+            from app.utils import Seleccion
+
+            poblar(db, args.paquetes)
+
+            def orm_to_dict():
+                paquetes = Paquete.query.options(
+                    joinedload(Paquete.destinos).joinedload(PaqueteDestino.destino)
+                ).order_by(Paquete.id).all()
+                resultado = [p.to_dict() for p in paquetes]
+                db.session.expunge_all()
+                return resultado
+
+            assert listar_paquetes() == orm_to_dict()
+
+            # Solo la conversión de las columnas del paquete, con los datos ya en memoria
+            sin_destinos = Seleccion.desde_parametros(fields=','.join(CAMPOS[Paquete]))
+            paquetes = Paquete.query.order_by(Paquete.id).all()
+            s = serializador(Paquete)
+            filas = db.session.execute(s.select().order_by(Paquete.id)).all()
+            conversion = {
+                'to_dict': medir(lambda: [p.to_dict(sin_destinos) for p in paquetes], args.repeticiones),
+                'compilado_frio': medir(lambda: [s(f) for f in filas], args.repeticiones, preparar=s.limpiar),
+                'compilado_cacheado': medir(lambda: [s(f) for f in filas], args.repeticiones),
+            }
+            db.session.expunge_all()
+            del paquetes
+
+            completo = {
+                'orm_to_dict': medir(orm_to_dict, args.repeticiones),
+                'filas_compilado_frio': medir(
+                    listar_paquetes, args.repeticiones,
+                    preparar=lambda: [x.limpiar() for x in app.extensions['serializadores'].values()]
+                ),
+                'filas_compilado_cacheado': medir(listar_paquetes, args.repeticiones),
+            }
+
+            print(json.dumps({
+                'paquetes': args.paquetes,
+                'conversion_columnas_paquete': conversion,
+                'lista_completa_con_destinos': completo,
+                'aceleracion_lista': round(
+                    completo['orm_to_dict']['mediana_ms'] / completo['filas_compilado_cacheado']['mediana_ms'], 1
+                ),
+            }, indent=2, ensure_ascii=False))
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,94 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Carrito en el servidor: 'tabla' (compartido entre workers) o 'memoria' (un solo proceso)
+    CARRITO_BACKEND = os.environ.get('CARRITO_BACKEND', 'tabla')
+    CARRITO_MAX_MEMORIA = int(os.environ.get('CARRITO_MAX_MEMORIA', 10000))
+    # Días de inactividad tras los que un carrito abandonado se borra; la tabla
+    # se purga a lo más cada CARRITO_PURGA_INTERVALO segundos al agregar
+    # artículos (o con `flask purgar-carritos`)
+    CARRITO_TTL_DIAS = float(os.environ.get('CARRITO_TTL_DIAS', 30))
+    CARRITO_PURGA_INTERVALO = float(os.environ.get('CARRITO_PURGA_INTERVALO', 3600))
+    
+    # Caché del catálogo: máximo de respuestas guardadas y segundos de vida
+    # (el TTL acota cuánto tarda en verse una escritura hecha en otro worker)
+    CATALOGO_CACHE_MAX = int(os.environ.get('CATALOGO_CACHE_MAX', 256))
+    CATALOGO_CACHE_TTL = float(os.environ.get('CATALOGO_CACHE_TTL', 10))
+    
+    # Snapshot del catálogo compartido entre workers vía mmap (desactivado si está vacío)
+    CATALOGO_SNAPSHOT_PATH = os.environ.get('CATALOGO_SNAPSHOT_PATH')
+    # Segundos para agrupar escrituras antes de regenerar el snapshot (0 = inmediato)
+    CATALOGO_SNAPSHOT_INTERVALO = float(os.environ.get('CATALOGO_SNAPSHOT_INTERVALO', 0.5))
+    
+    # Versión del catálogo para ETag/Last-Modified, compartida entre workers:
+    # 'tabla' (por defecto), 'archivo' (CATALOGO_VERSION_PATH) o 'memoria'
+    # (solo con un worker: los demás no verían las escrituras)
+    CATALOGO_VERSION_BACKEND = os.environ.get('CATALOGO_VERSION_BACKEND', 'tabla')
+    CATALOGO_VERSION_PATH = os.environ.get('CATALOGO_VERSION_PATH')
+    
+    # Búsqueda de texto completo (FTS5 en SQLite, FULLTEXT en MySQL)
+    BUSQUEDA_FTS = os.environ.get('BUSQUEDA_FTS', 'True').lower() == 'true'
+    # Paginación por cursor: tamaño por defecto, máximo por página y tope del total estimado
+    PAGINACION_LIMITE = int(os.environ.get('PAGINACION_LIMITE', 50))
+    PAGINACION_LIMITE_MAX = int(os.environ.get('PAGINACION_LIMITE_MAX', 500))
+    PAGINACION_TOTAL_MAX = int(os.environ.get('PAGINACION_TOTAL_MAX', 10000))
+    
+    # Reservas por lote al exportar /api/reservas en NDJSON
+    RESERVAS_EXPORTAR_LOTE = int(os.environ.get('RESERVAS_EXPORTAR_LOTE', 1000))
+    
+    # Máximo de sugerencias que puede pedir /api/buscar/sugerencias
+    AUTOCOMPLETAR_MAX = int(os.environ.get('AUTOCOMPLETAR_MAX', 20))
+    # Cada cuántos segundos el autocompletado mira si otro worker cambió el
+    # catálogo (en ese caso reconstruye su índice en memoria)
+    AUTOCOMPLETADO_REVISION = float(os.environ.get('AUTOCOMPLETADO_REVISION', 5))
+    
+    # Compresión de respuestas (gzip; brotli si el paquete está instalado)
+    COMPRESION_ACTIVA = os.environ.get('COMPRESION_ACTIVA', 'True').lower() == 'true'
+    # Tamaño mínimo en bytes para comprimir una respuesta dinámica
+    COMPRESION_MIN_BYTES = int(os.environ.get('COMPRESION_MIN_BYTES', 1024))
+    # Nivel al vuelo (rápido) y nivel para variantes guardadas en caché (máximo)
+    COMPRESION_NIVEL = int(os.environ.get('COMPRESION_NIVEL', 6))
+    COMPRESION_NIVEL_CACHE = int(os.environ.get('COMPRESION_NIVEL_CACHE', 9))
+    # Memoria máxima de la caché de variantes precomprimidas
+    COMPRESION_CACHE_MB = int(os.environ.get('COMPRESION_CACHE_MB', 64))
+    
+    # Estáticos con huella: recalcular hashes si cambian los archivos (por defecto
+    # solo en DEBUG) y generar las variantes comprimidas al iniciar
+    ESTATICOS_RECARGAR = os.environ.get('ESTATICOS_RECARGAR', str(DEBUG)).lower() == 'true'
+    ESTATICOS_PRECOMPRIMIR = os.environ.get('ESTATICOS_PRECOMPRIMIR', 'True').lower() == 'true'
+    
+    # Cubo de ventas por día/semana/mes (se actualiza con cada reserva)
+    ANALITICA_VENTAS = os.environ.get('ANALITICA_VENTAS', 'True').lower() == 'true'
+    # Reservas por lote al reconstruir el cubo desde el historial
+    ANALITICA_LOTE = int(os.environ.get('ANALITICA_LOTE', 5000))
+    
+    # Reservas leídas por lote en los reportes de operación (numpy)
+    REPORTES_LOTE = int(os.environ.get('REPORTES_LOTE', 100000))
+    
+    # Medición de consultas SQL por petición: advertir cuando una misma consulta se
+    # repite N veces (posible N+1) y exponer la cabecera Server-Timing (por defecto
+    # solo en DEBUG, porque revela tiempos internos)
+    INSTRUMENTACION_SQL = os.environ.get('INSTRUMENTACION_SQL', 'True').lower() == 'true'
+    INSTRUMENTACION_N1_UMBRAL = int(os.environ.get('INSTRUMENTACION_N1_UMBRAL', 10))
+    INSTRUMENTACION_SERVER_TIMING = os.environ.get('INSTRUMENTACION_SERVER_TIMING', str(DEBUG)).lower() == 'true'
+    
+    # Métricas de Prometheus en /metrics. Con varios workers (gunicorn -w N) hay
+    # que definir METRICAS_DIR, un directorio compartido (vaciarlo al desplegar)
+    # donde cada proceso guarda sus métricas a lo más cada METRICAS_INTERVALO
+    # segundos; sin él cada scrape ve solo al worker que lo atiende.
+    # METRICAS_TOKEN exige "Authorization: Bearer <token>" para leerlas; sin
+    # token /metrics responde 404 salvo con METRICAS_PUBLICAS
+    METRICAS_ACTIVAS = os.environ.get('METRICAS_ACTIVAS', 'True').lower() == 'true'
+    METRICAS_DIR = os.environ.get('METRICAS_DIR')
+    METRICAS_INTERVALO = float(os.environ.get('METRICAS_INTERVALO', 1.0))
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+    METRICAS_PUBLICAS = os.environ.get('METRICAS_PUBLICAS', 'False').lower() == 'true'
+    
+    # Perfilado bajo demanda (cProfile/tracemalloc) para administradores; no
+    # activar en producción salvo para investigar. Perfiles guardados por proceso
+    PERFILADO_ACTIVO = os.environ.get('PERFILADO_ACTIVO', 'False').lower() == 'true'
+    PERFILADO_MAX = int(os.environ.get('PERFILADO_MAX', 20))
+    
     # CSRF Protection para WTForms
     WTF_CSRF_ENABLED = True
     WTF_CSRF_SECRET_KEY = os.environ.get('CSRF_SECRET_KEY') or SECRET_KEY
@@ -0,0 +1,140 @@
+"""
+Fixtures compartidas para las pruebas con pytest
+Cada prueba usa una base de datos SQLite temporal propia
+"""
+import itertools
+import sys
+import os
+from contextlib import contextmanager, nullcontext
+from datetime import date
+
+import pytest
+from flask import has_app_context
+from sqlalchemy import event
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path):
+    from app import create_app, db
+
+    class ConfigPrueba(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "prueba.db"}'
+        # Esperar el bloqueo de escritura en vez de fallar con "database is locked"
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+
+    app = create_app(ConfigPrueba)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@contextmanager
+def _contar_consultas(engine):
+    sentencias = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+
+@pytest.fixture
+def contar_consultas():
+    """`with contar_consultas(engine) as sentencias`: SQL ejecutado dentro del bloque"""
+    return _contar_consultas
+
+
+@pytest.fixture
+def catalogo(app):
+    """
+    Fábrica del catálogo de prueba: catalogo(n) crea 3 destinos y n paquetes
+    que los incluyen a todos
+
+    Returns:
+        list[int]: IDs de los paquetes creados
+    """
+    from app import db
+    from app.models import Destino, Paquete, PaqueteDestino
+
+    def crear(cantidad_paquetes):
+        with nullcontext() if has_app_context() else app.app_context():
+            destinos = [
+                Destino(nombre=f'Destino {i}', descripcion='Descripción', actividades='Trekking,Kayak',
+                        costo_base=1000)
+                for i in range(3)
+            ]
+            paquetes = [
+                Paquete(
+                    nombre=f'Paquete {i}',
+                    origen='Santiago',
+                    fecha_inicio=date(2030, 1, 1),
+                    fecha_fin=date(2030, 1, 5),
+                    precio_total=50000,
+                    disponibles=50
+                )
+                for i in range(cantidad_paquetes)
+            ]
+            db.session.add_all(destinos + paquetes)
+            db.session.flush()
+            for paquete in paquetes:
+                for destino in destinos:
+                    db.session.add(PaqueteDestino(paquete_id=paquete.id, destino_id=destino.id))
+            db.session.commit()
+            return [p.id for p in paquetes]
+    return crear
+
+
+@pytest.fixture
+def crear_usuario(app):
+    """
+    Fábrica de usuarios con contraseña '123456': crear_usuario(rol, **columnas)
+
+    Nombre, RUT y email se generan únicos salvo que se indiquen.
+
+    Returns:
+        int: ID del usuario creado
+    """
+    from app import db
+    from app.models import Usuario
+
+    numeros = itertools.count(1)
+
+    def crear(rol='cliente', **columnas):
+        numero = next(numeros)
+        datos = {
+            'nombre_completo': f'{rol.capitalize()} {numero}',
+            'rut': f'{numero}-{rol}',
+            'email': f'{rol}{numero}@example.com',
+            'fecha_nacimiento': date(1990, 1, 1),
+        }
+        datos.update(columnas)
+        with nullcontext() if has_app_context() else app.app_context():
+            usuario = Usuario(rol=rol, **datos)
+            usuario.set_password('123456')
+            db.session.add(usuario)
+            db.session.commit()
+            return usuario.id
+    return crear
+
+
+@pytest.fixture
+def usuario_cliente(crear_usuario):
+    """ID de un usuario con rol cliente"""
+    return crear_usuario('cliente')
+
+
+@pytest.fixture
+def usuario_admin(crear_usuario):
+    """ID de un usuario con rol admin"""
+    return crear_usuario('admin')
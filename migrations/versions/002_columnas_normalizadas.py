@@ -0,0 +1,65 @@
+"""Columnas normalizadas para búsquedas sin tildes ni mayúsculas
+
+Revision ID: 002_columnas_normalizadas
+Revises: 001_initial
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils import normalizar_texto
+
+
+# revision identifiers, used by Alembic.
+revision = '002_columnas_normalizadas'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+# tabla -> {columna normalizada: columna original}
+COLUMNAS = {
+    'destinos': {'nombre_norm': 'nombre', 'origen_norm': 'origen'},
+    'paquetes': {'nombre_norm': 'nombre', 'origen_norm': 'origen'},
+    'usuarios': {'nombre_completo_norm': 'nombre_completo'},
+}
+
+
+def upgrade():
+    conexion = op.get_bind()
+    inspector = sa.inspect(conexion)
+
+    for tabla, columnas in COLUMNAS.items():
+        # db.create_all() ya crea las columnas en bases nuevas
+        existentes = {c['name'] for c in inspector.get_columns(tabla)}
+        for norm in columnas:
+            if norm in existentes:
+                continue
+            op.add_column(tabla, sa.Column(norm, sa.String(length=200), nullable=True))
+            op.create_index(f'ix_{tabla}_{norm}', tabla, [norm], unique=False)
+
+        # Rellenar las filas existentes (la normalización se hace en Python)
+        t = sa.table(tabla, sa.column('id'), *(sa.column(c) for c in columnas),
+                     *(sa.column(c) for c in columnas.values()))
+        ultimo_id = 0
+        while True:
+            filas = conexion.execute(
+                sa.select(t.c.id, *(t.c[c] for c in columnas.values()))
+                .where(t.c.id > ultimo_id).order_by(t.c.id).limit(1000)
+            ).mappings().all()
+            if not filas:
+                break
+            conexion.execute(
+                t.update().where(t.c.id == sa.bindparam('_id')),
+                [dict({'_id': fila['id']}, **{norm: normalizar_texto(fila[original])
+                                              for norm, original in columnas.items()})
+                 for fila in filas]
+            )
+            ultimo_id = filas[-1]['id']
+
+
+def downgrade():
+    for tabla, columnas in COLUMNAS.items():
+        for norm in columnas:
+            op.drop_index(f'ix_{tabla}_{norm}', table_name=tabla)
+            op.drop_column(tabla, norm)
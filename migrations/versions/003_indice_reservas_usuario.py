@@ -0,0 +1,27 @@
+"""Índice compuesto para paginar las reservas de un usuario
+
+Revision ID: 003_indice_reservas_usuario
+Revises: 002_columnas_normalizadas
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003_indice_reservas_usuario'
+down_revision = '002_columnas_normalizadas'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() ya crea el índice en bases nuevas
+    indices = {i['name'] for i in sa.inspect(op.get_bind()).get_indexes('reservas')}
+    if 'ix_reservas_usuario_id_id' not in indices:
+        op.create_index('ix_reservas_usuario_id_id', 'reservas', ['usuario_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reservas_usuario_id_id', table_name='reservas')
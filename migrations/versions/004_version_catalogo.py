@@ -0,0 +1,32 @@
+"""Columna version en destinos y paquetes
+
+Revision ID: 004_version_catalogo
+Revises: 003_indice_reservas_usuario
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_version_catalogo'
+down_revision = '003_indice_reservas_usuario'
+branch_labels = None
+depends_on = None
+
+TABLAS = ('destinos', 'paquetes')
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for tabla in TABLAS:
+        # db.create_all() ya crea la columna en bases nuevas
+        if 'version' in {c['name'] for c in inspector.get_columns(tabla)}:
+            continue
+        op.add_column(tabla, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for tabla in TABLAS:
+        op.drop_column(tabla, 'version')
@@ -0,0 +1,52 @@
+"""Tablas de estadísticas acumuladas del dashboard
+
+Revision ID: 005_estadisticas_dashboard
+Revises: 004_version_catalogo
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005_estadisticas_dashboard'
+down_revision = '004_version_catalogo'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() ya crea las tablas en bases nuevas. Los totales se
+    # calculan al iniciar la app (o con `flask reconstruir-estadisticas`)
+    tablas = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'estadisticas_globales' not in tablas:
+        op.create_table(
+            'estadisticas_globales',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('destinos', sa.Integer(), nullable=False),
+            sa.Column('paquetes', sa.Integer(), nullable=False),
+            sa.Column('paquetes_agotados', sa.Integer(), nullable=False),
+            sa.Column('reservas', sa.Integer(), nullable=False),
+            sa.Column('confirmadas', sa.Integer(), nullable=False),
+            sa.Column('canceladas', sa.Integer(), nullable=False),
+            sa.Column('pasajeros', sa.Integer(), nullable=False),
+            sa.Column('ingresos', sa.Numeric(14, 2), nullable=False),
+        )
+    if 'estadisticas_paquetes' not in tablas:
+        op.create_table(
+            'estadisticas_paquetes',
+            sa.Column('paquete_id', sa.Integer(), sa.ForeignKey('paquetes.id'), primary_key=True),
+            sa.Column('reservas', sa.Integer(), nullable=False),
+            sa.Column('confirmadas', sa.Integer(), nullable=False),
+            sa.Column('canceladas', sa.Integer(), nullable=False),
+            sa.Column('pasajeros', sa.Integer(), nullable=False),
+            sa.Column('agotado', sa.Boolean(), nullable=False),
+        )
+        op.create_index('ix_estadisticas_paquetes_reservas', 'estadisticas_paquetes', ['reservas'])
+
+
+def downgrade():
+    op.drop_index('ix_estadisticas_paquetes_reservas', table_name='estadisticas_paquetes')
+    op.drop_table('estadisticas_paquetes')
+    op.drop_table('estadisticas_globales')
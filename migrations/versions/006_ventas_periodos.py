@@ -0,0 +1,35 @@
+"""Cubo de ventas por período
+
+Revision ID: 006_ventas_periodos
+Revises: 005_estadisticas_dashboard
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_ventas_periodos'
+down_revision = '005_estadisticas_dashboard'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() ya crea la tabla en bases nuevas; el historial se carga
+    # con `flask reconstruir-analitica`
+    if 'ventas_periodos' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'ventas_periodos',
+        sa.Column('periodo', sa.String(10), primary_key=True),
+        sa.Column('inicio', sa.Date(), primary_key=True),
+        sa.Column('paquete_id', sa.Integer(), primary_key=True),
+        sa.Column('reservas', sa.Integer(), nullable=False),
+        sa.Column('pasajeros', sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('ventas_periodos')
@@ -0,0 +1,53 @@
+"""Índices compuestos de reservas para la lista de administración (y fecha_reserva NOT NULL)
+
+Revision ID: 007_indices_reservas_admin
+Revises: 006_ventas_periodos
+Create Date: 2026-10-18
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_indices_reservas_admin'
+down_revision = '006_ventas_periodos'
+branch_labels = None
+depends_on = None
+
+INDICES = {
+    'ix_reservas_fecha_reserva': ['fecha_reserva'],
+    'ix_reservas_estado_fecha_reserva': ['estado', 'fecha_reserva'],
+    'ix_reservas_usuario_id_fecha_reserva': ['usuario_id', 'fecha_reserva'],
+}
+
+
+def upgrade():
+    # La lista de administración pagina por (fecha_reserva, id): una fecha NULL
+    # rompería el cursor. Las reservas sin fecha se ubican como las más antiguas
+    bind = op.get_bind()
+    reservas = sa.table('reservas', sa.column('fecha_reserva', sa.DateTime()))
+    minima = bind.execute(sa.select(sa.func.min(reservas.c.fecha_reserva))).scalar()
+    if bind.execute(sa.select(sa.func.count()).where(reservas.c.fecha_reserva.is_(None))).scalar():
+        bind.execute(
+            reservas.update().where(reservas.c.fecha_reserva.is_(None))
+            .values(fecha_reserva=minima or datetime.utcnow())
+        )
+    columna = next(c for c in sa.inspect(bind).get_columns('reservas') if c['name'] == 'fecha_reserva')
+    if columna['nullable']:
+        with op.batch_alter_table('reservas') as batch:
+            batch.alter_column('fecha_reserva', existing_type=sa.DateTime(), nullable=False)
+
+    # db.create_all() ya crea los índices en bases nuevas
+    existentes = {i['name'] for i in sa.inspect(op.get_bind()).get_indexes('reservas')}
+    for nombre, columnas in INDICES.items():
+        if nombre not in existentes:
+            op.create_index(nombre, 'reservas', columnas)
+
+
+def downgrade():
+    for nombre in INDICES:
+        op.drop_index(nombre, table_name='reservas')
+    with op.batch_alter_table('reservas') as batch:
+        batch.alter_column('fecha_reserva', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,33 @@
+"""Índice de trigramas para la búsqueda de reservas en administración
+
+Revision ID: 008_trigramas
+Revises: 007_indices_reservas_admin
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_trigramas'
+down_revision = '007_indices_reservas_admin'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() ya crea la tabla en bases nuevas; el índice se llena al
+    # iniciar la app si está vacío (o con `flask reindexar-trigramas`)
+    if 'trigramas' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'trigramas',
+        sa.Column('tipo', sa.String(10), primary_key=True),
+        sa.Column('trigrama', sa.String(3), primary_key=True),
+        sa.Column('entidad_id', sa.Integer(), primary_key=True),
+    )
+
+
+def downgrade():
+    op.drop_table('trigramas')
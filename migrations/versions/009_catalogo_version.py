@@ -0,0 +1,33 @@
+"""Versión del catálogo compartida entre workers
+
+Revision ID: 009_catalogo_version
+Revises: 008_trigramas
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_catalogo_version'
+down_revision = '008_trigramas'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() ya crea la tabla en bases nuevas; la fila se crea en la
+    # primera lectura o escritura del catálogo
+    if 'catalogo_version' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'catalogo_version',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('token', sa.String(40), nullable=False),
+        sa.Column('modificado_us', sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('catalogo_version')
@@ -0,0 +1,33 @@
+"""Carrito en el servidor (tabla carrito_items)
+
+Revision ID: 010_carrito_items
+Revises: 009_catalogo_version
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_carrito_items'
+down_revision = '009_catalogo_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() ya crea la tabla en bases nuevas
+    if 'carrito_items' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'carrito_items',
+        sa.Column('carrito_id', sa.String(64), primary_key=True),
+        sa.Column('paquete_id', sa.Integer(), sa.ForeignKey('paquetes.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('cantidad', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.Float(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('carrito_items')
@@ -0,0 +1,27 @@
+"""Índice de reservas por paquete y estado (popularidad del autocompletado)
+
+Revision ID: 011_indice_reservas_paquete
+Revises: 010_carrito_items
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_indice_reservas_paquete'
+down_revision = '010_carrito_items'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() ya crea el índice en bases nuevas
+    indices = {i['name'] for i in sa.inspect(op.get_bind()).get_indexes('reservas')}
+    if 'ix_reservas_paquete_id_estado' not in indices:
+        op.create_index('ix_reservas_paquete_id_estado', 'reservas', ['paquete_id', 'estado'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reservas_paquete_id_estado', table_name='reservas')
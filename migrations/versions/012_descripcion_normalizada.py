@@ -0,0 +1,45 @@
+"""Descripción normalizada de destinos para la búsqueda de administración
+
+Revision ID: 012_descripcion_normalizada
+Revises: 011_indice_reservas_paquete
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils import normalizar_texto
+
+
+# revision identifiers, used by Alembic.
+revision = '012_descripcion_normalizada'
+down_revision = '011_indice_reservas_paquete'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conexion = op.get_bind()
+    # db.create_all() ya crea la columna en bases nuevas
+    if 'descripcion_norm' in {c['name'] for c in sa.inspect(conexion).get_columns('destinos')}:
+        return
+    op.add_column('destinos', sa.Column('descripcion_norm', sa.Text(), nullable=True))
+
+    # Rellenar las filas existentes (la normalización se hace en Python)
+    t = sa.table('destinos', sa.column('id'), sa.column('descripcion'), sa.column('descripcion_norm'))
+    ultimo_id = 0
+    while True:
+        filas = conexion.execute(
+            sa.select(t.c.id, t.c.descripcion).where(t.c.id > ultimo_id).order_by(t.c.id).limit(1000)
+        ).all()
+        if not filas:
+            break
+        conexion.execute(
+            t.update().where(t.c.id == sa.bindparam('_id')),
+            [{'_id': id_, 'descripcion_norm': normalizar_texto(descripcion)} for id_, descripcion in filas]
+        )
+        ultimo_id = filas[-1][0]
+
+
+def downgrade():
+    op.drop_column('destinos', 'descripcion_norm')
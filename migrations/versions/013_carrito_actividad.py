@@ -0,0 +1,30 @@
+"""Última escritura de cada artículo del carrito (actividad para la purga)
+
+Revision ID: 013_carrito_actividad
+Revises: 012_descripcion_normalizada
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013_carrito_actividad'
+down_revision = '012_descripcion_normalizada'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() ya crea la columna en bases nuevas
+    if 'actualizado' in {c['name'] for c in sa.inspect(op.get_bind()).get_columns('carrito_items')}:
+        return
+    op.add_column('carrito_items', sa.Column('actualizado', sa.Float(), nullable=False, server_default='0'))
+    # Hasta ahora la actividad era el momento en que se agregó el artículo
+    op.execute('UPDATE carrito_items SET actualizado = timestamp')
+
+
+def downgrade():
+    with op.batch_alter_table('carrito_items') as batch:
+        batch.drop_column('actualizado')
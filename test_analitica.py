@@ -0,0 +1,72 @@
+"""
+Pruebas del cubo de ventas por período
+Los eventos de reservas mantienen el cubo igual a una reconstrucción completa
+"""
+from datetime import date, datetime
+
+
+def test_cubo_por_eventos_y_reconstruccion(app, catalogo, usuario_admin):
+    from app import db
+    from app.models import Reserva
+    from app.services import ReservaService
+    from app.services.analitica import AnaliticaService
+
+    with app.app_context():
+        paquete_ids = catalogo(2)
+
+        r1 = ReservaService.crear_reserva(usuario_admin, {'paquete_id': paquete_ids[0], 'numero_pasajeros': 2})
+        ReservaService.crear_reservas_lote(usuario_admin, [
+            {'paquete_id': paquete_ids[0], 'numero_pasajeros': 1},
+            {'paquete_id': paquete_ids[1], 'numero_pasajeros': 3},
+        ])
+        ReservaService.actualizar_estado_reserva(r1.id, 'cancelada')
+
+        en_vivo = AnaliticaService.reporte('dia', por='paquete')
+        hoy = datetime.utcnow().date().isoformat()
+        assert en_vivo == [
+            {'inicio': hoy, 'paquete': 'Paquete 0', 'reservas': 1, 'pasajeros': 1, 'ingresos': 50000.0},
+            {'inicio': hoy, 'paquete': 'Paquete 1', 'reservas': 1, 'pasajeros': 3, 'ingresos': 50000.0},
+        ]
+        assert AnaliticaService.reconstruir(lote=1) == 2
+        assert AnaliticaService.reporte('dia', por='paquete') == en_vivo
+
+        # Historial en otras fechas: semanas desde el lunes y meses desde el día 1
+        for i, fecha in enumerate([datetime(2026, 3, 4, 10), datetime(2026, 3, 8, 22), datetime(2026, 4, 1, 9)]):
+            db.session.add(Reserva(usuario_id=usuario_admin, paquete_id=paquete_ids[i % 2], estado='confirmada',
+                                   numero_pasajeros=1, fecha_reserva=fecha))
+        db.session.commit()
+        AnaliticaService.reconstruir(lote=2)
+
+        semanas = AnaliticaService.reporte('semana', desde=date(2026, 3, 1), hasta=date(2026, 4, 30))
+        assert [(s['inicio'], s['reservas']) for s in semanas] == [('2026-03-02', 2), ('2026-03-30', 1)]
+        por_destino = AnaliticaService.reporte('mes', desde=date(2026, 3, 15), hasta=date(2026, 3, 31),
+                                               por='destino')
+        assert [(m['destino'], m['reservas']) for m in por_destino] == [(f'Destino {i}', 2) for i in range(3)]
+        assert AnaliticaService.reporte('mes', hasta=date(2026, 12, 31), por='origen')[0] == {
+            'inicio': '2026-03-01', 'origen': 'Santiago', 'reservas': 2, 'pasajeros': 2, 'ingresos': 100000.0}
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = usuario_admin
+    assert cliente.get('/admin/api/ventas?periodo=anio').status_code == 400
+    assert cliente.get('/admin/api/ventas?periodo=mes&desde=2026-04-01&hasta=2026-04-30').get_json() == [
+        {'inicio': '2026-04-01', 'reservas': 1, 'pasajeros': 1, 'ingresos': 50000.0}]
+
+
+def test_cubo_se_llena_al_iniciar_con_reservas_sin_eventos(app, catalogo, usuario_cliente):
+    from app import db
+    from app.models import Reserva
+    from app.services.analitica import AnaliticaService, init_analitica
+
+    with app.app_context():
+        # Como crear_datos_ejemplo.py: reservas insertadas directamente
+        paquete_ids = catalogo(1)
+        db.session.add(Reserva(usuario_id=usuario_cliente, paquete_id=paquete_ids[0], numero_pasajeros=2,
+                               fecha_reserva=datetime(2030, 3, 15)))
+        db.session.commit()
+        assert AnaliticaService.reporte('mes') == []
+
+    init_analitica(app)  # próximo inicio de la app
+    with app.app_context():
+        assert [(f['inicio'], f['reservas'], f['pasajeros']) for f in AnaliticaService.reporte('mes')] == [
+            ('2030-03-01', 1, 2)]
@@ -0,0 +1,109 @@
+"""
+Pruebas del autocompletado de orígenes y destinos
+Responde desde memoria sin consultar la base de datos y se actualiza con
+las escrituras de los servicios
+"""
+from datetime import date
+
+
+def test_sugerencias_por_popularidad_e_incrementales(app, contar_consultas):
+    from app import db
+    from app.services import DestinoService, PaqueteService
+
+    with app.app_context():
+        paine = DestinoService.crear_destino({
+            'nombre': 'Torres del Paine', 'origen': 'Punta Arenas', 'costo_base': 1000
+        })
+        pucon = DestinoService.crear_destino({
+            'nombre': 'Pucón', 'origen': 'Temuco', 'costo_base': 1000
+        })
+        for origen in ('Puerto Montt', 'Punta Arenas', 'Puerto Montt', 'Puerto Montt'):
+            PaqueteService.crear_paquete({
+                'nombre': f'Paquete {origen}', 'origen': origen,
+                'fecha_inicio': date(2030, 1, 1), 'fecha_fin': date(2030, 1, 5),
+                'precio_total': 50000, 'disponibles': 10, 'destinos': [pucon.id]
+            })
+        paine_id = paine.id
+        engine = db.engine
+
+    cliente = app.test_client()
+    with contar_consultas(engine) as sentencias:
+        respuesta = cliente.get('/api/buscar/sugerencias?q=pu&tipo=origen').get_json()
+        # Sin tildes ni mayúsculas y por prefijo de cualquier palabra
+        por_palabra = cliente.get('/api/buscar/sugerencias?q=PAINE').get_json()
+        acentos = cliente.get('/api/buscar/sugerencias?q=pucon&tipo=destino').get_json()
+    assert sentencias == []
+
+    assert [s['texto'] for s in respuesta] == ['Puerto Montt', 'Punta Arenas']
+    # Punta Arenas: origen de un destino y de un paquete
+    assert [s['popularidad'] for s in respuesta] == [3, 2]
+    assert [s['texto'] for s in por_palabra] == ['Torres del Paine']
+    assert acentos == [{'texto': 'Pucón', 'tipo': 'destino', 'popularidad': 1 + 4}]
+
+    with app.app_context():
+        DestinoService.actualizar_destino(paine_id, {'nombre': 'Glaciar Grey'})
+    assert cliente.get('/api/buscar/sugerencias?q=paine').get_json() == []
+    assert cliente.get('/api/buscar/sugerencias?q=gre').get_json()[0]['texto'] == 'Glaciar Grey'
+
+    with app.app_context():
+        DestinoService.eliminar_destino(paine_id)
+    assert cliente.get('/api/buscar/sugerencias?q=gre').get_json() == []
+    # El origen sigue existiendo por el paquete que sale de Punta Arenas
+    assert cliente.get('/api/buscar/sugerencias?q=punta').get_json()[0]['popularidad'] == 1
+
+
+def test_popularidad_por_reservas_y_entre_workers(app, catalogo, contar_consultas, usuario_cliente):
+    from app import create_app, db
+    from app.models import Destino
+    from app.services import DestinoService, ReservaService
+    from app.services.autocompletado import Autocompletado, todos_los_aportes
+    from config import Config
+
+    paquete_ids = catalogo(2)
+    indice = app.extensions['autocompletado']
+    with app.app_context():
+        # El catálogo de prueba se inserta sin pasar por los servicios
+        indice.reemplazar(todos_los_aportes())
+
+    def popularidad(texto):
+        return {s['texto']: s['popularidad'] for s in indice.sugerir(texto)}
+
+    with app.app_context():
+        # Reservar no recalcula los pasajeros con un SUM sobre reservas
+        with contar_consultas(db.engine) as sentencias:
+            reserva = ReservaService.crear_reserva(usuario_cliente, {
+                'paquete_id': paquete_ids[0], 'numero_pasajeros': 3
+            })
+            ReservaService.crear_reservas_lote(usuario_cliente, [
+                {'paquete_id': paquete_ids[1], 'numero_pasajeros': 2},
+                {'paquete_id': paquete_ids[1], 'numero_pasajeros': 1},
+            ])
+        assert not any('sum(reservas.numero_pasajeros)' in s for s in sentencias)
+        # Cada destino aporta 1 a su nombre y está en los dos paquetes (1 + 3 cada uno)
+        assert popularidad('destino 0') == {'Destino 0': 9}
+        assert popularidad('santiago') == {'Santiago': 8}
+
+        ReservaService.actualizar_estado_reserva(reserva.id, 'cancelada')
+        assert popularidad('destino 0') == {'Destino 0': 6}
+        reconstruido = Autocompletado()
+        reconstruido.actualizar(todos_los_aportes())
+        assert reconstruido.sugerir('destino') == indice.sugerir('destino')
+
+    # Otro worker renombra un destino: este índice lo ve en la siguiente revisión
+    class ConfigWorkerB(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = app.config['SQLALCHEMY_DATABASE_URI']
+        SQLALCHEMY_ENGINE_OPTIONS = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+
+    worker_b = create_app(ConfigWorkerB)
+    with worker_b.app_context():
+        destino_id = Destino.query.order_by(Destino.id).first().id
+        DestinoService.actualizar_destino(destino_id, {'nombre': 'Chiloé'})
+        db.engine.dispose()
+
+    cliente = app.test_client()
+    assert cliente.get('/api/buscar/sugerencias?q=chiloe').get_json() == []
+    indice.proxima_revision = 0
+    assert cliente.get('/api/buscar/sugerencias?q=chiloe').get_json() == [
+        {'texto': 'Chiloé', 'tipo': 'destino', 'popularidad': 1 + 1 + 4}
+    ]
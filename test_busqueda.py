@@ -0,0 +1,51 @@
+"""
+Pruebas de la sincronización del índice de búsqueda
+Los cambios de cupos no reindexan y un fallo del índice no hace fallar la escritura
+"""
+import logging
+
+from sqlalchemy.exc import OperationalError
+
+
+def test_indice_ignora_cupos_y_tolera_fallos(app, caplog, monkeypatch, catalogo, contar_consultas, usuario_cliente):
+    from app import db
+    from app.models import Paquete
+    from app.services import PaqueteService, ReservaService
+
+    with app.app_context():
+        paquete_ids = catalogo(2)
+
+        with contar_consultas(db.engine) as sentencias:
+            ReservaService.crear_reserva(usuario_cliente, {'paquete_id': paquete_ids[0]})
+        assert not any('paquetes_fts' in s for s in sentencias)
+
+        indice = app.extensions['indice_busqueda']
+
+        def fallar(*args, **kwargs):
+            raise OperationalError('INSERT INTO paquetes_fts', {}, Exception('disco lleno'))
+
+        monkeypatch.setattr(indice, 'guardar', fallar)
+        with caplog.at_level(logging.ERROR):
+            PaqueteService.actualizar_paquete(paquete_ids[1], {'nombre': 'Kayak en Chiloé'})
+        assert 'No se pudo actualizar el índice de búsqueda' in caplog.text
+        assert db.session.get(Paquete, paquete_ids[1]).nombre == 'Kayak en Chiloé'
+        monkeypatch.undo()
+
+        PaqueteService.actualizar_paquete(paquete_ids[1], {'origen': 'Puerto Montt'})
+
+    encontrados = app.test_client().get('/api/buscar', query_string={'q': 'kayak chiloe'}).get_json()
+    assert [p['id'] for p in encontrados] == [paquete_ids[1]]
+
+
+def test_busqueda_sin_paginar_devuelve_todo(app, catalogo):
+    from app.services.busqueda import reconstruir_indice
+
+    paquete_ids = catalogo(501)
+    with app.app_context():
+        reconstruir_indice()
+
+    cliente = app.test_client()
+    # Sin ?limit= no hay tope de resultados
+    assert len(cliente.get('/api/buscar?q=paquete').get_json()) == len(paquete_ids)
+    pagina = cliente.get('/api/buscar?q=paquete&limit=100')
+    assert len(pagina.get_json()) == 100 and 'rel="next"' in pagina.headers['Link']
@@ -0,0 +1,130 @@
+"""
+Pruebas del carrito
+Verifica que GET /api/carrito ejecute un número constante de consultas SQL
+sin importar cuántos paquetes ni unidades tenga el carrito, y las
+operaciones y la purga de ambos backends (tabla y memoria)
+"""
+import pytest
+
+
+def consultas_obtener_carrito(app, contar_consultas, paquete_ids, unidades):
+    from app import db
+
+    cliente = app.test_client()
+    for paquete_id in paquete_ids:
+        respuesta = cliente.post('/api/carrito/agregar', json={
+            'tipo': 'paquete', 'id': paquete_id, 'cantidad': unidades
+        })
+        assert respuesta.status_code == 200
+
+    with app.app_context():
+        engine = db.engine
+    with contar_consultas(engine) as sentencias:
+        datos = cliente.get('/api/carrito').get_json()
+
+    assert datos['cantidad'] == len(paquete_ids) * unidades
+    assert all(len(item['destinos']) == 3 for item in datos['items'])
+    return len(sentencias)
+
+
+def test_obtener_carrito_consultas_constantes(app, catalogo, contar_consultas):
+
+    with app.app_context():
+        paquete_ids = catalogo(20)
+
+    pequeno = consultas_obtener_carrito(app, contar_consultas, paquete_ids[:1], 1)
+    grande = consultas_obtener_carrito(app, contar_consultas, paquete_ids, 10)
+
+    assert grande == pequeno
+
+
+@pytest.mark.parametrize('backend', ['tabla', 'memoria'])
+def test_store_operaciones_y_purga(app, backend, catalogo):
+    import time
+    from app.services.carrito_store import MemoriaCarritoStore, TablaCarritoStore
+
+    with app.app_context():
+        paquete_ids = catalogo(3)
+        store = TablaCarritoStore() if backend == 'tabla' else MemoriaCarritoStore()
+
+        store.agregar('a', paquete_ids[0], 2)
+        store.agregar('a', paquete_ids[1], 1)
+        store.agregar('a', paquete_ids[0], 1)
+        store.establecer('a', paquete_ids[1], 5)
+        assert [(p, c) for p, c, _ in store.obtener('a')] == [(paquete_ids[0], 3), (paquete_ids[1], 5)]
+        assert store.quitar('a', paquete_ids[1], 5)
+        assert not store.quitar('a', paquete_ids[2])
+        assert [(p, c) for p, c, _ in store.obtener('a')] == [(paquete_ids[0], 3)]
+
+        store.agregar('b', paquete_ids[2], 1)
+        assert store.purgar(time.time() - 60) == 0
+        store.vaciar('b')
+        assert store.obtener('b') == []
+
+        # Un límite posterior a la última actividad vence el carrito
+        assert store.purgar(time.time() + 1) == 1
+        assert store.obtener('a') == []
+
+
+def test_store_tabla_purga_al_agregar(app, catalogo):
+    import time
+    from app import db
+    from app.models.carrito import CarritoItem
+    from app.services.carrito_store import TablaCarritoStore
+
+    with app.app_context():
+        paquete_ids = catalogo(2)
+        hace_40_dias = time.time() - 40 * 86400
+        for carrito_id in ('viejo', 'activo'):
+            db.session.add(CarritoItem(carrito_id=carrito_id, paquete_id=paquete_ids[0], cantidad=1,
+                                       timestamp=hace_40_dias, actualizado=hace_40_dias))
+        db.session.commit()
+        store = TablaCarritoStore(ttl=30 * 86400, intervalo_purga=0)
+        # Cambiar la cantidad de un artículo antiguo cuenta como actividad
+        store.establecer('activo', paquete_ids[0], 2)
+        store.agregar('nuevo', paquete_ids[1], 1)
+        assert store.obtener('viejo') == []
+        assert store.obtener('activo') == [(paquete_ids[0], 2, hace_40_dias)]
+        assert len(store.obtener('nuevo')) == 1
+
+
+def test_store_tabla_agregar_concurrente(app, catalogo, monkeypatch):
+    from app.services.carrito_store import TablaCarritoStore
+
+    with app.app_context():
+        paquete_id = catalogo(1)[0]
+        store = TablaCarritoStore()
+        store.agregar('a', paquete_id, 2)
+
+        # Otra petición inserta la fila entre el UPDATE (sin filas) y el INSERT de esta
+        actualizar = TablaCarritoStore._actualizar
+        llamadas = []
+
+        def sin_fila_la_primera_vez(*args, **kwargs):
+            llamadas.append(args)
+            return 0 if len(llamadas) == 1 else actualizar(*args, **kwargs)
+
+        monkeypatch.setattr(store, '_actualizar', sin_fila_la_primera_vez)
+        store.agregar('a', paquete_id, 3)
+        assert len(llamadas) == 2
+        assert [(p, c) for p, c, _ in store.obtener('a')] == [(paquete_id, 5)]
+
+
+def test_store_memoria_lru_y_ttl(monkeypatch):
+    import time
+    from app.services.carrito_store import MemoriaCarritoStore
+
+    store = MemoriaCarritoStore(max_carritos=2, ttl=60)
+    store.agregar('a', 1, 1)
+    store.agregar('b', 1, 1)
+    store.agregar('a', 2, 1)  # 'a' pasa a ser el más reciente
+    store.agregar('c', 1, 1)  # excede el máximo: se descarta 'b'
+    assert store.obtener('b') == []
+    assert [p for p, _, _ in store.obtener('a')] == [1, 2]
+
+    # Pasado el TTL, la siguiente escritura descarta los carritos inactivos
+    ahora = time.time()
+    monkeypatch.setattr(time, 'time', lambda: ahora + 120)
+    store.agregar('d', 1, 1)
+    assert store.obtener('a') == [] and store.obtener('c') == []
+    assert len(store.obtener('d')) == 1
@@ -0,0 +1,41 @@
+"""
+Pruebas de la caché del catálogo
+Las lecturas repetidas no tocan la base de datos y las escrituras de los
+servicios invalidan solo las respuestas afectadas
+"""
+
+
+def test_catalogo_cacheado_e_invalidado_por_servicios(app, catalogo, contar_consultas, usuario_cliente):
+    from app import db
+    from app.services import DestinoService, ReservaService
+
+    with app.app_context():
+        paquete_ids = catalogo(3)
+        engine = db.engine
+
+    cliente = app.test_client()
+    primera = cliente.get('/api/paquetes').get_json()
+    cliente.get(f'/api/paquetes/{paquete_ids[1]}')
+
+    with contar_consultas(engine) as sentencias:
+        assert cliente.get('/api/paquetes').get_json() == primera
+        cliente.get(f'/api/paquetes/{paquete_ids[1]}')
+    assert all('FROM catalogo_version' in s for s in sentencias)
+
+    # Una reserva cambia los cupos: la lista y el paquete reservado se invalidan
+    with app.app_context():
+        ReservaService.crear_reserva(usuario_cliente, {'paquete_id': paquete_ids[0], 'numero_pasajeros': 2})
+    lista = cliente.get('/api/paquetes').get_json()
+    assert lista[0]['disponibles'] == 48
+
+    # El detalle de otro paquete sigue en caché
+    with contar_consultas(engine) as sentencias:
+        cliente.get(f'/api/paquetes/{paquete_ids[1]}')
+    assert all('FROM catalogo_version' in s for s in sentencias)
+
+    # Cambiar un destino invalida los paquetes que lo incluyen
+    with app.app_context():
+        destino_id = lista[0]['destinos'][0]['id']
+        DestinoService.actualizar_destino(destino_id, {'nombre': 'Renombrado'})
+    detalle = cliente.get(f'/api/paquetes/{paquete_ids[1]}').get_json()
+    assert detalle['destinos'][0]['nombre'] == 'Renombrado'
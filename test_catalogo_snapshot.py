@@ -0,0 +1,65 @@
+"""
+Pruebas del snapshot del catálogo compartido entre workers
+Se construye al iniciar, se regenera tras una escritura y se sirve por trozos
+desde el mmap (comprimido una vez por versión)
+"""
+import gzip
+import json
+
+
+def crear_app_snapshot(app, ruta):
+    """Otra app sobre la misma base de datos con el snapshot activo"""
+    from app import create_app
+    from config import Config
+
+    class ConfigSnapshot(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = app.config['SQLALCHEMY_DATABASE_URI']
+        SQLALCHEMY_ENGINE_OPTIONS = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        CATALOGO_SNAPSHOT_PATH = str(ruta)
+        CATALOGO_SNAPSHOT_INTERVALO = 0
+
+    return create_app(ConfigSnapshot)
+
+
+def test_snapshot_se_construye_regenera_y_sirve(app, tmp_path, catalogo):
+    from sqlalchemy import update
+    from app import db
+    from app.models import Paquete
+    from app.services import PaqueteService
+
+    paquete_ids = catalogo(20)
+    ruta = tmp_path / 'catalogo.snapshot'
+    app_snapshot = crear_app_snapshot(app, ruta)
+    assert ruta.exists()
+
+    cliente = app_snapshot.test_client()
+    respuesta = cliente.get('/api/paquetes')
+    assert respuesta.is_streamed
+    assert int(respuesta.headers['Content-Length']) == len(respuesta.data)
+    paquetes = respuesta.get_json()
+    assert [p['id'] for p in paquetes] == paquete_ids
+    assert len(cliente.get('/api/destinos').get_json()) == 3
+
+    # Variante comprimida generada desde el snapshot
+    comprimida = cliente.get('/api/paquetes', headers={'Accept-Encoding': 'gzip'})
+    assert comprimida.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(comprimida.data)) == paquetes
+
+    # Una escritura de los servicios regenera el archivo y el lector lo vuelve a mapear
+    with app_snapshot.app_context():
+        PaqueteService.actualizar_paquete(paquete_ids[0], {'nombre': 'Paquete renombrado'})
+    assert cliente.get('/api/paquetes').get_json()[0]['nombre'] == 'Paquete renombrado'
+    comprimida = cliente.get('/api/paquetes', headers={'Accept-Encoding': 'gzip'})
+    assert json.loads(gzip.decompress(comprimida.data))[0]['nombre'] == 'Paquete renombrado'
+
+    # Un cambio hecho sin la app (sin evento) se recoge al iniciar otra vez
+    with app.app_context():
+        db.session.execute(update(Paquete).where(Paquete.id == paquete_ids[1]).values(nombre='Cambio externo'))
+        db.session.commit()
+    reiniciada = crear_app_snapshot(app, ruta)
+    assert reiniciada.test_client().get('/api/paquetes').get_json()[1]['nombre'] == 'Cambio externo'
+
+    for otra in (app_snapshot, reiniciada):
+        with otra.app_context():
+            db.engine.dispose()
@@ -0,0 +1,76 @@
+"""
+Pruebas de las peticiones condicionales del catálogo
+Un ETag vigente responde 304 sin consultar la base de datos; una escritura
+de los servicios lo invalida
+"""
+
+def test_etag_y_304_sin_consultas(app, catalogo, contar_consultas):
+    from app import db
+    from app.services import PaqueteService
+
+    with app.app_context():
+        paquete_ids = catalogo(2)
+        engine = db.engine
+
+    cliente = app.test_client()
+    primera = cliente.get(f'/api/paquetes/{paquete_ids[0]}')
+    etag = primera.headers['ETag']
+    assert primera.status_code == 200 and 'no-cache' in primera.headers['Cache-Control']
+
+    with contar_consultas(engine) as sentencias:
+        assert cliente.get(f'/api/paquetes/{paquete_ids[0]}', headers={'If-None-Match': etag}).status_code == 304
+        assert cliente.get('/api/destinos', headers={'If-None-Match': etag}).status_code == 304
+        assert cliente.get('/api/paquetes', headers={
+            'If-Modified-Since': primera.headers['Last-Modified']
+        }).status_code == 304
+    # Solo se lee la versión compartida (una fila por clave primaria)
+    assert len(sentencias) == 3 and all('FROM catalogo_version' in s for s in sentencias)
+
+    with app.app_context():
+        PaqueteService.actualizar_paquete(paquete_ids[0], {'nombre': 'Nuevo nombre'})
+    respuesta = cliente.get(f'/api/paquetes/{paquete_ids[0]}', headers={'If-None-Match': etag})
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['nombre'] == 'Nuevo nombre'
+    assert respuesta.headers['ETag'] != etag
+    # Un 404 no lleva ETag
+    assert 'ETag' not in cliente.get('/api/paquetes/999').headers
+
+
+def test_version_compartida_por_archivo(tmp_path):
+    from app.services.catalogo_version import VersionCatalogo
+
+    ruta = tmp_path / 'catalogo.version'
+    cambios = []
+    worker_a = VersionCatalogo(str(ruta), al_cambiar=lambda: cambios.append('a'))
+    worker_b = VersionCatalogo(str(ruta), al_cambiar=lambda: cambios.append('b'))
+    assert worker_a.actual() == worker_b.actual()
+    worker_a.incrementar()
+    # B ve la versión nueva y descarta su caché local; A no se avisa a sí mismo
+    assert worker_b.actual() == worker_a.actual()
+    assert cambios == ['b']
+
+
+def test_version_compartida_por_tabla_entre_workers(app, catalogo):
+    from app import create_app, db
+    from app.services import PaqueteService
+    from config import Config
+
+    paquete_id = catalogo(1)[0]
+    # Segundo worker sobre la misma base de datos
+    class ConfigWorkerB(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = app.config['SQLALCHEMY_DATABASE_URI']
+        SQLALCHEMY_ENGINE_OPTIONS = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+
+    worker_b = create_app(ConfigWorkerB)
+
+    cliente_a = app.test_client()
+    etag = cliente_a.get(f'/api/paquetes/{paquete_id}').headers['ETag']
+    with worker_b.app_context():
+        PaqueteService.actualizar_paquete(paquete_id, {'disponibles': 0})
+
+    respuesta = cliente_a.get(f'/api/paquetes/{paquete_id}', headers={'If-None-Match': etag})
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['disponibles'] == 0
+    with worker_b.app_context():
+        db.engine.dispose()
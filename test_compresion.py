@@ -0,0 +1,44 @@
+"""
+Pruebas de la compresión de respuestas
+gzip negociado, 304 con ETag de la variante comprimida y caché de precomprimidos
+"""
+import gzip
+import json
+
+
+def test_catalogo_comprimido_una_vez_y_304(app, monkeypatch, catalogo):
+    from app.services import compresion
+
+    catalogo(30)
+
+    llamadas = []
+    original = compresion.comprimir
+    monkeypatch.setattr(compresion, 'comprimir', lambda *a: llamadas.append(a[1]) or original(*a))
+
+    cliente = app.test_client()
+    plano = cliente.get('/api/paquetes')
+    assert 'Content-Encoding' not in plano.headers
+
+    respuesta = cliente.get('/api/paquetes', headers={'Accept-Encoding': 'gzip'})
+    assert respuesta.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in respuesta.headers['Vary']
+    assert json.loads(gzip.decompress(respuesta.data)) == plano.get_json()
+    etag = respuesta.headers['ETag']
+    assert etag == plano.headers['ETag'][:-1] + '-gzip"'
+
+    # Segunda lectura: la variante sale de la caché, sin volver a comprimir
+    otra = cliente.get('/api/paquetes', headers={'Accept-Encoding': 'gzip'})
+    assert otra.data == respuesta.data
+    assert llamadas == ['gzip']
+
+    no_modificado = cliente.get('/api/paquetes', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert no_modificado.status_code == 304
+    assert no_modificado.headers['ETag'] == etag
+
+    # Archivo estático: también se comprime y se valida con el ETag sufijado
+    estatico = cliente.get('/static/js/carrito.js', headers={'Accept-Encoding': 'gzip'})
+    assert estatico.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(estatico.data) == cliente.get('/static/js/carrito.js').data
+    revalidado = cliente.get('/static/js/carrito.js', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': estatico.headers['ETag']})
+    assert revalidado.status_code == 304
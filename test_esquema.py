@@ -0,0 +1,48 @@
+"""
+Pruebas del arranque sobre una base de datos sin migrar
+create_app no consulta columnas nuevas antes de `flask db upgrade`
+"""
+import logging
+from datetime import date
+
+
+def test_create_app_con_esquema_sin_migrar(tmp_path, caplog):
+    from sqlalchemy import MetaData, Table, create_engine, insert, text
+    from app import create_app, db
+    from app.models import Paquete
+    from config import Config
+
+    class ConfigPrueba(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "vieja.db"}'
+        CATALOGO_SNAPSHOT_PATH = str(tmp_path / 'catalogo.snapshot')
+
+    # Tabla de paquetes como antes de 002_columnas_normalizadas, con un paquete
+    engine = create_engine(ConfigPrueba.SQLALCHEMY_DATABASE_URI)
+    vieja = Table('paquetes', MetaData(), *(
+        c._copy() for c in Paquete.__table__.columns if not c.name.endswith('_norm')
+    ))
+    vieja.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(vieja).values(nombre='Sur', origen='Santiago', fecha_inicio=date(2030, 1, 1),
+                                          fecha_fin=date(2030, 1, 5), precio_total=50000, disponibles=10))
+
+    with caplog.at_level(logging.WARNING):
+        app = create_app(ConfigPrueba)
+    assert app.extensions['esquema_al_dia'] is False
+    assert 'paquetes.nombre_norm' in caplog.text
+    assert 'catalogo_snapshot' not in app.extensions
+    with app.app_context():
+        db.engine.dispose()
+
+    # Lo que hace la migración: con el esquema al día se construye todo al iniciar
+    with engine.begin() as conn:
+        for columna in ('nombre_norm', 'origen_norm'):
+            conn.execute(text(f'ALTER TABLE paquetes ADD COLUMN {columna} VARCHAR(200)'))
+    engine.dispose()
+    app = create_app(ConfigPrueba)
+    assert app.extensions['esquema_al_dia'] is True
+    with app.app_context():
+        assert not app.extensions['indice_busqueda'].vacio()
+        db.engine.dispose()
+    assert app.test_client().get('/api/paquetes').get_json()[0]['nombre'] == 'Sur'
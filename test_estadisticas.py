@@ -0,0 +1,89 @@
+"""
+Pruebas de las estadísticas acumuladas del dashboard
+Los contadores incrementales coinciden con una reconstrucción completa
+"""
+from datetime import date
+
+
+def _valores(estadisticas):
+    columnas = ('destinos', 'paquetes', 'paquetes_agotados', 'reservas', 'confirmadas',
+                'canceladas', 'pasajeros')
+    return {c: getattr(estadisticas, c) for c in columnas} | {'ingresos': float(estadisticas.ingresos)}
+
+
+def test_contadores_incrementales_y_dashboard(app, contar_consultas, usuario_admin):
+    from app import db
+    from app.services import DestinoService, PaqueteService, ReservaService
+    from app.services.estadisticas import EstadisticasService
+
+    with app.app_context():
+        destino = DestinoService.crear_destino({'nombre': 'Torres', 'costo_base': 1000})
+        DestinoService.crear_destino({'nombre': 'Chiloé', 'costo_base': 1000})
+        paquetes = [
+            PaqueteService.crear_paquete({
+                'nombre': f'Paquete {i}', 'fecha_inicio': date(2030, 1, 1), 'fecha_fin': date(2030, 1, 5),
+                'precio_total': 1000 * (i + 1), 'disponibles': 3, 'destinos': [destino.id]
+            }).id
+            for i in range(3)
+        ]
+
+        r1 = ReservaService.crear_reserva(usuario_admin, {'paquete_id': paquetes[0], 'numero_pasajeros': 3})
+        ReservaService.crear_reservas_lote(usuario_admin, [
+            {'paquete_id': paquetes[1], 'numero_pasajeros': 1},
+            {'paquete_id': paquetes[1], 'numero_pasajeros': 2},
+            {'paquete_id': paquetes[2], 'numero_pasajeros': 1},
+        ])
+        r3 = ReservaService.crear_reserva(usuario_admin, {'paquete_id': paquetes[2]})
+        ReservaService.actualizar_estado_reserva(r3.id, 'cancelada')
+        ReservaService.actualizar_estado_reserva(r1.id, 'cancelada')
+        ReservaService.actualizar_estado_reserva(r1.id, 'confirmada')
+        PaqueteService.actualizar_paquete(paquetes[1], {'precio_total': 5000})
+        PaqueteService.actualizar_paquete(paquetes[2], {'disponibles': 0})
+        ReservaService.eliminar_reserva(r3.id)
+
+        incremental = _valores(EstadisticasService.obtener())
+        assert incremental == {
+            'destinos': 2, 'paquetes': 3, 'paquetes_agotados': 3, 'reservas': 4, 'confirmadas': 4,
+            'canceladas': 0, 'pasajeros': 7, 'ingresos': 1000 + 2 * 5000 + 3000,
+        }
+        assert [tuple(f) for f in EstadisticasService.paquetes_mas_reservados()] == [
+            ('Paquete 1', 2), ('Paquete 0', 1), ('Paquete 2', 1)]
+
+        ReservaService.actualizar_estado_reserva(r1.id, 'cancelada')
+        PaqueteService.eliminar_paquete(paquetes[0])
+        incremental = _valores(EstadisticasService.obtener())
+        assert incremental == _valores(EstadisticasService.reconstruir())
+        assert incremental['paquetes'] == 2 and incremental['reservas'] == 3
+        engine = db.engine
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = usuario_admin
+    with contar_consultas(engine) as consultas:
+        respuesta = cliente.get('/admin/')
+    assert respuesta.status_code == 200
+    assert not any('count(' in sql.lower() for sql in consultas)
+
+
+def test_datos_insertados_sin_servicios_se_recalculan(app, catalogo, usuario_cliente):
+    from app import db
+    from app.models import Reserva, EstadisticasPaquete
+    from app.services import ReservaService
+    from app.services.estadisticas import EstadisticasService, init_estadisticas
+
+    with app.app_context():
+        # Como crear_datos_ejemplo.py: inserciones directas después de create_app
+        paquete_ids = catalogo(2)
+        db.session.add(Reserva(usuario_id=usuario_cliente, paquete_id=paquete_ids[0]))
+        db.session.commit()
+        assert not EstadisticasService.al_dia()
+
+        # Un paquete sin fila de estadísticas la recibe al reservarse
+        ReservaService.crear_reserva(usuario_cliente, {'paquete_id': paquete_ids[1], 'numero_pasajeros': 2})
+        assert db.session.get(EstadisticasPaquete, paquete_ids[1]).pasajeros == 2
+
+    init_estadisticas(app)  # al iniciar otro worker
+    with app.app_context():
+        assert EstadisticasService.al_dia()
+        assert _valores(EstadisticasService.obtener()) == _valores(EstadisticasService.reconstruir())
+        assert EstadisticasService.obtener().reservas == 2
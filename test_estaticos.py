@@ -0,0 +1,24 @@
+"""
+Pruebas de los estáticos con huella
+La URL cambia con el contenido y se sirve con caché inmutable
+"""
+
+
+def test_url_con_huella_inmutable(app):
+    from app.services.estaticos import url_estatico
+
+    with app.test_request_context():
+        url = url_estatico('js/carrito.js')
+        assert url_estatico('no/existe.js') == '/static/no/existe.js'
+    assert url.startswith('/static/js/carrito.') and url != '/static/js/carrito.js'
+
+    cliente = app.test_client()
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200
+    assert respuesta.data == cliente.get('/static/js/carrito.js').data
+    assert respuesta.cache_control.immutable
+    assert respuesta.cache_control.max_age == 365 * 24 * 3600
+
+    # La URL sin huella se sigue revalidando
+    assert not cliente.get('/static/js/carrito.js').cache_control.immutable
+    assert cliente.get('/static/js/carrito.000000000000.js').status_code == 404
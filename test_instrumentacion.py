@@ -0,0 +1,39 @@
+"""
+Pruebas de la medición de consultas SQL por petición
+Cuenta las consultas en Server-Timing y advierte cuando una se repite (N+1)
+"""
+import logging
+import re
+
+
+def test_server_timing_y_advertencia_n1(app, caplog, catalogo):
+    from app import db
+    from app.models import Paquete
+    from app.services.instrumentacion import forma_consulta
+
+    app.config.update(INSTRUMENTACION_SERVER_TIMING=True, INSTRUMENTACION_N1_UMBRAL=3)
+
+    def paquetes_uno_a_uno():
+        ids = [p.id for p in Paquete.query.all()]
+        return {'nombres': [db.session.get(Paquete, i, populate_existing=True).nombre for i in ids]}
+
+    app.add_url_rule('/prueba/n1', 'prueba_n1', paquetes_uno_a_uno)
+    catalogo(4)
+
+    assert forma_consulta("SELECT * FROM t WHERE id IN (?, ?,?) AND n = 'x'  LIMIT 10") == \
+        'SELECT * FROM t WHERE id IN (?) AND n = ? LIMIT ?'
+
+    cliente = app.test_client()
+    with caplog.at_level(logging.WARNING):
+        respuesta = cliente.get('/api/paquetes')
+    cabecera = respuesta.headers['Server-Timing']
+    assert re.fullmatch(r'db;dur=[\d.]+;desc="\d+ consultas, 0 repetidas", app;dur=[\d.]+', cabecera)
+    assert 'N+1' not in caplog.text
+
+    with caplog.at_level(logging.WARNING):
+        respuesta = cliente.get('/prueba/n1')
+    assert 'desc="5 consultas, 3 repetidas"' in respuesta.headers['Server-Timing']
+    assert 'Posible N+1 en GET /prueba/n1 (prueba_n1): 4 ejecuciones de SELECT' in caplog.text
+
+    app.config['INSTRUMENTACION_SERVER_TIMING'] = False
+    assert 'Server-Timing' not in cliente.get('/api/paquetes').headers
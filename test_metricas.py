@@ -0,0 +1,84 @@
+"""
+Pruebas de las métricas de Prometheus (/metrics)
+Latencia por endpoint, contadores de reservas y suma entre procesos
+"""
+import os
+import subprocess
+import sys
+
+
+def test_metricas_de_peticiones_y_reservas(app, catalogo, usuario_cliente):
+    from app.services.reserva_service import ReservaService
+
+    with app.app_context():
+        paquete_ids = catalogo(1)
+        reserva = ReservaService.crear_reserva(usuario_cliente, {'paquete_id': paquete_ids[0], 'numero_pasajeros': 3})
+        ReservaService.crear_reserva(usuario_cliente, {'paquete_id': paquete_ids[0]})
+        ReservaService.actualizar_estado_reserva(reserva.id, 'cancelada')
+        ReservaService.actualizar_estado_reserva(reserva.id, 'confirmada')
+        ReservaService.eliminar_reserva(reserva.id)
+
+    cliente = app.test_client()
+    cliente.get('/api/paquetes')
+    cliente.get('/api/paquetes/999999')
+    # Sin token ni METRICAS_PUBLICAS la ruta no se expone
+    assert cliente.get('/metrics').status_code == 404
+    app.config['METRICAS_PUBLICAS'] = True
+    texto = cliente.get('/metrics').get_data(as_text=True)
+    lineas = set(texto.splitlines())
+
+    assert '# TYPE turismo_http_duracion_segundos histogram' in lineas
+    assert ('turismo_http_duracion_segundos_bucket{endpoint="paquetes.listar",estado="200",metodo="GET",le="+Inf"} 1'
+            in lineas)
+    assert 'turismo_http_duracion_segundos_count{endpoint="paquetes.obtener",estado="404",metodo="GET"} 1' in lineas
+    assert 'turismo_http_sql_segundos_count{endpoint="paquetes.listar"} 1' in lineas
+    assert 'turismo_reservas_creadas_total 2' in lineas
+    assert 'turismo_reservas_canceladas_total 1' in lineas
+    assert 'turismo_cupos_vendidos_total 7' in lineas  # 3 + 1 + 3 al reconfirmar
+    assert 'turismo_cupos_liberados_total 6' in lineas  # cancelación y eliminación
+    assert any(l.startswith('turismo_db_pool_conexiones{estado="en_uso"} ') for l in lineas)
+
+    app.config['METRICAS_TOKEN'] = 'secreto'
+    assert cliente.get('/metrics').status_code == 403
+    assert cliente.get('/metrics', headers={'Authorization': 'Bearer secreto'}).status_code == 200
+
+
+def test_metricas_se_suman_entre_procesos(tmp_path):
+    from app.services.metricas import RegistroMetricas
+
+    # Otro worker (ya terminado) deja su archivo en el directorio compartido
+    codigo = (
+        'from app.services.metricas import RegistroMetricas\n'
+        f'r = RegistroMetricas({str(tmp_path)!r})\n'
+        'r.incrementar("turismo_reservas_creadas_total", 5)\n'
+        'r.observar("turismo_http_duracion_segundos", 0.02, endpoint="web.index", metodo="GET", estado="200")\n'
+        'r.guardar([("turismo_db_pool_conexiones", (("estado", "en_uso"),), 4)], forzar=True)\n'
+    )
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, '-c', codigo], cwd=raiz, check=True)
+
+    registro = RegistroMetricas(str(tmp_path))
+    registro.incrementar('turismo_reservas_creadas_total', 2)
+    registro.observar('turismo_http_duracion_segundos', 3, endpoint='web.index', metodo='GET', estado='200')
+    lineas = registro.exponer([('turismo_db_pool_conexiones', (('estado', 'en_uso'),), 1)]).splitlines()
+
+    etiquetas = 'endpoint="web.index",estado="200",metodo="GET"'
+    esperadas = [
+        'turismo_reservas_creadas_total 7',
+        f'turismo_http_duracion_segundos_bucket{{{etiquetas},le="0.025"}} 1',
+        f'turismo_http_duracion_segundos_bucket{{{etiquetas},le="+Inf"}} 2',
+        f'turismo_http_duracion_segundos_sum{{{etiquetas}}} 3.02',
+        # El medidor del proceso terminado ya no cuenta
+        'turismo_db_pool_conexiones{estado="en_uso"} 1',
+    ]
+    assert all(linea in lineas for linea in esperadas)
+
+    # El archivo del proceso terminado se fusiona en terminados.json sin cambiar los totales
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', codigo], cwd=raiz, check=True)
+    assert registro.compactar() == 3
+    assert sorted(p.name for p in tmp_path.glob('*.json')) == ['terminados.json']
+    lineas = registro.exponer([('turismo_db_pool_conexiones', (('estado', 'en_uso'),), 1)]).splitlines()
+    assert 'turismo_reservas_creadas_total 17' in lineas
+    assert f'turismo_http_duracion_segundos_bucket{{{etiquetas},le="+Inf"}} 4' in lineas
+    assert 'turismo_db_pool_conexiones{estado="en_uso"} 1' in lineas
@@ -0,0 +1,92 @@
+"""
+Pruebas de las columnas normalizadas (*_norm) y de filtro_prefijo
+Las búsquedas por prefijo ignoran tildes y mayúsculas, y los @validates
+mantienen las columnas normalizadas al día cuando cambia el original
+"""
+from datetime import date
+
+
+def test_filtro_prefijo_sin_tildes_ni_mayusculas(app):
+    from app import db
+    from app.blueprints.buscar import filtrar_texto_sin_indice
+    from app.models import Destino, Paquete, PaqueteDestino
+    from app.utils import filtro_prefijo
+
+    with app.app_context():
+        valparaiso = Destino(nombre='Valparaíso', descripcion='Puerto', actividades='Cerros', costo_base=1000)
+        concepcion = Destino(nombre='Concepción', descripcion='Biobío', actividades='Río', costo_base=1000)
+        paquete = Paquete(nombre='Costa', origen='Concepción', fecha_inicio=date(2030, 1, 1),
+                          fecha_fin=date(2030, 1, 5), precio_total=50000, disponibles=10)
+        db.session.add_all([valparaiso, concepcion, paquete])
+        db.session.flush()
+        db.session.add(PaqueteDestino(paquete_id=paquete.id, destino_id=valparaiso.id))
+        db.session.commit()
+
+        def nombres(texto):
+            return [d.nombre for d in Destino.query.filter(filtro_prefijo(Destino.nombre_norm, texto))]
+
+        assert nombres('VALPARAÍSO') == ['Valparaíso']
+        assert nombres('valpa') == ['Valparaíso']
+        assert nombres('concepcion') == ['Concepción']
+        assert nombres('CONCEPCIÓN  ') == ['Concepción']
+        assert nombres('valparaiso de chile') == []
+
+        assert filtrar_texto_sin_indice(Paquete.query, origen='concepcion').all() == [paquete]
+        assert filtrar_texto_sin_indice(Paquete.query, destino='VALPARAÍSO').all() == [paquete]
+        assert filtrar_texto_sin_indice(Paquete.query, destino='concepcion').all() == []
+
+
+def test_validates_actualiza_columnas_normalizadas(app, crear_usuario):
+    from app import db
+    from app.models import Destino, Paquete, Usuario
+    from app.services import PaqueteService
+
+    with app.app_context():
+        destino = Destino(nombre='Pucón', origen='Temuco', descripcion='Lago', actividades='Volcán',
+                          costo_base=1000)
+        paquete = Paquete(nombre='Sur', origen='Santiago', fecha_inicio=date(2030, 1, 1),
+                          fecha_fin=date(2030, 1, 5), precio_total=50000, disponibles=10)
+        db.session.add_all([destino, paquete])
+        db.session.commit()
+        usuario = db.session.get(Usuario, crear_usuario(nombre_completo='José Núñez'))
+        assert (destino.nombre_norm, usuario.nombre_completo_norm) == ('pucon', 'jose nunez')
+
+        destino.nombre = 'Viña del Mar'
+        destino.origen = 'ÑUÑOA'
+        usuario.nombre_completo = 'María  Ávila'
+        db.session.commit()
+        PaqueteService.actualizar_paquete(paquete.id, {'nombre': 'Atacameño', 'origen': 'Copiapó'})
+        db.session.expire_all()
+
+        assert (destino.nombre_norm, destino.origen_norm) == ('vina del mar', 'nunoa')
+        assert usuario.nombre_completo_norm == 'maria avila'
+        paquete = db.session.get(Paquete, paquete.id)
+        assert (paquete.nombre_norm, paquete.origen_norm) == ('atacameno', 'copiapo')
+
+
+def test_busqueda_de_destinos_en_administracion(app, usuario_admin):
+    from app.services import DestinoService
+
+    with app.app_context():
+        for nombre, origen, descripcion in [('Valparaíso', 'Santiago', 'Cerros y ascensores'),
+                                            ('Pucón', 'Temuco', 'Volcán Villarrica'),
+                                            ('San Pedro', 'Calama', 'Desierto 100% seco')]:
+            DestinoService.crear_destino({'nombre': nombre, 'origen': origen, 'descripcion': descripcion,
+                                          'actividades': 'Trekking', 'costo_base': 1000})
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = usuario_admin
+        sesion['usuario_rol'] = 'admin'
+
+    def encontrados(texto):
+        html = cliente.get('/admin/destinos', query_string={'buscar': texto}).get_data(as_text=True)
+        return {nombre for nombre in ('Valparaíso', 'Pucón', 'San Pedro') if nombre in html}
+
+    # Subcadena, sin tildes ni mayúsculas, en nombre, origen y descripción
+    assert encontrados('paraiso') == {'Valparaíso'}
+    assert encontrados('EMUC') == {'Pucón'}
+    assert encontrados('volcan') == {'Pucón'}
+    assert encontrados('100%') == {'San Pedro'}
+    assert encontrados('%') == {'San Pedro'}
+    assert encontrados('lima') == set()
@@ -0,0 +1,129 @@
+"""
+Pruebas de la paginación por cursor
+Recorrer las páginas siguiendo la cabecera Link devuelve cada fila una vez;
+la exportación NDJSON devuelve todas en streaming
+"""
+import json
+import re
+from datetime import datetime, timedelta
+
+
+def recorrer(cliente, url):
+    vistos, paginas = [], 0
+    while url:
+        respuesta = cliente.get(url)
+        assert respuesta.status_code == 200
+        vistos.extend(item['id'] for item in respuesta.get_json())
+        paginas += 1
+        enlace = re.match(r'<([^>]+)>; rel="next"', respuesta.headers.get('Link', ''))
+        url = enlace.group(1) if enlace else None
+    return vistos, paginas
+
+
+def test_paginacion_por_cursor(app, catalogo, crear_usuario):
+    from app.services import ReservaService
+    from app.services.busqueda import reconstruir_indice
+
+    with app.app_context():
+        paquete_ids = catalogo(7)
+        reconstruir_indice()
+        usuario_id = crear_usuario('cliente')
+        reserva_ids = [
+            ReservaService.crear_reserva(usuario_id, {'paquete_id': paquete_id}).id
+            for paquete_id in paquete_ids[:5]
+        ]
+
+    cliente = app.test_client()
+    assert recorrer(cliente, '/api/paquetes?limit=3') == (paquete_ids, 3)
+    assert recorrer(cliente, '/api/destinos?limit=2')[1] == 2
+    # Búsqueda con índice: el cursor incluye la relevancia
+    assert sorted(recorrer(cliente, '/api/buscar?q=kayak&limit=2')[0]) == paquete_ids
+    # Reservas: siempre paginadas, las más recientes primero
+    assert recorrer(cliente, f'/api/reservas/usuario/{usuario_id}?limit=2') == (reserva_ids[::-1], 3)
+
+    respuesta = cliente.get('/api/reservas?total=true')
+    assert respuesta.headers['X-Total-Estimado'] == '5'
+    assert 'Link' not in respuesta.headers
+
+    # La exportación incluye datos personales: sin sesión no se entrega
+    assert cliente.get('/api/reservas?formato=ndjson').status_code == 401
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = usuario_id
+    assert cliente.get('/api/reservas?formato=ndjson').status_code == 403
+    propias = cliente.get(f'/api/reservas/usuario/{usuario_id}?formato=ndjson')
+    assert len(propias.get_data(as_text=True).splitlines()) == 5
+    assert cliente.get(f'/api/reservas/usuario/{usuario_id + 1}?formato=ndjson').status_code == 403
+
+    # Exportación completa en streaming, una reserva por línea (administrador)
+    with app.app_context():
+        admin_id = crear_usuario('admin')
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = admin_id
+    exportacion = cliente.get('/api/reservas', headers={'Accept': 'application/x-ndjson'})
+    assert exportacion.mimetype == 'application/x-ndjson'
+    lineas = exportacion.get_data(as_text=True).splitlines()
+    assert [json.loads(linea)['id'] for linea in lineas] == reserva_ids
+
+    assert cliente.get('/api/paquetes?after=no-es-un-cursor').status_code == 400
+    # Sin limit ni after la lista del catálogo se mantiene completa
+    assert len(cliente.get('/api/paquetes').get_json()) == 7
+
+
+def test_lista_admin_de_reservas_paginada(app, catalogo, contar_consultas, usuario_admin):
+    from app import db
+    from app.models import Reserva
+
+    with app.app_context():
+        paquete_ids = catalogo(2)
+        # Varias reservas con la misma fecha: el id desempata el cursor
+        base = datetime(2026, 5, 1, 12)
+        for i in range(7):
+            db.session.add(Reserva(usuario_id=usuario_admin, paquete_id=paquete_ids[i % 2],
+                                   estado='cancelada' if i % 3 == 0 else 'confirmada',
+                                   fecha_reserva=base + timedelta(hours=i // 2)))
+        db.session.commit()
+        esperados = [r.id for r in Reserva.query.order_by(Reserva.fecha_reserva.desc(), Reserva.id.desc())]
+        confirmadas = [r.id for r in Reserva.query.filter_by(estado='confirmada')
+                       .order_by(Reserva.fecha_reserva.desc(), Reserva.id.desc())]
+        engine = db.engine
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = usuario_admin
+
+    def recorrer_html(url):
+        vistos = []
+        while url:
+            with contar_consultas(engine) as consultas:
+                html = cliente.get(url).get_data(as_text=True)
+            # Usuario, página y total: sin consultas por fila
+            assert len(consultas) == 3
+            vistos.extend(int(n) for n in re.findall(r'/admin/reservas/detalle/(\d+)', html))
+            enlace = re.search(r'href="([^"]*after=[^"]*)"', html)
+            url = enlace.group(1).replace('&amp;', '&') if enlace else None
+        return vistos, html
+
+    vistos, html = recorrer_html('/admin/reservas?limit=3')
+    assert vistos == esperados
+    assert '7 reserva(s)' in html
+    assert recorrer_html('/admin/reservas?estado=confirmada&limit=2')[0] == confirmadas
+    assert cliente.get('/admin/reservas?after=xyz').status_code == 302
+
+
+def test_fecha_reserva_no_admite_nulos(app, catalogo, usuario_cliente):
+    import pytest
+    from sqlalchemy.exc import IntegrityError
+    from app import db
+    from app.models import Reserva
+
+    with app.app_context():
+        paquete_id = catalogo(1)[0]
+        # Sin valor se usa la fecha actual; un NULL explícito rompería el cursor (fecha, id)
+        db.session.add(Reserva(usuario_id=usuario_cliente, paquete_id=paquete_id))
+        db.session.commit()
+        with pytest.raises(IntegrityError):
+            db.session.execute(Reserva.__table__.insert().values(
+                usuario_id=usuario_cliente, paquete_id=paquete_id, fecha_reserva=None
+            ))
+        db.session.rollback()
+        assert Reserva.query.filter(Reserva.fecha_reserva.is_(None)).count() == 0
@@ -0,0 +1,46 @@
+"""
+Pruebas del perfilado bajo demanda
+Solo perfila a administradores, guarda los últimos N perfiles y se descargan como pstats
+"""
+import pstats
+
+
+def test_perfilado_de_administrador(app, tmp_path, usuario_admin, usuario_cliente):
+    from app.services.perfilado import init_perfilado
+
+    app.config.update(PERFILADO_ACTIVO=True, PERFILADO_MAX=2)
+    # create_app ya corrió con el perfilado desactivado (valor por defecto)
+    assert 'perfiles' not in app.extensions
+    init_perfilado(app)
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = usuario_cliente
+    assert 'X-Perfil-Id' not in cliente.get('/api/paquetes', headers={'X-Perfilar': 'cpu'}).headers
+
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = usuario_admin
+    assert 'X-Perfil-Id' not in cliente.get('/api/paquetes').headers
+    assert cliente.get('/api/paquetes', headers={'X-Perfilar': 'cpu'}).headers['X-Perfil-Id'] == '1'
+
+    # La API JSON no lleva token CSRF, como las demás APIs del panel
+    app.config['WTF_CSRF_ENABLED'] = True
+    assert cliente.post('/admin/api/perfilado', json={'modo': 'memoria'}).get_json() == {'modo': 'memoria'}
+    app.config['WTF_CSRF_ENABLED'] = False
+    assert cliente.get('/api/destinos').headers['X-Perfil-Id'] == '2'
+    assert cliente.get('/admin/').headers['X-Perfil-Id'] == '3'
+    assert cliente.post('/admin/api/perfilado', json={'modo': None}).status_code == 200
+    assert 'X-Perfil-Id' not in cliente.get('/admin/').headers
+
+    perfiles = cliente.get('/admin/api/perfiles').get_json()['perfiles']
+    assert [p['id'] for p in perfiles] == [3, 2]  # el buffer guarda los 2 últimos
+    assert perfiles[1]['endpoint'] == 'destinos.listar' and perfiles[1]['memoria']['pico_kb'] > 0
+    assert 'pstats' not in perfiles[0]
+    assert cliente.get('/admin/api/perfiles/1.pstats').status_code == 404
+
+    respuesta = cliente.get('/admin/api/perfiles/3.pstats')
+    assert 'perfil-3-admin.dashboard.pstats' in respuesta.headers['Content-Disposition']
+    archivo = tmp_path / 'perfil.pstats'
+    archivo.write_bytes(respuesta.data)
+    funciones = {nombre for _, _, nombre in pstats.Stats(str(archivo)).stats}
+    assert 'dashboard' in funciones
@@ -0,0 +1,47 @@
+"""
+Pruebas de los reportes de operación con NumPy
+Coinciden con el cálculo fila a fila sobre los objetos ORM, con cualquier lote
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+
+def test_reporte_operaciones_equivale_a_fila_a_fila(app, catalogo, usuario_admin):
+    from app import db
+    from app.models import Paquete, Reserva
+    from app.services.reportes import ReportesService
+
+    with app.app_context():
+        paquete_ids = catalogo(3)
+        # Salida de los paquetes: 2030-01-01
+        for i, (dias, estado, pasajeros) in enumerate([
+            (3, 'confirmada', 2), (7, 'cancelada', 1), (8, 'confirmada', 4), (45, 'cancelada', 1),
+            (45, 'confirmada', 1), (200, 'confirmada', 3), (400, 'cancelada', 2),
+        ]):
+            db.session.add(Reserva(
+                usuario_id=usuario_admin, paquete_id=paquete_ids[i % 2], estado=estado,
+                numero_pasajeros=pasajeros, fecha_reserva=datetime(2030, 1, 1, 12) - timedelta(days=dias)
+            ))
+        db.session.commit()
+
+        reporte = ReportesService.operaciones()
+        assert ReportesService.operaciones(lote=2) == reporte
+
+        for fila, paquete in zip(reporte['paquetes'], Paquete.query.order_by(Paquete.id)):
+            confirmadas = [r for r in paquete.reservas if r.estado == 'confirmada']
+            canceladas = [r for r in paquete.reservas if r.estado == 'cancelada']
+            vendidos = sum(r.numero_pasajeros for r in confirmadas)
+            capacidad = vendidos + paquete.disponibles
+            assert fila['vendidos'] == vendidos and fila['capacidad'] == capacidad
+            assert fila['ocupacion'] == round(vendidos / capacidad, 4)
+            assert fila['ingresos'] == float(paquete.precio_total) * len(confirmadas)
+            total = len(confirmadas) + len(canceladas)
+            assert fila['tasa_cancelacion'] == (round(len(canceladas) / total, 4) if total else 0)
+
+        assert reporte['paquetes'][2]['ocupacion'] == 0
+        assert [(t['dias_anticipacion'], t['reservas'], t['canceladas'])
+                for t in reporte['cancelacion_por_anticipacion']] == [
+            ('0-7', 2, 1), ('8-30', 1, 0), ('31-90', 2, 1), ('91-180', 0, 0), ('181+', 2, 1)]
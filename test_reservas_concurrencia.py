@@ -0,0 +1,76 @@
+"""
+Prueba de estrés de reservas concurrentes
+Varios hilos reservan el mismo paquete a la vez sobre SQLite y se verifica
+que nunca se vendan más cupos de los disponibles
+"""
+import random
+import threading
+from datetime import date
+
+CUPOS = 40
+HILOS = 8
+INTENTOS_POR_HILO = 25
+
+
+def test_reservas_concurrentes_sin_sobreventa(app, usuario_cliente):
+    """Ningún paquete queda con cupos negativos ni con reservas de más"""
+    from app import db
+    from app.models import Paquete, Reserva
+    from app.services import ReservaService
+
+    with app.app_context():
+        paquete = Paquete(
+            nombre='Paquete Popular',
+            origen='Santiago',
+            fecha_inicio=date(2030, 1, 1),
+            fecha_fin=date(2030, 1, 10),
+            precio_total=100000,
+            disponibles=CUPOS
+        )
+        db.session.add(paquete)
+        db.session.commit()
+        usuario_id, paquete_id = usuario_cliente, paquete.id
+
+    vendidos = []
+    rechazos = []
+    errores = []
+    barrera = threading.Barrier(HILOS)
+
+    def reservar(semilla):
+        aleatorio = random.Random(semilla)
+        with app.app_context():
+            barrera.wait()
+            for _ in range(INTENTOS_POR_HILO):
+                pasajeros = aleatorio.randint(1, 3)
+                try:
+                    ReservaService.crear_reserva(usuario_id, {
+                        'paquete_id': paquete_id,
+                        'numero_pasajeros': pasajeros
+                    })
+                    vendidos.append(pasajeros)
+                except ValueError:
+                    db.session.rollback()
+                    rechazos.append(pasajeros)
+                except Exception as e:
+                    db.session.rollback()
+                    errores.append(e)
+
+    hilos = [threading.Thread(target=reservar, args=(i,)) for i in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert not errores, errores
+    assert rechazos, 'La prueba debe agotar el paquete'
+
+    with app.app_context():
+        paquete = db.session.get(Paquete, paquete_id)
+        pasajeros_reservados = db.session.query(
+            db.func.coalesce(db.func.sum(Reserva.numero_pasajeros), 0)
+        ).filter(Reserva.paquete_id == paquete_id).scalar()
+
+        assert paquete.disponibles >= 0
+        assert pasajeros_reservados == sum(vendidos)
+        assert pasajeros_reservados + paquete.disponibles == CUPOS
+
@@ -0,0 +1,65 @@
+"""
+Pruebas del checkout en lote (POST /api/reservas/lote)
+Todo o nada, líneas repetidas del mismo paquete y validación de la entrada
+"""
+
+
+def test_lote_todo_o_nada_y_lineas_repetidas(app, catalogo, usuario_cliente):
+    from app import db
+    from app.models import Paquete, Reserva
+
+    with app.app_context():
+        paquete_ids = catalogo(2)
+        db.session.get(Paquete, paquete_ids[1]).disponibles = 1
+        db.session.commit()
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = usuario_cliente
+        sesion['usuario_rol'] = 'cliente'
+
+    # El segundo paquete no alcanza: no se guarda nada y el error nombra al paquete agotado
+    respuesta = cliente.post('/api/reservas/lote', json={'reservas': [
+        {'paquete_id': paquete_ids[0], 'numero_pasajeros': 2},
+        {'paquete_id': paquete_ids[1], 'numero_pasajeros': 2},
+    ]})
+    assert respuesta.status_code == 400
+    assert '"Paquete 1"' in respuesta.get_json()['error']
+    with app.app_context():
+        assert db.session.get(Paquete, paquete_ids[0]).disponibles == 50
+        assert Reserva.query.count() == 0
+
+    # Dos líneas del mismo paquete se descuentan juntas y crean dos reservas
+    respuesta = cliente.post('/api/reservas/lote', json={'reservas': [
+        {'paquete_id': paquete_ids[0], 'numero_pasajeros': 2},
+        {'paquete_id': paquete_ids[0], 'numero_pasajeros': 3},
+    ]})
+    assert respuesta.status_code == 201
+    assert [r['numero_pasajeros'] for r in respuesta.get_json()] == [2, 3]
+    with app.app_context():
+        assert db.session.get(Paquete, paquete_ids[0]).disponibles == 45
+
+    # Juntas superan los cupos aunque cada línea por separado alcance
+    respuesta = cliente.post('/api/reservas/lote', json={'reservas': [
+        {'paquete_id': paquete_ids[0], 'numero_pasajeros': 30},
+        {'paquete_id': paquete_ids[0], 'numero_pasajeros': 30},
+    ]})
+    assert respuesta.status_code == 400
+    with app.app_context():
+        assert db.session.get(Paquete, paquete_ids[0]).disponibles == 45
+
+    for cuerpo in (
+        [{'paquete_id': paquete_ids[0]}],
+        'reservas',
+        {'reservas': [{'paquete_id': paquete_ids[0], 'numero_pasajeros': '2'}]},
+        {'reservas': [{'paquete_id': paquete_ids[0], 'numero_pasajeros': 1.5}]},
+        {'reservas': {'paquete_id': paquete_ids[0]}},
+        {'reservas': 'todas'},
+        {'reservas': [paquete_ids[0]]},
+        {'reservas': [{'paquete_id': paquete_ids[0], 'viajeros': ['Ana']}]},
+    ):
+        assert cliente.post('/api/reservas/lote', json=cuerpo).status_code == 400, cuerpo
+    assert cliente.post('/api/reservas/lote', data='{', content_type='application/json').status_code == 400
+    assert cliente.post('/api/reservas', json={
+        'paquete_id': paquete_ids[0], 'numero_pasajeros': '2'
+    }).status_code == 400
@@ -0,0 +1,39 @@
+"""
+Pruebas de ?fields= y ?expand= en los serializadores
+Las relaciones no pedidas no se serializan ni se consultan
+"""
+import re
+
+
+def test_campos_y_relaciones_pedidas(app, catalogo, contar_consultas, usuario_cliente):
+    from app import db
+    from app.services import ReservaService
+
+    with app.app_context():
+        paquete_ids = catalogo(3)
+        for paquete_id in paquete_ids:
+            ReservaService.crear_reserva(usuario_cliente, {'paquete_id': paquete_id})
+        engine = db.engine
+
+    cliente = app.test_client()
+    url = f'/api/reservas/usuario/{usuario_cliente}'
+
+    with contar_consultas(engine) as completas:
+        completo = cliente.get(url).get_json()
+    assert set(completo[0]) >= {'usuario', 'paquete', 'viajeros'}
+    assert completo[0]['paquete']['destinos'][0]['descripcion'] == 'Descripción'
+
+    with contar_consultas(engine) as reducidas:
+        reducido = cliente.get(f'{url}?fields=estado,paquete.nombre').get_json()
+    assert reducido[0] == {'id': completo[0]['id'], 'estado': 'confirmada',
+                           'paquete': {'id': paquete_ids[-1], 'nombre': 'Paquete 2'}}
+    assert len(reducidas) < len(completas)
+    assert not any(re.search(r'\b(usuarios|pasajeros|destinos)\b', sql) for sql in reducidas)
+
+    expandido = cliente.get(f'{url}?expand=paquete.destinos&fields=id,paquete.destinos.nombre').get_json()
+    assert expandido[0]['paquete'] == {
+        'id': paquete_ids[-1], 'destinos': [{'id': i + 1, 'nombre': f'Destino {i}'} for i in range(3)]
+    }
+
+    paquetes = cliente.get('/api/paquetes?fields=nombre,disponibles').get_json()
+    assert paquetes[0] == {'id': paquete_ids[0], 'nombre': 'Paquete 0', 'disponibles': 49}
@@ -0,0 +1,42 @@
+"""
+Pruebas de los serializadores compilados
+Producen lo mismo que to_dict() y no sirven versiones viejas de la caché
+"""
+
+
+def test_serializadores_equivalen_a_to_dict(app, catalogo, crear_usuario):
+    from app import db
+    from app.models import Destino, Paquete, Reserva, Viajero
+    from app.services import ReservaService
+    from app.services.serializadores import CAMPOS, serializador, listar_paquetes
+
+    with app.app_context():
+        paquete_ids = catalogo(3)
+        usuario_id = crear_usuario('cliente', telefono='912345678')
+        ReservaService.crear_reserva(usuario_id, {
+            'paquete_id': paquete_ids[0],
+            'viajeros': [{'nombre_completo': 'Viajero', 'rut': '11111111-1', 'fecha_nacimiento': '1990-01-01',
+                          'telefono': '912345678'}]
+        })
+
+        for modelo in CAMPOS:
+            s = serializador(modelo)
+            filas = db.session.execute(s.select().order_by(modelo.id)).all()
+            esperado = [m.to_dict() for m in modelo.query.order_by(modelo.id)]
+            if modelo is Paquete:
+                esperado = [{k: v for k, v in d.items() if k != 'destinos'} for d in esperado]
+            if modelo is Reserva:
+                esperado = [{k: v for k, v in d.items() if k not in ('usuario', 'paquete', 'viajeros')}
+                            for d in esperado]
+            assert [s(f) for f in filas] == esperado, modelo.__name__
+
+        assert listar_paquetes() == [p.to_dict() for p in Paquete.query.order_by(Paquete.id)]
+        assert Viajero.query.count() == 1
+
+        # El UPDATE masivo de cupos sube la versión: la caché no devuelve el valor anterior
+        ReservaService.crear_reserva(usuario_id, {'paquete_id': paquete_ids[1], 'numero_pasajeros': 3})
+        assert listar_paquetes()[1]['disponibles'] == 47
+        destino = db.session.get(Destino, 1)
+        destino.nombre = 'Renombrado'
+        db.session.commit()
+        assert listar_paquetes()[0]['destinos'][0]['nombre'] == 'Renombrado'
@@ -0,0 +1,51 @@
+"""
+Pruebas del índice de trigramas de la búsqueda de reservas en administración
+Encuentra subcadenas y se mantiene al crear, modificar y eliminar entidades
+"""
+import re
+
+
+def test_busqueda_por_subcadena(app, catalogo, crear_usuario, usuario_admin):
+    from app import db
+    from app.models import Usuario, Reserva, Trigrama
+    from app.services.trigramas import coincidencias, trigramas
+
+    with app.app_context():
+        paquete_ids = catalogo(2)
+        usuarios = [
+            db.session.get(Usuario, crear_usuario(nombre_completo=nombre, email=email))
+            for nombre, email in [('María Pérez', 'maria@correo.cl'), ('Juan Soto', 'jsoto@viajes.cl'),
+                                  ('Temporal', 'temporal@example.com')]
+        ]
+        reservas = [Reserva(usuario_id=usuario.id, paquete_id=paquete_ids[i]) for i, usuario in enumerate(usuarios[:2])]
+        db.session.add_all(reservas)
+        db.session.commit()
+
+        def usuarios_con(texto):
+            return sorted(db.session.scalars(coincidencias('usuario', texto)))
+
+        assert trigramas('Pérez') == {'per', 'ere', 'rez'}
+        assert usuarios_con('EREZ') == [usuarios[0].id]
+        assert usuarios_con('viajes') == [usuarios[1].id]
+        assert usuarios_con('ju') == [usuarios[1].id]  # menos de 3 letras: prefijo
+        assert usuarios_con('zpe') == []  # todos los trigramas, pero no la subcadena
+        assert usuarios_con('%') == []
+        assert sorted(db.session.scalars(coincidencias('paquete', 'quete 1'))) == [paquete_ids[1]]
+
+        usuarios[0].nombre_completo = 'María González'
+        db.session.commit()
+        assert usuarios_con('pérez') == []
+        assert usuarios_con('gonz') == [usuarios[0].id]
+
+        eliminado_id = usuarios[2].id
+        db.session.delete(usuarios[2])
+        db.session.commit()
+        assert Trigrama.query.filter_by(tipo='usuario', entidad_id=eliminado_id).count() == 0
+
+        reserva_maria = reservas[0].id
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['usuario_id'] = usuario_admin
+    html = cliente.get('/admin/reservas?buscar=zále').get_data(as_text=True)
+    assert re.findall(r'/admin/reservas/detalle/(\d+)', html) == [str(reserva_maria)]